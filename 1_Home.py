@@ -1,6 +1,9 @@
 import streamlit as st
 
+from utils.metrics import begin_rerun, finish_rerun
+
 st.set_page_config(page_title="Dashboard Expectativa de Vida por Região", layout="wide")
+begin_rerun("home")
 
 st.title("🌍 Dashboard Expectativa de Vida por Região")
 
@@ -45,4 +48,8 @@ st.markdown("""
 st.subheader("🚀 Explore os Dados!")
 st.write("Navegue pelas páginas do dashboard para visualizar gráficos interativos e obter insights valiosos.")
 if st.button("Ir para Análises 📊"):
+    # switch_page interrompe o script: o rerun é registrado antes
+    finish_rerun()
     st.switch_page("pages/2_📊_Analise de Dados.py")
+
+finish_rerun()
@@ -0,0 +1,187 @@
+"""Casos de benchmark: cada caso prepara suas entradas (fora da medição) e executa um cálculo das páginas."""
+from pathlib import Path
+
+from utils.charts import (choropleth_figure, country_change_figure, histogram_box_figure, scatter_lod_figure,
+                          small_multiples_figure)
+from utils.chatbot import IntentRouter
+from utils.correlation import pearson_matrix, spearman_matrix
+from utils.cube import AggregateCube, block_ranges
+from utils.data import METRIC_COLUMNS, parse_csv
+from utils.forecast import trend_forecast
+from utils.lod import histogram_summary, scatter_summary
+from utils.partitions import PartitionIndex
+from utils.query import ArrowBackend, PandasBackend, write_dataset
+from utils.rankings import get_top_bottom_life_expectancy, process_data
+from utils.regression import fit_by_year
+from utils.stats import bootstrap_ci, country_confidence_intervals, permutation_test, welch_sweep
+
+CHAT_QUESTIONS = [
+    "Qual a expectativa de vida no Japão?",
+    "mortalidade infantil no Brasil em 2010",
+    "top 5 PIB 2014",
+    "país com maior expectativa de vida",
+    "Relação entre PIB e expectativa de vida",
+    "o que é vacinação?",
+]
+
+CASES = {}
+
+
+def case(name, setup=None, payload=None):
+    # setup(df, csv_path) -> entrada; run(entrada) -> resultado; payload(resultado) -> figura (opcional)
+    def register(run):
+        CASES[name] = {"setup": setup or (lambda df, path: df), "run": run, "payload": payload}
+        return run
+    return register
+
+
+def _vaccine_groups(df, column="Hepatitis B", threshold=90):
+    data = df[df[column].notna() & df["Life expectancy"].notna()]
+    high = data.loc[data[column] >= threshold, "Life expectancy"].to_numpy()
+    low = data.loc[data[column] < threshold, "Life expectancy"].to_numpy()
+    return high, low
+
+
+@case("load_csv", setup=lambda df, path: path)
+def _load_csv(path):
+    return parse_csv(path)
+
+
+@case("partition_index")
+def _partition_index(df):
+    return PartitionIndex(df)
+
+
+def _pandas_backend(df, path):
+    return PandasBackend(df, PartitionIndex(df))
+
+
+def _arrow_backend(df, path):
+    # Dataset particionado gravado ao lado do CSV sintético (fora da medição)
+    target = Path(path).with_suffix(".dataset")
+    if not target.exists():
+        write_dataset(df, target)
+    return ArrowBackend(target)
+
+
+MAP_FILTERS = [("Year", "==", 2015), ("ISO3", "notnull"), ("Measles", "notnull")]
+
+
+@case("process_data", setup=_pandas_backend)
+def _process_data(backend):
+    return process_data(backend)
+
+
+@case("process_data_arrow", setup=_arrow_backend)
+def _process_data_arrow(backend):
+    return process_data(backend)
+
+
+@case("top_bottom_vaccination", setup=_pandas_backend)
+def _top_bottom(backend):
+    return get_top_bottom_life_expectancy(backend)
+
+
+@case("map_select", setup=_pandas_backend)
+def _map_select(backend):
+    return backend.select(["ISO3", "Country", "Measles"], MAP_FILTERS)
+
+
+@case("map_select_arrow", setup=_arrow_backend)
+def _map_select_arrow(backend):
+    return backend.select(["ISO3", "Country", "Measles"], MAP_FILTERS)
+
+
+@case("confidence_intervals", payload=lambda stats: country_change_figure(stats))
+def _confidence_intervals(df):
+    return country_confidence_intervals(df)
+
+
+@case("ols_by_year")
+def _ols_by_year(df):
+    return fit_by_year(df, ["GDP"])
+
+
+@case("ols_multi_by_year")
+def _ols_multi(df):
+    return fit_by_year(df, ["GDP", "Schooling", "HIV/AIDS", "Adult Mortality"])
+
+
+@case("welch_sweep", setup=lambda df, path: df[df["Hepatitis B"].notna()][["Hepatitis B", "Life expectancy"]])
+def _welch_sweep(data):
+    return welch_sweep(data["Hepatitis B"].to_numpy(), data["Life expectancy"].to_numpy())
+
+
+@case("permutation_10k", setup=lambda df, path: _vaccine_groups(df))
+def _permutation(groups):
+    return permutation_test(*groups, iterations=10_000)
+
+
+@case("bootstrap_10k", setup=lambda df, path: _vaccine_groups(df))
+def _bootstrap(groups):
+    return bootstrap_ci(*groups, iterations=10_000)
+
+
+@case("aggregate_cube")
+def _aggregate_cube(df):
+    return AggregateCube(df)
+
+
+@case("chat_router", setup=lambda df, path: IntentRouter(AggregateCube(df)))
+def _chat_router(router):
+    return [router.route(question) for question in CHAT_QUESTIONS]
+
+
+def _map_payload(partitions):
+    year = partitions.years[len(partitions.years) // 2]
+    frame = partitions.year(year)[["ISO3", "Country", "Life expectancy"]].dropna()
+    return {
+        "locations": frame["ISO3"].astype(str).to_numpy(),
+        "z": frame["Life expectancy"].to_numpy(dtype="float32"),
+        "text": frame["Country"].astype(str).to_numpy(),
+    }
+
+
+@case("choropleth_figure", setup=lambda df, path: _map_payload(PartitionIndex(df)), payload=lambda fig: fig)
+def _choropleth(payload):
+    return choropleth_figure(payload, "Life expectancy", title="Expectativa de Vida")
+
+
+@case("histogram_figure", payload=lambda fig: fig)
+def _histogram(df):
+    import plotly.express as px
+
+    return px.histogram(df, x="Life expectancy", nbins=30, opacity=0.7, marginal="box")
+
+
+@case("histogram_lod", payload=lambda summary: histogram_box_figure(summary, "Expectativa de Vida", title=""))
+def _histogram_lod(df):
+    return histogram_summary(df["Life expectancy"].to_numpy())
+
+
+@case("scatter_lod", payload=lambda summary: scatter_lod_figure(summary, "PIB", "Expectativa de Vida", title=""))
+def _scatter_lod(df):
+    return scatter_summary(df["GDP"].to_numpy(), df["Life expectancy"].to_numpy())
+
+
+@case("correlation_pearson", setup=lambda df, path: df[METRIC_COLUMNS].to_numpy(dtype="float64"))
+def _correlation_pearson(X):
+    return pearson_matrix(X)
+
+
+@case("correlation_spearman", setup=lambda df, path: df[METRIC_COLUMNS].to_numpy(dtype="float64"))
+def _correlation_spearman(X):
+    return spearman_matrix(X)
+
+
+@case("forecast_linear", setup=lambda df, path: AggregateCube(df))
+def _forecast_linear(cube):
+    return trend_forecast(cube.values[cube.metric_index("Life expectancy")], cube.years)
+
+
+@case("small_multiples", setup=lambda df, path: AggregateCube(df), payload=lambda fig: fig)
+def _small_multiples(cube):
+    # Uma página da comparação: 8 países x 3 indicadores, fatiados do cubo
+    countries, metrics = cube.countries[:8], ["Life expectancy", "GDP", "Schooling"]
+    block = cube.block(metrics, countries)
+    return small_multiples_figure(cube.years, block, countries, metrics, block_ranges(block), title="Comparação")
@@ -0,0 +1,55 @@
+"""Compara dois resultados de benchmarks.run e aponta regressões acima da tolerância.
+
+Uso:
+    python -m benchmarks.compare bench_antes.json bench_depois.json --tolerance 0.15
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+METRICS = [("wall_s", "tempo"), ("peak_rss_bytes", "memória"), ("payload_bytes", "payload")]
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as fh:
+        report = json.load(fh)
+    return report["meta"], {(r["name"], r["scale"]): r for r in report["results"]}
+
+
+def compare(before, after, tolerance):
+    rows = []
+    for key in sorted(before.keys() & after.keys(), key=lambda k: (k[1], k[0])):
+        for metric, label in METRICS:
+            old, new = before[key].get(metric), after[key].get(metric)
+            if not old or new is None:
+                continue
+            change = new / old - 1
+            rows.append({"name": key[0], "scale": key[1], "metric": label, "before": old, "after": new,
+                         "change": change, "regression": change > tolerance})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before", type=Path)
+    parser.add_argument("after", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.10, help="aumento relativo aceito (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    meta_before, before = load_results(args.before)
+    meta_after, after = load_results(args.after)
+    print(f"{meta_before.get('commit') or '?'} -> {meta_after.get('commit') or '?'}")
+
+    rows = compare(before, after, args.tolerance)
+    for row in rows:
+        flag = "REGRESSÃO" if row["regression"] else ""
+        print(f"x{row['scale']:<5} {row['name']:45} {row['metric']:8} {row['before']:>14.4g} -> "
+              f"{row['after']:<14.4g} {row['change']:+7.1%} {flag}")
+    for key in sorted(before.keys() - after.keys()):
+        print(f"x{key[1]:<5} {key[0]:45} ausente no segundo resultado")
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""Suite de benchmarks headless das páginas e dos cálculos do dashboard.
+
+Cada medição roda em um processo novo, para que o pico de memória (RSS) de um caso não contamine
+o próximo. Os dados sintéticos mantêm o esquema de LifeExpectancy.csv e crescem em países e anos.
+
+Uso:
+    python -m benchmarks.run --scales 1 10 100 --out bench_results.json
+    python -m benchmarks.run --scales 1000 --cases ols_by_year welch_sweep --skip-pages
+    python -m benchmarks.compare bench_antes.json bench_depois.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT_DIR / ".cache" / "bench"
+
+
+def _peak_rss():
+    # ru_maxrss é em KiB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def child_case(name, csv_path, repeat):
+    from benchmarks.cases import CASES
+    from utils.data import parse_csv
+
+    spec = CASES[name]
+    df = parse_csv(csv_path)
+    data = spec["setup"](df, csv_path)
+    rss_before = _peak_rss()
+    # Primeira execução fora da medição: importações preguiçosas (scipy, plotly) não entram no tempo
+    spec["run"](data)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = spec["run"](data)
+        timings.append(time.perf_counter() - start)
+    payload = None
+    if spec["payload"] is not None:
+        payload = len(spec["payload"](result).to_json().encode("utf-8"))
+    return {"rows": len(df), "wall_s": min(timings), "wall_s_median": sorted(timings)[len(timings) // 2],
+            "peak_rss_bytes": _peak_rss(), "rss_delta_bytes": _peak_rss() - rss_before,
+            "payload_bytes": payload, "error": []}
+
+
+def child_page(page, timeout):
+    sys.path.insert(0, str(ROOT_DIR))
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(page), default_timeout=timeout)
+    rss_before = _peak_rss()
+    start = time.perf_counter()
+    at.run()
+    wall = time.perf_counter() - start
+    payload = sum(len(element.proto.spec.encode("utf-8")) for element in at.get("plotly_chart"))
+    return {"wall_s": wall, "wall_s_median": wall, "peak_rss_bytes": _peak_rss(),
+            "rss_delta_bytes": _peak_rss() - rss_before, "payload_bytes": payload,
+            "error": [str(e.value) for e in at.exception]}
+
+
+def run_child(args, env=None, timeout=600):
+    cmd = [sys.executable, "-m", "benchmarks.run", "--child"] + args
+    try:
+        proc = subprocess.run(cmd, cwd=ROOT_DIR, env=env, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"error": [f"timeout após {timeout}s"]}
+    try:
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        return {"error": proc.stderr.strip().splitlines()[-3:]}
+
+
+def synthetic_csv(scale):
+    from benchmarks.synthetic import write_synthetic
+
+    path = DATA_DIR / f"synthetic_x{scale}.csv"
+    if not path.exists():
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        write_synthetic(scale, tmp)
+        os.replace(tmp, path)
+    return path
+
+
+def list_pages():
+    return [ROOT_DIR / "1_Home.py"] + sorted((ROOT_DIR / "pages").glob("*.py"))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    from benchmarks.cases import CASES
+    from benchmarks.synthetic import SCALES
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="*", type=int, default=[1, 10, 100], choices=sorted(SCALES))
+    parser.add_argument("--cases", nargs="*", default=sorted(CASES), help="casos de cálculo a executar")
+    parser.add_argument("--skip-pages", action="store_true", help="não renderiza as páginas via AppTest")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições por caso (vale o menor tempo)")
+    parser.add_argument("--timeout", type=int, default=600, help="tempo máximo por medição (s)")
+    parser.add_argument("--out", type=Path, default=ROOT_DIR / "bench_results.json")
+    args = parser.parse_args(argv)
+
+    results = []
+    for scale in args.scales:
+        csv_path = synthetic_csv(scale)
+        env = dict(os.environ, LIFE_EXPECTANCY_CSV=str(csv_path))
+        jobs = [(f"case:{name}", ["case", name, str(csv_path), str(args.repeat)]) for name in args.cases]
+        if not args.skip_pages:
+            jobs += [(f"page:{page.name}", ["page", str(page), str(args.timeout)]) for page in list_pages()]
+        for label, job in jobs:
+            result = run_child(job, env, args.timeout)
+            result.update(name=label, scale=scale)
+            results.append(result)
+            status = "ERRO " + "; ".join(result["error"]) if result.get("error") else ""
+            wall = result.get("wall_s")
+            rss = result.get("peak_rss_bytes")
+            payload = result.get("payload_bytes")
+            print(f"x{scale:<5} {label:45} "
+                  f"{'' if wall is None else f'{wall * 1000:10.1f} ms'}"
+                  f"{'' if rss is None else f'{rss / 2**20:9.1f} MiB'}"
+                  f"{'' if not payload else f'{payload / 1024:10.1f} KiB'} {status}")
+
+    report = {
+        "meta": {"commit": git_commit(), "created": datetime.now(timezone.utc).isoformat(),
+                 "python": platform.python_version(), "platform": platform.platform()},
+        "results": results,
+    }
+    args.out.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Resultados gravados em {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        kind, target, *rest = sys.argv[2:]
+        if kind == "case":
+            output = child_case(target, Path(rest[0]), int(rest[1]))
+        else:
+            output = child_page(Path(target), int(rest[0]))
+        print(json.dumps(output))
+    else:
+        sys.exit(main())
@@ -0,0 +1,57 @@
+"""Gerador de dados sintéticos com o mesmo esquema de LifeExpectancy.csv, em escala maior."""
+import numpy as np
+import pandas as pd
+
+from utils.data import CSV_PATH
+
+# escala -> (multiplicador de países, multiplicador de anos)
+SCALES = {1: (1, 1), 10: (5, 2), 100: (10, 10), 1000: (40, 25)}
+
+
+def synthesize(base, country_factor, year_factor, seed=0):
+    # Cada país sintético copia a série de um país real (com ruído proporcional ao desvio padrão
+    # de cada coluna) e os anos extras repetem o ciclo original deslocado no tempo.
+    rng = np.random.default_rng(seed)
+    base = base.sort_values(["Country", "Year"]).reset_index(drop=True)
+    countries = base["Country"].unique()
+    years = np.sort(base["Year"].unique())
+    n_countries, n_years = len(countries), len(years)
+
+    total_countries = n_countries * country_factor
+    total_years = n_years * year_factor
+    first_year = int(years[0])
+
+    country_ids = np.repeat(np.arange(total_countries), total_years)
+    year_offsets = np.tile(np.arange(total_years), total_countries)
+    base_country = country_ids % n_countries
+    base_year = year_offsets % n_years
+
+    # Índice da linha original correspondente (painel completo: país x ano)
+    lookup = pd.Series(np.arange(len(base)), index=pd.MultiIndex.from_arrays(
+        [pd.Categorical(base["Country"], categories=countries).codes, np.searchsorted(years, base["Year"])]))
+    source = lookup.reindex(pd.MultiIndex.from_arrays([base_country, base_year])).to_numpy()
+
+    # Combinações país x ano ausentes na base continuam ausentes nos dados sintéticos
+    present = ~np.isnan(source)
+    country_ids, year_offsets = country_ids[present], year_offsets[present]
+    base_country = base_country[present]
+    out = base.iloc[source[present].astype(int)].reset_index(drop=True)
+
+    replica = country_ids // n_countries
+    names = np.asarray(countries, dtype=object)[base_country]
+    out["Country"] = np.where(replica == 0, names, names + " " + (replica + 1).astype(str))
+    out["Year"] = first_year + year_offsets
+
+    numeric = out.columns.drop(["Country", "Year", "Status"])
+    noise_scale = base[numeric].std().to_numpy() * 0.05
+    noisy = out[numeric].to_numpy(dtype="float64")
+    noisy += rng.normal(size=noisy.shape) * noise_scale * ((replica > 0) | (year_offsets >= n_years))[:, None]
+    out[numeric] = np.clip(noisy, 0, None)
+    return out
+
+
+def write_synthetic(scale, path, base_path=CSV_PATH, seed=0):
+    country_factor, year_factor = SCALES[scale]
+    df = synthesize(pd.read_csv(base_path), country_factor, year_factor, seed)
+    df.to_csv(path, index=False)
+    return len(df)
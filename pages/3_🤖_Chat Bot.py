@@ -1,98 +1,69 @@
 import streamlit as st
-import pandas as pd
-import openai
-import os
-import time
-import re
 
-api_key = st.secrets.get("OPENROUTER_API_KEY", None)
+from utils.answer_cache import load_answer_cache
+from utils.chatbot import load_router
+from utils.llm import llm_settings, stream_answer
+from utils.metrics import begin_rerun, debug_enabled, finish_rerun, stage
+from utils.session_memory import load_history, page_size, session_usage
 
-if not api_key:
-    st.error("❌ Erro: Chave da API não encontrada! Configure-a no Streamlit Secrets.")
+begin_rerun("chatbot")
+
+# Configuração do OpenAI para OpenRouter (cliente único por processo, criado sob demanda)
+settings = llm_settings()
 
-# Configuração do OpenAI para OpenRouter
-client = openai.OpenAI(
-    base_url="https://openrouter.ai/api/v1",
-    api_key=api_key,
-)
+if not settings["api_key"]:
+    st.error("❌ Erro: Chave da API não encontrada! Configure-a no Streamlit Secrets.")
 
-# Função para carregar os dados
-@st.cache_data
-def load_data():
-    return pd.read_csv("LifeExpectancy.csv")
+# Roteador de perguntas sobre os dados
+router = load_router()
 
-df = load_data()
+# Cache de respostas da IA compartilhado entre as sessões
+answer_cache = load_answer_cache()
 
-# Inicializa histórico de mensagens no session_state
-if "messages" not in st.session_state:
-    st.session_state["messages"] = []
+# Histórico da sessão com orçamento de memória (mensagens antigas são compactadas ou vão para o disco)
+history = load_history()
 
 
 # Função para processar a pergunta e buscar resposta nos dados
 def get_data_response(question):
-    question_lower = question.lower()
-
-    # Exemplo: verificar se a pergunta contém palavras-chave
-    if "expectativa de vida média" in question_lower:
-        avg_life_expectancy = df["Life expectancy"].mean()
-        return f"A expectativa de vida média global no dataset é **{avg_life_expectancy:.2f} anos**."
-
-    elif "expectativa de vida no" in question_lower or "expectativa de vida em" in question_lower:
-        for country in df["Country"].unique():
-            if country.lower() in question_lower:
-                country_life_expectancy = df[df["Country"] == country]["Life expectancy"].mean()
-                return f"A expectativa de vida média em **{country}** é **{country_life_expectancy:.2f} anos**."
-
-    elif "país com maior expectativa de vida" in question_lower:
-        max_country = df.loc[df["Life expectancy"].idxmax()]["Country"]
-        max_life = df["Life expectancy"].max()
-        return f"O país com **maior expectativa de vida** é **{max_country}**, com **{max_life:.2f} anos**."
-
-    elif "país com menor expectativa de vida" in question_lower:
-        min_country = df.loc[df["Life expectancy"].idxmin()]["Country"]
-        min_life = df["Life expectancy"].min()
-        return f"O país com **menor expectativa de vida** é **{min_country}**, com **{min_life:.2f} anos**."
-
-    elif "relação entre pib e expectativa de vida" in question_lower:
-        correlation = df["GDP"].corr(df["Life expectancy"])
-        return f"A correlação entre **PIB** e **expectativa de vida** no dataset é **{correlation:.2f}**, indicando uma relação {'positiva' if correlation > 0 else 'negativa'}."
-
-    elif re.search(r"top\s*10.*expectativa de vida.*(\d{4})", question_lower):
-        match = re.search(r"(\d{4})", question_lower)  # Captura o ano na pergunta
-        if match:
-            year = int(match.group(1))
-            if year in df["Year"].unique():  # Verifica se o ano está no dataset
-                top_10_countries = df[df["Year"] == year].nlargest(10, "Life expectancy")[
-                    ["Country", "Life expectancy"]]
-                return f"Os 10 países com maior expectativa de vida em **{year}** são:\n\n" + top_10_countries.to_string(
-                    index=False)
-
-    else:
-        return None  # Se não encontrar nada no dataset, passa para a IA
-
-
-# Função para IA responder perguntas
+    # Roteador compilado uma vez por processo; devolve None para passar a pergunta à IA
+    return router.route(question)
+
+
+# Função para IA responder perguntas (gera a resposta em trechos)
 def ask_ai(question):
     # Primeiro, tenta buscar nos dados
     data_response = get_data_response(question)
     if data_response:
-        return data_response  # Se encontrar resposta nos dados, retorna imediatamente
+        yield data_response  # Se encontrar resposta nos dados, retorna imediatamente
+        return
 
-    # Se não houver resposta nos dados, chama a IA
+    # Se não houver resposta nos dados, consulta o cache e só então chama a IA em modo streaming
     try:
-        response = client.chat.completions.create(
-            model="deepseek/deepseek-chat-v3-0324:free",
-            messages=[{"role": "user", "content": question}]
-        )
-        return response.choices[0].message.content.strip()
+        with stage("llm"):
+            yield from answer_cache.stream(question, settings["model"], lambda: stream_answer(question, settings))
     except Exception as e:
-        return f"Erro na API: {str(e)}"
+        yield f"Erro na API: {str(e)}"
 
 
 # Interface do Chatbot
 st.title("🤖 Chatbot de Expectativa de Vida")
 
-for message in st.session_state["messages"]:
+with st.sidebar.expander("📦 Cache de respostas"):
+    st.json(answer_cache.stats())
+
+# Uso de todas as sessões do processo: só para o operador
+if debug_enabled():
+    with st.sidebar.expander("🧠 Memória das sessões"):
+        st.dataframe(session_usage(), hide_index=True)
+
+# Só uma página do histórico é exibida por rerun (página 1 = mensagens mais recentes)
+size = page_size()
+pages = history.page_count(size)
+page = 1
+if pages > 1:
+    page = st.number_input("Página do histórico (1 = mais recente):", min_value=1, max_value=pages, value=1)
+for message in history.page(page - 1, size):
     with st.chat_message(message["role"], avatar=message["avatar"]):
         st.markdown(message["content"])
 
@@ -100,21 +71,15 @@ question = st.chat_input("Digite sua pergunta...")
 
 if question:
     # Exibir mensagem do usuário
-    st.session_state["messages"].append({"role": "user", "avatar": "👤", "content": question})
+    history.append("user", question)
     with st.chat_message("user", avatar="👤"):
         st.markdown(question)
 
-    # Criar espaço para animação de "digitando..."
+    # Resposta exibida à medida que os trechos chegam
     with st.chat_message("assistant", avatar="🤖"):
-        typing_placeholder = st.empty()
-
-        # Animação de "digitando..." 🤖💬
-        for dots in ["", ".", "..", "..."]:
-            typing_placeholder.markdown(f"🤖 Digitando{dots}")
-            time.sleep(0.5)  # Aguarda meio segundo entre os passos
-
-        response = ask_ai(question)
-        typing_placeholder.markdown(response)
+        response = st.write_stream(ask_ai(question))
 
     # Salvar resposta no histórico
-    st.session_state["messages"].append({"role": "assistant", "avatar": "🤖", "content": response})
+    history.append("assistant", response)
+
+finish_rerun()
@@ -1,61 +1,59 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import imageio
-import os
 
-@st.cache_data
-def load_data():
-    df = pd.read_csv("LifeExpectancy.csv")
-    return df
+from utils.charts import choropleth_figure
+from utils.data import METRIC_COLUMNS
+from utils.figure_store import cached_chart
+from utils.geo import load_choropleth_payload, load_metric_range, load_unmatched_countries
+from utils.metrics import begin_rerun, finish_rerun
+from utils.partitions import load_partitions
+from utils.timelapse import available_formats, load_timelapse
 
-df = load_data()
+begin_rerun("mapa")
 
-st.subheader("Mapa Interativo da Expectativa de Vida 🌍")
-
-# Criando o mapa com todos os países
-year = st.slider("Selecione um ano:", min_value=int(df["Year"].min()), max_value=int(df["Year"].max()), value=int(df["Year"].median()))
-
-df_year = df[df["Year"] == year]
+partitions = load_partitions()
 
-fig = px.choropleth(df_year, locations="Country", locationmode="country names",
-                    color="Life expectancy",
-                    hover_name="Country",
-                    color_continuous_scale="Viridis",
-                    title=f"Expectativa de Vida no Ano {year}")
-
-st.plotly_chart(fig)
+st.subheader("Mapa Interativo da Expectativa de Vida 🌍")
 
-# Gerar animação em GIF
-st.subheader("🎥 Timelapse da Expectativa de Vida")
+# Criando o mapa com todos os países (anos das partições: nenhuma varredura do DataFrame por rerun)
+years = partitions.years
+year = st.slider("Selecione um ano:", min_value=years[0], max_value=years[-1], value=years[(len(years) - 1) // 2])
+
+# Figura pronta (JSON) compartilhada entre sessões; só é montada na primeira visita a cada ano
+cached_chart("choropleth", {"metric": "Life expectancy", "year": year, "scale": "Viridis"},
+             lambda: choropleth_figure(load_choropleth_payload("Life expectancy", year), "Life expectancy",
+                                       title=f"Expectativa de Vida no Ano {year}",
+                                       color_scale="Viridis",
+                                       color_range=load_metric_range("Life expectancy")))
+
+unmatched = load_unmatched_countries()
+if unmatched:
+    with st.expander(f"⚠️ {len(unmatched)} país(es) sem código ISO-3 não aparecem no mapa"):
+        st.write(", ".join(unmatched))
+
+# Gerar animação (o título é preenchido depois da escolha do indicador)
+heading = st.empty()
+
+col_metric, col_scale, col_format = st.columns(3)
+metric = col_metric.selectbox("Indicador:", METRIC_COLUMNS, index=METRIC_COLUMNS.index("Life expectancy"))
+color_scale = col_scale.selectbox("Escala de cores:", ["Viridis", "Plasma", "Cividis", "Reds", "Blues"])
+fmt = col_format.radio("Formato:", available_formats(), horizontal=True)
+heading.subheader(f"🎥 Timelapse de {metric}")
+year_range = st.slider("Intervalo de anos:", min_value=partitions.years[0], max_value=partitions.years[-1],
+                       value=(partitions.years[0], partitions.years[-1]))
 
 generate_gif = st.button("Gerar Timelapse")
 
 if generate_gif:
-    gif_frames = []
-    temp_dir = "temp_frames"
-    os.makedirs(temp_dir, exist_ok=True)
-
-    years = sorted(df["Year"].unique())
-
-    for y in years:
-        df_year = df[df["Year"] == y]
-        fig = px.choropleth(df_year, locations="Country", locationmode="country names",
-                            color="Life expectancy",
-                            hover_name="Country",
-                            color_continuous_scale="Viridis",
-                            title=f"Expectativa de Vida no Ano {y}")
-
-        file_path = os.path.join(temp_dir, f"frame_{y}.png")
-        fig.write_image(file_path)
-        gif_frames.append(imageio.imread(file_path))
-
-    gif_path = "life_expectancy_timelapse.gif"
-    imageio.mimsave(gif_path, gif_frames, duration=1000.0)  # Criar GIF
-
-    st.image(gif_path, caption="Timelapse da Expectativa de Vida", use_container_width=True)
-
-    # Limpeza dos frames temporários
-    for file in os.listdir(temp_dir):
-        os.remove(os.path.join(temp_dir, file))
-    os.rmdir(temp_dir)
+    years = [y for y in partitions.years if year_range[0] <= y <= year_range[1]]
+    try:
+        with st.spinner("Gerando timelapse..."):
+            content = load_timelapse(partitions, metric, color_scale, years, fmt)
+    except (ValueError, RuntimeError) as e:
+        st.error(f"Não foi possível gerar o timelapse: {e}")
+    else:
+        if fmt == "gif":
+            st.image(content, caption=f"Timelapse de {metric}", use_container_width=True)
+        else:
+            st.video(content, format="video/mp4")
+
+finish_rerun()
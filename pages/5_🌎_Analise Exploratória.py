@@ -1,12 +1,29 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import numpy as np
-from scipy.stats import t, norm
-import plotly.graph_objects as go
+
+from utils.charts import choropleth_figure, histogram_box_figure, scatter_lod_figure, small_multiples_figure
+from utils.cube import block_ranges, load_cube
+from utils.data import load_data
+from utils.figure_store import cached_chart
+from utils.geo import load_choropleth_payload, load_metric_range
+from utils.lazy import lazy_import
+from utils.lod import load_histogram_summary, load_scatter_summary, point_threshold
+from utils.metrics import begin_rerun, finish_rerun, plotly_chart
+from utils.partitions import load_partitions
+from utils.query import load_query_backend
+
+# Usados apenas na análise opcional de intervalos de confiança
+go = lazy_import("plotly.graph_objects")
+scipy_stats = lazy_import("scipy.stats")
+
+# Países por página no modo de comparação e seleção inicial
+COMPARE_PAGE_SIZE = 8
+COMPARE_DEFAULT = ["Brazil", "Japan", "Nigeria", "Germany"]
 
 # Configuração da página
 st.set_page_config(page_title="Análise Exploratória", layout="wide")
+begin_rerun("exploratoria")
 
 # Título principal
 st.title("🌍 Análise Exploratória dos Dados")
@@ -20,30 +37,51 @@ A expectativa de vida é um dos indicadores mais importantes para medir o bem-es
 """)
 
 # Carregamento de dados
-@st.cache_data
-def load_data():
-    df = pd.read_csv("LifeExpectancy.csv")
-    return df
-
 df = load_data()
+partitions = load_partitions()
 
 # Distribuição da Expectativa de Vida
 st.subheader("📊 Distribuição da Expectativa de Vida")
 st.markdown("""
 Este gráfico mostra como a expectativa de vida está distribuída globalmente. Podem ser observadas concentrações, caudas ou valores atípicos que indicam diferenças sociais e econômicas entre os países.
 """)
-fig = px.histogram(df, x="Life expectancy", nbins=30, title="Histograma da Expectativa de Vida",
-                   labels={"Life expectancy": "Expectativa de Vida"}, opacity=0.7, marginal="box")
-st.plotly_chart(fig)
+cached_chart("histogram", {"column": "Life expectancy"},
+             lambda: histogram_box_figure(load_histogram_summary("Life expectancy"), "Expectativa de Vida",
+                                          title="Histograma da Expectativa de Vida"))
 
 # Análise por país
 st.subheader("🌎 Evolução da Expectativa de Vida por País")
-country = st.selectbox("Selecione um país:", df["Country"].unique())
-df_country = df[df["Country"] == country]
-fig = px.line(df_country, x="Year", y="Life expectancy", markers=True,
-              title=f"Expectativa de vida ao longo dos anos em {country}",
-              labels={"Life expectancy": "Expectativa de Vida", "Year": "Anos"})
-st.plotly_chart(fig)
+compare = st.toggle("Comparar vários países e indicadores")
+if not compare:
+    country = st.selectbox("Selecione um país:", partitions.countries)
+    df_country = partitions.country(country)
+    cached_chart("country_line", {"country": country},
+                 lambda: px.line(df_country, x="Year", y="Life expectancy", markers=True,
+                                 title=f"Expectativa de vida ao longo dos anos em {country}",
+                                 labels={"Life expectancy": "Expectativa de Vida", "Year": "Anos"}))
+else:
+    cube = load_cube()
+    default_countries = [c for c in COMPARE_DEFAULT if cube.has_country(c)] or cube.countries[:4]
+    countries = st.multiselect("Países:", cube.countries, default=default_countries)
+    metrics = st.multiselect("Indicadores:", cube.metrics, default=["Life expectancy"])
+    if countries and metrics:
+        # Um único bloco do cubo para toda a seleção: a escala de cada indicador vale para todas as páginas
+        block = cube.block(metrics, countries)
+        y_ranges = block_ranges(block)
+        pages = -(-len(countries) // COMPARE_PAGE_SIZE)
+        page = 1
+        if pages > 1:
+            page = st.selectbox("Página:", range(1, pages + 1), format_func=lambda p: f"{p} de {pages}")
+        # Só a página visível vira figura
+        start = (page - 1) * COMPARE_PAGE_SIZE
+        visible = countries[start:start + COMPARE_PAGE_SIZE]
+        cached_chart("small_multiples", {"countries": visible, "metrics": metrics, "ranges": y_ranges,
+                                         "page": page, "pages": pages},
+                     lambda: small_multiples_figure(cube.years, block[:, start:start + COMPARE_PAGE_SIZE],
+                                                    visible, metrics, y_ranges,
+                                                    title=f"Comparação entre países ({page} de {pages})"))
+    else:
+        st.info("Selecione ao menos um país e um indicador.")
 
 # Análise Personalizada
 st.subheader("📌 Análises Relacionadas")
@@ -65,10 +103,9 @@ if "Correlação entre PIB e Expectativa de Vida" in options:
     st.markdown("""
     Países com maior PIB per capita tendem a apresentar maior expectativa de vida. Isso pode estar ligado ao maior investimento em saúde, educação e saneamento.
     """)
-    fig = px.scatter(df, x="GDP", y="Life expectancy", trendline="ols",
-                     title="Relação entre PIB e Expectativa de Vida",
-                     labels={"GDP": "PIB", "Life expectancy": "Expectativa de Vida"})
-    st.plotly_chart(fig)
+    cached_chart("scatter", {"x": "GDP", "threshold": point_threshold()},
+                 lambda: scatter_lod_figure(load_scatter_summary("GDP", "Life expectancy"), "PIB",
+                                            "Expectativa de Vida", title="Relação entre PIB e Expectativa de Vida"))
 
 if "Impacto da Vacinação na Expectativa de Vida" in options:
     st.subheader("💉 Impacto da Vacinação na Expectativa de Vida")
@@ -76,40 +113,39 @@ if "Impacto da Vacinação na Expectativa de Vida" in options:
     st.markdown(f"""
     Esta análise mostra como a cobertura vacinal de {vaccine} está relacionada à expectativa de vida dos países.
     """)
-    fig = px.scatter(df, x=vaccine, y="Life expectancy", trendline="ols",
-                     title=f"Relação entre {vaccine} e Expectativa de Vida",
-                     labels={vaccine: "Taxa de Vacinação (%)", "Life expectancy": "Expectativa de Vida"})
-    st.plotly_chart(fig)
+    cached_chart("scatter", {"x": vaccine, "threshold": point_threshold()},
+                 lambda: scatter_lod_figure(load_scatter_summary(vaccine, "Life expectancy"), "Taxa de Vacinação (%)",
+                                            "Expectativa de Vida",
+                                            title=f"Relação entre {vaccine} e Expectativa de Vida"))
 
 if "Distribuição de Doenças por Região" in options:
     st.subheader("🦠 Distribuição de Doenças por Região")
-    disease = st.selectbox("Selecione uma doença:", ["Hepatitis B", "Measles ", "Polio", "Diphtheria ", "HIV/AIDS", "infant deaths", "under-five deaths "])
+    disease = st.selectbox("Selecione uma doença:", ["Hepatitis B", "Measles", "Polio", "Diphtheria", "HIV/AIDS", "infant deaths", "under-five deaths"])
     st.markdown(f"""
     A visualização abaixo mostra a distribuição da doença **{disease}** ao longo dos anos.
     """)
-    fig = px.choropleth(
-        df.dropna(subset=["Country", disease]),
-        locations="Country", locationmode="country names",
-        color=disease, hover_name="Country", animation_frame="Year",
-        color_continuous_scale="Reds",
-        title=f"Distribuição de {disease} ao longo dos anos"
-    )
-    st.plotly_chart(fig)
+    # Apenas o ano selecionado é montado; os demais quadros são carregados sob demanda
+    disease_year = st.select_slider("Ano:", options=partitions.years, value=partitions.years[-1])
+    cached_chart("choropleth", {"metric": disease, "year": disease_year, "scale": "Reds"},
+                 lambda: choropleth_figure(load_choropleth_payload(disease, disease_year), disease,
+                                           title=f"Distribuição de {disease} em {disease_year}",
+                                           color_scale="Reds",
+                                           color_range=load_metric_range(disease)))
 
 # Intervalo de Confiança
 def show_country_confidence_intervals(df):
     st.subheader("📊 Intervalos de Confiança da Expectativa de Vida por País (2015)")
 
-    df_2015 = df[df['Year'] == 2015]
+    df_2015 = load_query_backend().select(["Country", "Life expectancy"], [("Year", "==", 2015)])
     mean_life = df_2015["Life expectancy"].mean()
     std_life = df_2015["Life expectancy"].std()
     n = df_2015["Life expectancy"].count()
     sem = std_life / np.sqrt(n)
-    confidence_interval = t.interval(0.95, df=n - 1, loc=mean_life, scale=sem)
+    confidence_interval = scipy_stats.t.interval(0.95, df=n - 1, loc=mean_life, scale=sem)
 
     stats = df_2015.groupby('Country')['Life expectancy'].agg(['mean', 'std', 'count']).reset_index()
     stats['sem'] = stats['std'] / np.sqrt(stats['count'])
-    stats['ci_lower'], stats['ci_upper'] = t.interval(0.95, df=stats['count'] - 1,
+    stats['ci_lower'], stats['ci_upper'] = scipy_stats.t.interval(0.95, df=stats['count'] - 1,
                                                       loc=stats['mean'], scale=stats['sem'])
 
     mean_global = mean_life
@@ -143,10 +179,12 @@ def show_country_confidence_intervals(df):
         template="plotly_white"
     )
 
-    st.plotly_chart(fig)
+    plotly_chart(fig)
     st.write(f"**Média da Expectativa de Vida:** {mean_life:.2f} anos")
     st.write(f"**Intervalo de Confiança de 95%:** [{confidence_interval[0]:.2f}, {confidence_interval[1]:.2f}] anos")
 
 # Exibe intervalo se selecionado
 if "Intervalos de Confiança por País (2015)" in options:
     show_country_confidence_intervals(df)
+
+finish_rerun()
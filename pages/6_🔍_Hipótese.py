@@ -1,17 +1,19 @@
+import math
+
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import numpy as np
-from scipy.stats import ttest_ind, t
-import plotly.graph_objects as go
+
+from utils.charts import status_box_figure, vaccination_box_figure
+from utils.data import load_data
+from utils.figure_store import cached_chart
+from utils.metrics import begin_rerun, finish_rerun
+from utils.stats import (MIN_GROUP_SIZE, load_coverage_range, load_resampling_tests, load_status_test,
+                         load_welch_sweep)
 
 st.set_page_config(page_title="Testes de Hipótese - Expectativa de Vida", layout="wide")
+begin_rerun("hipotese")
 st.title("📊 Testes de Hipótese - Expectativa de Vida")
 
-@st.cache_data
-def load_data():
-    return pd.read_csv("LifeExpectancy.csv")
-
 df = load_data()
 
 st.markdown("""
@@ -19,7 +21,7 @@ st.markdown("""
 Aplicaremos **testes de hipótese estatísticos** para investigar se existem diferenças significativas na expectativa de vida com base em:
 
 1. O nível de desenvolvimento do país (Desenvolvido vs. Em desenvolvimento)
-2. A cobertura vacinal contra Hepatite B
+2. A cobertura vacinal (Hepatite B, Poliomielite ou Difteria)
 """)
 
 # ------------------------------
@@ -27,19 +29,14 @@ Aplicaremos **testes de hipótese estatísticos** para investigar se existem dif
 # ------------------------------
 st.subheader("🧪 Teste 1: Diferença na Expectativa de Vida entre Países Desenvolvidos e em Desenvolvimento")
 
-df_dev = df[df['Status'].notna() & df['Life expectancy'].notna()]
-df_dev_grouped = df_dev.groupby("Status")["Life expectancy"]
-
-developed = df_dev[df_dev['Status'] == "Developed"]["Life expectancy"]
-developing = df_dev[df_dev['Status'] == "Developing"]["Life expectancy"]
-
 st.markdown("""
 **Hipóteses:**
 - H₀: A média da expectativa de vida é a mesma nos dois grupos.
 - H₁: A média da expectativa de vida é diferente entre países desenvolvidos e em desenvolvimento.
 """)
 
-stat1, p_value1 = ttest_ind(developed, developing, equal_var=False)
+# Teste de Welch a partir de contagem, soma e soma dos quadrados por grupo (cache por versão dos dados)
+stat1, p_value1 = load_status_test()
 
 st.write(f"Estatística t: {stat1:.2f}")
 st.write(f"Valor-p: {p_value1:.4f}")
@@ -49,42 +46,66 @@ if p_value1 < 0.05:
 else:
     st.info("Não rejeitamos H₀: Não há evidência suficiente para afirmar que as médias são diferentes.")
 
-fig1 = px.box(df_dev, x="Status", y="Life expectancy",
-              title="Distribuição da Expectativa de Vida por Nível de Desenvolvimento",
-              labels={"Life expectancy": "Expectativa de Vida", "Status": "Status do País"})
-st.plotly_chart(fig1)
+cached_chart("status_box", {}, lambda: status_box_figure(df))
 
 # ------------------------------
-# Teste 2: Vacinação Hepatite B
+# Teste 2: Cobertura Vacinal
 # ------------------------------
-st.subheader("💉 Teste 2: Efeito da Vacinação contra Hepatite B na Expectativa de Vida")
-
-df_vac = df[(df['Hepatitis B'].notna()) & (df['Life expectancy'].notna())]
-high_vaccine = df_vac[df_vac['Hepatitis B'] >= 90]['Life expectancy']
-low_vaccine = df_vac[df_vac['Hepatitis B'] < 90]['Life expectancy']
-
-st.markdown("""
+st.subheader("💉 Teste 2: Efeito da Cobertura Vacinal na Expectativa de Vida")
+
+VACCINES = {"Hepatitis B": "Hepatite B", "Polio": "Poliomielite", "Diphtheria": "Difteria"}
+col_vaccine, col_threshold = st.columns(2)
+vaccine = col_vaccine.selectbox("Vacina:", list(VACCINES), format_func=VACCINES.get)
+# Limiares dentro da cobertura observada: abaixo do mínimo ou acima do máximo um dos grupos fica vazio
+low_coverage, high_coverage = load_coverage_range(vaccine)
+min_threshold = max(1, math.floor(low_coverage) + 1)
+max_threshold = min(99, max(min_threshold, math.ceil(high_coverage)))
+threshold = col_threshold.slider("Limiar de cobertura alta (%):", min_value=min_threshold, max_value=max_threshold,
+                                 value=min(max(90, min_threshold), max_threshold))
+
+st.markdown(f"""
 **Hipóteses:**
-- H₀: A média da expectativa de vida é igual entre países com alta e baixa vacinação contra Hepatite B.
-- H₁: Países com alta vacinação têm maior expectativa de vida.
+- H₀: A média da expectativa de vida é igual entre países com alta e baixa vacinação contra {VACCINES[vaccine]}.
+- H₁: Países com alta vacinação (≥ {threshold}%) têm maior expectativa de vida.
 """)
 
-stat2, p_value2 = ttest_ind(high_vaccine, low_vaccine, alternative='greater', equal_var=False)
-
-st.write(f"Estatística t: {stat2:.2f}")
-st.write(f"Valor-p: {p_value2:.4f}")
+# Estatísticas de Welch para todos os limiares calculadas em uma passada (cache por vacina)
+sweep = load_welch_sweep(vaccine)
+stat2, p_value2 = sweep.loc[threshold, "t"], sweep.loc[threshold, "p_value"]
+groups_ok = min(sweep.loc[threshold, "n_high"], sweep.loc[threshold, "n_low"]) >= MIN_GROUP_SIZE
 
-if p_value2 < 0.05:
-    st.success("Rejeitamos H₀: Alta vacinação está associada a maior expectativa de vida.")
+if not groups_ok:
+    st.warning(f"Com o limiar de {threshold}% um dos grupos tem menos de {MIN_GROUP_SIZE} observações; "
+               "escolha outro limiar.")
 else:
-    st.info("Não rejeitamos H₀: Não há evidência suficiente de que a vacinação aumente a expectativa de vida.")
-
-df_vac_grouped = df_vac.copy()
-df_vac_grouped["Vacinação"] = np.where(df_vac_grouped["Hepatitis B"] >= 90, "Alta (≥ 90%)", "Baixa (< 90%)")
-fig2 = px.box(df_vac_grouped, x="Vacinação", y="Life expectancy",
-              title="Expectativa de Vida por Nível de Vacinação contra Hepatite B",
-              labels={"Life expectancy": "Expectativa de Vida"})
-st.plotly_chart(fig2)
+    st.write(f"Estatística t: {stat2:.2f}")
+    st.write(f"Valor-p: {p_value2:.4f}")
+
+    if p_value2 < 0.05:
+        st.success("Rejeitamos H₀: Alta vacinação está associada a maior expectativa de vida.")
+    else:
+        st.info("Não rejeitamos H₀: Não há evidência suficiente de que a vacinação aumente a expectativa de vida.")
+
+cached_chart("vaccination_box", {"vaccine": vaccine, "threshold": threshold},
+             lambda: vaccination_box_figure(df, vaccine, threshold, VACCINES[vaccine]))
+
+cached_chart("welch_sweep", {"vaccine": vaccine, "threshold": threshold},
+             lambda: px.line(sweep.reset_index(), x="threshold", y="t",
+                             title="Estatística t de Welch para cada limiar de cobertura",
+                             labels={"threshold": "Limiar de cobertura (%)", "t": "Estatística t"})
+             .add_vline(x=threshold, line_dash="dash", line_color="black"))
+
+with st.expander("🎲 Teste de permutação e intervalo bootstrap"):
+    iterations = st.select_slider("Número de reamostragens:", options=[1_000, 5_000, 10_000, 20_000], value=10_000)
+    if st.checkbox("Executar reamostragem"):
+        resampling = load_resampling_tests(vaccine, threshold, iterations)
+        if math.isnan(resampling["p_value"]):
+            st.warning(f"Reamostragem indisponível: {resampling['n_high']} observação(ões) com cobertura alta e "
+                       f"{resampling['n_low']} com cobertura baixa (mínimo de {MIN_GROUP_SIZE} em cada grupo).")
+        else:
+            st.write(f"Diferença de médias (alta − baixa): {resampling['diff']:.2f} anos")
+            st.write(f"Valor-p (permutação, unilateral): {resampling['p_value']:.4f}")
+            st.write(f"Intervalo bootstrap de 95%: [{resampling['ci_lower']:.2f}, {resampling['ci_upper']:.2f}] anos")
 
 # ------------------------------
 # Conclusão Geral
@@ -92,7 +113,9 @@ st.plotly_chart(fig2)
 st.markdown("""
 ### ✅ Conclusão Geral
 - Há **diferença estatisticamente significativa** na expectativa de vida entre países desenvolvidos e em desenvolvimento.
-- Países com **alta taxa de vacinação contra Hepatite B** também tendem a apresentar expectativa de vida **mais elevada**, com significância estatística.
+- Países com **alta taxa de vacinação** (ex.: Hepatite B acima de 90%) também tendem a apresentar expectativa de vida **mais elevada**, com significância estatística.
 
 Essas evidências reforçam a importância de políticas públicas voltadas à **saúde básica e imunização**.
-""")
\ No newline at end of file
+""")
+
+finish_rerun()
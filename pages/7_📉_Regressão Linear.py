@@ -1,10 +1,18 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
-import statsmodels.api as sm
+
+from utils.charts import regression_figure
+from utils.figure_store import cached_chart
+from utils.lod import point_threshold
+from utils.metrics import begin_rerun, finish_rerun, stop_rerun
+from utils.partitions import load_partitions
+from utils.regression import REGRESSION_FEATURES, load_regression_table, statsmodels_summary
 
 # Configuração da página
 st.set_page_config(page_title="Regressão Linear", layout="wide")
+begin_rerun("regressao")
 st.title("📈 Regressão Linear: PIB vs Expectativa de Vida")
 
 st.markdown("""
@@ -13,45 +21,68 @@ A hipótese é: *"Países com maior PIB tendem a ter maior expectativa de vida."
 """)
 
 # Carregar dados
-@st.cache_data
-def load_data():
-    df = pd.read_csv("LifeExpectancy.csv")
-    return df.dropna(subset=["GDP", "Life expectancy"])
+partitions = load_partitions()
 
-df = load_data()
+# Variáveis explicativas (regressão simples por padrão, múltipla se mais de uma for escolhida)
+features = st.multiselect("Variáveis explicativas:", REGRESSION_FEATURES, default=["GDP"])
+if not features:
+    st.warning("Selecione ao menos uma variável explicativa.")
+    stop_rerun()
 
-# Filtro por ano
-year = st.selectbox("Selecione o ano para análise:", sorted(df["Year"].unique()))
-df_year = df[df["Year"] == year]
+# Todos os anos são ajustados de uma vez e ficam em cache; trocar o ano é só uma consulta
+table = load_regression_table(features)
 
-# Regressão
-X = df_year["GDP"]
-y = df_year["Life expectancy"]
-X = sm.add_constant(X)  # adiciona o intercepto
-model = sm.OLS(y, X).fit()
-predictions = model.predict(X)
+# Filtro por ano
+year = st.selectbox("Selecione o ano para análise:", partitions.years)
+df_year = partitions.year(year).dropna(subset=features + ["Life expectancy"])
+if year not in table.index or np.isnan(table.loc[year, "R2"]):
+    st.warning("Não há observações suficientes para ajustar o modelo neste ano.")
+    stop_rerun()
+result = table.loc[year]
+main = features[0]
 
 # Gráfico
-fig = px.scatter(df_year, x="GDP", y="Life expectancy",
-                 labels={"GDP": "PIB", "Life expectancy": "Expectativa de Vida"},
-                 title=f"Relação entre PIB e Expectativa de Vida em {year}")
-
-fig.add_traces(px.line(x=df_year["GDP"], y=predictions).data)
-
-st.plotly_chart(fig)
+# O limiar decide entre pontos brutos e nível de detalhe: faz parte da figura
+cached_chart("regression", {"features": features, "year": year, "threshold": point_threshold()},
+             lambda: regression_figure(df_year, features, result, year))
 
 # Resultados
 st.subheader("📋 Resumo da Regressão")
-st.write(f"**Equação da reta:**  y = {model.params[1]:.4f} × PIB + {model.params[0]:.2f}")
-st.write(f"**R² (coeficiente de determinação):** {model.rsquared:.3f}")
-st.write(f"**p-valor do coeficiente do PIB:** {model.pvalues[1]:.4f}")
+if len(features) == 1:
+    st.write(f"**Equação da reta:**  y = {result[f'coef {main}']:.4f} × {'PIB' if main == 'GDP' else main} + {result['coef const']:.2f}")
+else:
+    st.dataframe(pd.DataFrame({
+        "Coeficiente": [result[f"coef {f}"] for f in ["const"] + features],
+        "Erro padrão": [result[f"se {f}"] for f in ["const"] + features],
+        "p-valor": [result[f"p {f}"] for f in ["const"] + features],
+    }, index=["const"] + features))
+st.write(f"**R² (coeficiente de determinação):** {result['R2']:.3f}")
+st.write(f"**p-valor do coeficiente do {'PIB' if main == 'GDP' else main}:** {result[f'p {main}']:.4f}")
+
+with st.expander("📄 Resumo completo (statsmodels)"):
+    if st.checkbox("Calcular resumo completo"):
+        st.text(statsmodels_summary(df_year, features).as_text())
+
+# Evolução dos coeficientes ao longo dos anos
+st.subheader("📆 Coeficientes ao Longo dos Anos")
+coef_columns = [f"coef {f}" for f in features]
+cached_chart("regression_coefficients", {"features": features},
+             lambda: px.line(table.reset_index(), x="Year", y=coef_columns, markers=True,
+                             labels={"value": "Coeficiente", "Year": "Ano", "variable": "Variável"},
+                             title="Coeficiente estimado por ano"))
 
 # Interpretação
-st.subheader("🧠 Interpretação")
-st.markdown(f"""
-- O número positivo de {model.params[1]:.4f} mostra que, de forma geral, países com um PIB (Produto Interno Bruto) mais alto costumam ter uma expectativa de vida maior.
-- O valor de R² é {model.rsquared:.3f}, o que quer dizer que o modelo consegue explicar cerca de {model.rsquared * 100:.1f}% das diferenças na expectativa de vida entre os países.
-- O p-valor é {model.pvalues[1]:.4f}, o que {'mostra que a relação entre PIB e expectativa de vida é estatisticamente confiável' if model.pvalues[1] < 0.05 else 'indica que a relação pode ser apenas coincidência'}.
+if main == "GDP":
+    slope = result["coef GDP"]
+    r2 = result["R2"]
+    p_value = result["p GDP"]
+    st.subheader("🧠 Interpretação")
+    st.markdown(f"""
+- O número positivo de {slope:.4f} mostra que, de forma geral, países com um PIB (Produto Interno Bruto) mais alto costumam ter uma expectativa de vida maior.
+- O valor de R² é {r2:.3f}, o que quer dizer que o modelo consegue explicar cerca de {r2 * 100:.1f}% das diferenças na expectativa de vida entre os países.
+- O p-valor é {p_value:.4f}, o que {'mostra que a relação entre PIB e expectativa de vida é estatisticamente confiável' if p_value < 0.05 else 'indica que a relação pode ser apenas coincidência'}.
 
 Esta análise reforça como aspectos econômicos estão associados à saúde populacional.
 """)
+
+finish_rerun()
@@ -0,0 +1,76 @@
+import streamlit as st
+
+from utils.charts import correlation_heatmap_figure, scatter_lod_figure
+from utils.correlation import load_bootstrap_pair, load_correlation_table, slice_frame
+from utils.data import load_data
+from utils.figure_store import cached_chart
+from utils.lod import point_threshold, scatter_summary
+from utils.metrics import begin_rerun, finish_rerun, plotly_chart
+from utils.partitions import load_partitions
+
+st.set_page_config(page_title="Correlações - Expectativa de Vida", layout="wide")
+begin_rerun("correlacoes")
+st.title("🔗 Explorador de Correlações")
+
+st.markdown("""
+Correlação entre todos os indicadores numéricos do conjunto de dados. Cada par usa apenas as linhas em que
+os dois valores existem (pares completos). **Pearson** mede relação linear; **Spearman** usa os postos e
+capta relações monotônicas, sendo menos sensível a valores extremos.
+
+Clique em uma célula do mapa de calor para ver a dispersão correspondente.
+""")
+
+METHOD_LABELS = {"pearson": "Pearson", "spearman": "Spearman"}
+STATUS_LABELS = {"Developed": "Desenvolvidos", "Developing": "Em desenvolvimento"}
+
+
+def slice_label(label):
+    if label == "all":
+        return "Todos os anos"
+    kind, value = label.split(":", 1)
+    return value if kind == "year" else STATUS_LABELS[value]
+
+
+# Todas as matrizes (recortes x métodos) são calculadas juntas e ficam em cache por versão dos dados
+table = load_correlation_table()
+
+col_method, col_slice = st.columns(2)
+method = col_method.radio("Método:", list(METHOD_LABELS), format_func=METHOD_LABELS.get, horizontal=True)
+label = col_slice.selectbox("Recorte:", table.slices, format_func=slice_label)
+
+matrix = table.matrix(label, method)
+event = plotly_chart(
+    correlation_heatmap_figure(matrix, table.columns, table.pair_counts(label),
+                               title=f"Correlação de {METHOD_LABELS[method]} ({slice_label(label)})"),
+    on_select="rerun", selection_mode="points", key="correlation_heatmap",
+)
+
+# Um clique novo no mapa de calor escolhe o par; depois os seletores continuam livres
+points = event.selection.points
+if points:
+    click = (points[0]["x"], points[0]["y"])
+    if click != st.session_state.get("correlation_click"):
+        st.session_state["correlation_click"] = click
+        st.session_state["correlation_x"], st.session_state["correlation_y"] = click
+
+st.session_state.setdefault("correlation_x", "GDP")
+st.session_state.setdefault("correlation_y", "Life expectancy")
+
+st.subheader("🔍 Par selecionado")
+col_x, col_y = st.columns(2)
+first = col_x.selectbox("Variável X:", table.columns, key="correlation_x")
+second = col_y.selectbox("Variável Y:", table.columns, key="correlation_y")
+
+i, j = table.columns.index(first), table.columns.index(second)
+st.write(f"r de {METHOD_LABELS[method]}: {matrix[i, j]:.3f} ({table.count(label, first, second)} pares completos)")
+
+if st.checkbox("Calcular intervalo de confiança bootstrap (95%)"):
+    lower, upper = load_bootstrap_pair(label, first, second, method)
+    st.write(f"Intervalo bootstrap de 95%: [{lower:.3f}, {upper:.3f}]")
+
+frame = slice_frame(load_data(), load_partitions(), label)
+cached_chart("correlation_scatter", {"x": first, "y": second, "slice": label, "threshold": point_threshold()},
+             lambda: scatter_lod_figure(scatter_summary(frame[first], frame[second], point_threshold()), first,
+                                        second, title=f"{second} vs. {first} ({slice_label(label)})"))
+
+finish_rerun()
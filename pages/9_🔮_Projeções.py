@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.charts import choropleth_figure, forecast_figure
+from utils.cube import load_cube
+from utils.data import METRIC_COLUMNS
+from utils.figure_store import cached_chart
+from utils.forecast import HORIZON, MODELS, load_forecast, load_forecast_payload
+from utils.geo import load_metric_range
+from utils.metrics import begin_rerun, finish_rerun
+
+st.set_page_config(page_title="Projeções - Expectativa de Vida", layout="wide")
+begin_rerun("projecoes")
+st.title("🔮 Projeções por País")
+
+st.markdown("""
+Projeção de cada indicador para os anos seguintes ao último ano do conjunto de dados, para todos os países
+ao mesmo tempo, com intervalo de predição de 95%. As tendências **linear** e **quadrática** são ajustadas por
+mínimos quadrados sobre os anos observados de cada país; o modelo de **Holt amortecido** (statsmodels) é mais
+lento e é calculado uma única vez por versão dos dados.
+""")
+
+MODEL_LABELS = {"linear": "Tendência linear", "quadratic": "Tendência quadrática", "holt": "Holt amortecido"}
+
+col_metric, col_model, col_horizon = st.columns(3)
+metric = col_metric.selectbox("Indicador:", METRIC_COLUMNS, index=METRIC_COLUMNS.index("Life expectancy"))
+model = col_model.radio("Modelo:", list(MODELS), format_func=MODEL_LABELS.get, horizontal=True)
+horizon = col_horizon.slider("Anos projetados:", min_value=1, max_value=10, value=HORIZON)
+
+with st.spinner("Ajustando os modelos..."):
+    forecast = load_forecast(metric, model, horizon)
+
+# Mapa do ano projetado: mesma escala de cores do histórico, estendida se a projeção sair dela
+year = st.select_slider("Ano projetado:", options=forecast.years, value=forecast.years[-1])
+mean, lower, upper = forecast.year(year)
+low, high = load_metric_range(metric)
+if not np.isnan(mean).all():
+    low, high = min(low, float(np.nanmin(mean))), max(high, float(np.nanmax(mean)))
+cached_chart("forecast_choropleth", {"metric": metric, "model": model, "horizon": horizon, "year": year},
+             lambda: choropleth_figure(load_forecast_payload(forecast, year), metric,
+                                       title=f"{metric} projetado para {year} ({MODEL_LABELS[model]})",
+                                       color_scale="Viridis", color_range=(low, high)))
+
+st.subheader("📈 Projeção de um país")
+cube = load_cube()
+country = st.selectbox("Selecione um país:", forecast.countries)
+country_mean, country_lower, country_upper = forecast.country(country)
+cached_chart("forecast_country", {"metric": metric, "model": model, "horizon": horizon, "country": country},
+             lambda: forecast_figure(np.array(cube.years), cube.series(metric, country), np.array(forecast.years),
+                                     country_mean, country_lower, country_upper, metric,
+                                     title=f"{metric} em {country}: observado e projetado"))
+if np.isnan(country_mean).all():
+    st.info("Observações insuficientes para projetar este indicador neste país.")
+
+with st.expander(f"Tabela de {year} (todos os países)"):
+    st.dataframe(pd.DataFrame({"País": forecast.countries, "Projeção": mean, "Limite inferior": lower,
+                               "Limite superior": upper, "Anos observados": forecast.n}).dropna(),
+                 hide_index=True)
+
+finish_rerun()
@@ -0,0 +1,37 @@
+"""Exporta um relatório estático (HTML autocontido e, opcionalmente, PNGs) com as figuras das páginas.
+
+Figuras cujos dados e parâmetros não mudaram desde a última exportação são reaproveitadas do cache.
+
+Uso:
+    python scripts/export_report.py --out report
+    python scripts/export_report.py --out report --png --years 2010 2015
+"""
+import argparse
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from utils.report import export_report  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", type=Path, default=ROOT_DIR / "report", help="diretório de saída")
+    parser.add_argument("--png", action="store_true", help="também gera PNGs (requer kaleido)")
+    parser.add_argument("--years", nargs="*", type=int, help="anos dos mapas e regressões (padrão: todos)")
+    parser.add_argument("--workers", type=int, help="processos de renderização (padrão: núcleos da CPU)")
+    parser.add_argument("--force", action="store_true", help="ignora o cache e renderiza tudo de novo")
+    args = parser.parse_args(argv)
+
+    summary = export_report(args.out, png=args.png, years=args.years, max_workers=args.workers, force=args.force)
+    print(f"{summary['items']} itens ({summary['rendered']} renderizados, {summary['reused']} do cache) "
+          f"em {summary['seconds']:.1f}s -> {summary['report']}")
+    for error in summary["png_errors"]:
+        print(f"PNG indisponível: {error}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
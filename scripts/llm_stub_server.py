@@ -0,0 +1,81 @@
+"""Servidor local compatível com a API de chat da OpenAI, para testar o chat bot sem rede.
+
+Uso:
+    python scripts/llm_stub_server.py --port 8765
+    python scripts/llm_stub_server.py --port 8765 --fail 2     # as 2 primeiras chamadas respondem 503
+    OPENROUTER_BASE_URL=http://127.0.0.1:8765/v1 OPENROUTER_API_KEY=stub streamlit run 1_Home.py
+"""
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    delay = 0.05
+    calls = 0
+    # Chamadas iniciais que falham (para exercitar as retentativas do cliente)
+    failures = 0
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        type(self).calls += 1
+        if type(self).calls <= self.failures:
+            self.send_error(503, "falha simulada")
+            return
+        question = body.get("messages", [{}])[-1].get("content", "")
+        words = f"Resposta simulada para: {question}".split(" ")
+        model = body.get("model", "stub")
+
+        if not body.get("stream"):
+            payload = {
+                "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": " ".join(words)}}],
+            }
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for i, word in enumerate(words):
+            chunk = {
+                "id": "stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word},
+                             "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=8765, delay=0.05, failures=0):
+    StubHandler.delay = delay
+    StubHandler.failures = failures
+    StubHandler.calls = 0
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.05, help="atraso entre os trechos (s)")
+    parser.add_argument("--fail", type=int, default=0, help="chamadas iniciais que respondem 503")
+    args = parser.parse_args()
+    print(f"Servidor stub em http://127.0.0.1:{args.port}/v1")
+    serve(args.port, args.delay, args.fail).serve_forever()
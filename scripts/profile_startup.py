@@ -0,0 +1,121 @@
+"""Mede o custo de partida a frio de cada página e falha se algum orçamento for excedido.
+
+Cada página roda em um interpretador novo (python -X importtime), como o primeiro acesso a um
+worker recém-criado. São registrados o tempo de importação dos módulos que a página puxa e o
+tempo da primeira renderização.
+
+Uso:
+    python scripts/profile_startup.py
+    python scripts/profile_startup.py --pages "Chat Bot" --json startup.json
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BUDGETS_PATH = Path(__file__).resolve().parent / "startup_budgets.json"
+MARKER = "##page-start##"
+
+# Executado no processo filho: prepara o AppTest (fora da medição) e renderiza a página uma vez
+CHILD = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({page!r}, default_timeout=600)
+sys.stderr.write({marker!r} + "\\n"); sys.stderr.flush()
+start = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{"render_s": elapsed, "error": [str(e.value) for e in at.exception]}}))
+"""
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+
+def list_pages(filters=None):
+    pages = [ROOT_DIR / "1_Home.py"] + sorted((ROOT_DIR / "pages").glob("*.py"))
+    if filters:
+        pages = [p for p in pages if any(f in p.name for f in filters)]
+    return pages
+
+
+def parse_importtime(stderr):
+    # Soma o tempo cumulativo dos imports de nível mais alto feitos depois do marcador
+    lines = stderr.splitlines()
+    if MARKER in lines:
+        lines = lines[lines.index(MARKER) + 1:]
+    modules = []
+    for line in lines:
+        match = IMPORT_LINE.match(line)
+        if match and len(match.group(3)) == 1:
+            modules.append((match.group(4), int(match.group(2)) / 1e6))
+    return sum(seconds for _, seconds in modules), sorted(modules, key=lambda m: -m[1])
+
+
+def profile_page(page):
+    code = CHILD.format(root=str(ROOT_DIR), page=str(page), marker=MARKER)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT_DIR,
+                          capture_output=True, text=True)
+    import_s, modules = parse_importtime(proc.stderr)
+    try:
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        result = {"render_s": float("nan"), "error": proc.stderr.strip().splitlines()[-1:]}
+    return {
+        "page": page.name,
+        "import_s": import_s,
+        "render_s": result["render_s"],
+        "heaviest_imports": [{"module": name, "seconds": seconds} for name, seconds in modules[:5]],
+        "error": result["error"],
+    }
+
+
+def load_budgets(path=BUDGETS_PATH):
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def budget_for(budgets, kind, page_name):
+    # kind: "render" (primeira renderização) ou "import" (módulos importados pela página)
+    section = budgets[kind]
+    return section.get("pages", {}).get(page_name, section["default"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", nargs="*", help="filtra as páginas pelo nome")
+    parser.add_argument("--budgets", type=Path, default=BUDGETS_PATH, help="arquivo JSON de orçamentos")
+    parser.add_argument("--json", type=Path, help="grava os resultados neste arquivo")
+    args = parser.parse_args(argv)
+
+    budgets = load_budgets(args.budgets)
+    results = []
+    failed = False
+    for page in list_pages(args.pages):
+        result = profile_page(page)
+        budget = budget_for(budgets, "render", page.name)
+        import_budget = budget_for(budgets, "import", page.name)
+        result["budget_s"] = budget
+        result["import_budget_s"] = import_budget
+        # Regressões de importação (ex.: dependência pesada puxada no topo do módulo) também falham
+        result["ok"] = (not result["error"] and result["render_s"] <= budget
+                        and result["import_s"] <= import_budget)
+        failed |= not result["ok"]
+        results.append(result)
+        heaviest = ", ".join(f"{m['module']} {m['seconds']:.2f}s" for m in result["heaviest_imports"][:3])
+        print(f"{'OK ' if result['ok'] else 'FALHA'} {page.name}: importação {result['import_s']:.2f}s "
+              f"(orçamento {import_budget:.1f}s), primeira renderização {result['render_s']:.2f}s "
+              f"(orçamento {budget:.1f}s) [{heaviest}]")
+        for error in result["error"]:
+            print(f"      erro: {error}")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""Publica a tabela e os agregados em Arrow IPC para os processos do dashboard com SHARED_DATASET=1.
+
+Com --watch, continua observando o CSV e publica cada nova versão (ingestão incremental de
+utils/refresh.py); os processos passam a usá-la assim que o ponteiro CURRENT é trocado.
+
+Uso:
+    python scripts/publish_dataset.py
+    python scripts/publish_dataset.py --watch --interval 2
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from utils.data import CSV_PATH  # noqa: E402
+from utils.refresh import LiveDataset  # noqa: E402
+from utils.shared import publish, shared_root  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", type=Path, default=None, help="diretório de publicação (padrão: SHARED_DATASET_DIR)")
+    parser.add_argument("--watch", action="store_true", help="continua publicando a cada mudança do CSV")
+    parser.add_argument("--interval", type=float, default=1.0, help="intervalo de verificação em segundos")
+    args = parser.parse_args(argv)
+    root = args.root or shared_root()
+
+    live = LiveDataset(CSV_PATH, args.interval)
+    published = None
+    while True:
+        snapshot = live.current()
+        if snapshot.version != published:
+            start = time.perf_counter()
+            target = publish(snapshot.frame, snapshot.version, root)
+            published = snapshot.version
+            print(f"versão {published} publicada em {target} ({time.perf_counter() - start:.2f}s)", flush=True)
+        if not args.watch:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Aquece os caches no deploy: executa as páginas e grava os resultados no repositório de artefatos.
+
+Cada página roda (via AppTest, sem navegador) com os valores padrão dos widgets; o mapa, a regressão
+e as projeções rodam também para todos os anos. Os cálculos marcados com @persisted e as figuras
+vão para <ARTIFACT_DIR>/<versão dos dados>-<revisão do código>/, que as páginas leem na partida.
+
+Uso:
+    python scripts/warm_cache.py
+    python scripts/warm_cache.py --pages Mapa "Regressão" --root /srv/artifacts
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from utils import artifacts  # noqa: E402
+
+# Widgets percorridos em todos os valores: trecho do nome da página -> (tipo do widget, rótulo)
+SWEEPS = {
+    "Mapa Interativo": ("slider", "Selecione um ano:"),
+    "Regressão Linear": ("selectbox", "Selecione o ano para análise:"),
+    "Projeções": ("select_slider", "Ano projetado:"),
+}
+
+
+def list_pages(filters=None):
+    pages = [ROOT_DIR / "1_Home.py"] + sorted((ROOT_DIR / "pages").glob("*.py"))
+    if filters:
+        pages = [p for p in pages if any(f in p.name for f in filters)]
+    return pages
+
+
+def _widget(at, kind, label):
+    for widget in getattr(at, kind):
+        if widget.label == label:
+            return widget
+    return None
+
+
+def _sweep_values(widget, kind):
+    if kind == "slider":
+        return list(range(int(widget.min), int(widget.max) + 1))
+    # selectbox/select_slider guardam as opções já formatadas como texto
+    return [int(option) for option in widget.options]
+
+
+def warm_page(page):
+    # Padrões primeiro; depois cada valor do widget percorrido, um rerun por valor
+    at = AppTest.from_file(str(page), default_timeout=600)
+    start = time.perf_counter()
+    at.run()
+    errors = [str(e.value) for e in at.exception]
+    runs = 1
+    sweep = next((spec for name, spec in SWEEPS.items() if name in page.name), None)
+    if sweep and not errors:
+        kind, label = sweep
+        widget = _widget(at, kind, label)
+        for value in _sweep_values(widget, kind) if widget is not None else []:
+            _widget(at, kind, label).set_value(value)
+            at.run()
+            runs += 1
+            errors += [str(e.value) for e in at.exception]
+    return {"page": page.name, "runs": runs, "seconds": time.perf_counter() - start, "error": errors}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", nargs="*", help="filtra as páginas pelo nome")
+    parser.add_argument("--root", type=Path, help="diretório dos artefatos (padrão: ARTIFACT_DIR ou .cache/artifacts)")
+    args = parser.parse_args(argv)
+
+    if args.root:
+        # As páginas precisam ler do mesmo lugar: ARTIFACT_DIR deve apontar para cá também no app
+        os.environ["ARTIFACT_DIR"] = str(args.root)
+    artifacts.start_recording()
+    failed = False
+    for page in list_pages(args.pages):
+        result = warm_page(page)
+        failed |= bool(result["error"])
+        print(f"{'OK ' if not result['error'] else 'FALHA'} {page.name}: {result['runs']} execução(ões) "
+              f"em {result['seconds']:.2f}s")
+        for error in result["error"]:
+            print(f"      erro: {error}")
+
+    for name, info in artifacts.save(args.root).items():
+        print(f"{name}: {info['entries']} artefatos, {info['bytes'] / 1024:.0f} KiB"
+              + (f" ({info['skipped']} não serializáveis)" if info["skipped"] else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""utils.llm contra o servidor simulado (scripts/llm_stub_server.py): streaming, retentativas e backoff."""
+import threading
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+from scripts.llm_stub_server import StubHandler, serve
+from utils import llm
+
+
+@pytest.fixture
+def stub():
+    server = serve(port=0, delay=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # Registra os intervalos do backoff em vez de esperar (só em utils.llm: o servidor usa o time real)
+    recorded = []
+    monkeypatch.setattr(llm, "time", SimpleNamespace(sleep=recorded.append))
+    return recorded
+
+
+def settings_for(server, max_retries=2, backoff=0.5):
+    return {"api_key": "stub", "base_url": f"http://127.0.0.1:{server.server_address[1]}/v1", "model": "stub",
+            "timeout": 5.0, "max_retries": max_retries, "backoff": backoff}
+
+
+def test_streams_chunks(stub, sleeps):
+    chunks = list(llm.stream_answer("qual a expectativa?", settings_for(stub)))
+    assert len(chunks) > 1
+    assert "".join(chunks) == "Resposta simulada para: qual a expectativa?"
+    assert StubHandler.calls == 1
+    assert sleeps == []
+
+
+def test_retries_with_exponential_backoff(stub, sleeps):
+    StubHandler.failures = 2
+    answer = "".join(llm.stream_answer("oi", settings_for(stub, max_retries=2, backoff=0.5)))
+    assert answer == "Resposta simulada para: oi"
+    assert StubHandler.calls == 3
+    assert sleeps == [0.5, 1.0]
+
+
+def test_gives_up_after_max_retries(stub, sleeps):
+    StubHandler.failures = 5
+    with pytest.raises(openai.InternalServerError):
+        list(llm.stream_answer("oi", settings_for(stub, max_retries=1, backoff=0.25)))
+    assert StubHandler.calls == 2
+    assert sleeps == [0.25]
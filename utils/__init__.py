@@ -0,0 +1,9 @@
+__all__ = ["load_data"]
+
+
+def __getattr__(name):
+    # Importação tardia: páginas leves (ex.: Home) usam utils.metrics sem carregar o pandas
+    if name == "load_data":
+        from utils.data import load_data
+        return load_data
+    raise AttributeError(f"module 'utils' has no attribute {name!r}")
@@ -0,0 +1,185 @@
+"""Cache de respostas do LLM: LRU em memória, SQLite em disco e coalescência de pedidos."""
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+from utils.config import setting
+from utils.data import CACHE_DIR
+from utils.geo import normalize_name
+
+DB_PATH = CACHE_DIR / "llm_answers.sqlite"
+
+
+def answer_key(question, model):
+    return hashlib.sha256(f"{normalize_name(question)}|{model}".encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    # Pedido em andamento: quem chega depois acompanha os mesmos trechos do pedido original
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.cond = threading.Condition()
+
+    def follow(self):
+        index = 0
+        while True:
+            with self.cond:
+                while index >= len(self.chunks) and not self.done:
+                    self.cond.wait()
+                pending = self.chunks[index:]
+                finished = self.done
+            yield from pending
+            index += len(pending)
+            if finished and index >= len(self.chunks):
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+class AnswerCache:
+    def __init__(self, path=DB_PATH, ttl=7 * 24 * 3600, max_bytes=50 * 1024 * 1024, memory_entries=256):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "coalesced": 0, "misses": 0}
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _init_db(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS answers ("
+                    "key TEXT PRIMARY KEY, model TEXT, answer TEXT, size INTEGER, "
+                    "created REAL, accessed REAL)"
+                )
+        except sqlite3.Error:
+            # Sem disco disponível: funciona só com o cache em memória
+            self.path = None
+
+    def _remember(self, key, answer, created):
+        self._memory[key] = (answer, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] <= self.ttl:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return entry[0]
+        if self.path is None:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT answer, created FROM answers WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                if now - row[1] > self.ttl:
+                    conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                    return None
+                conn.execute("UPDATE answers SET accessed = ? WHERE key = ?", (now, key))
+        except sqlite3.Error:
+            return None
+        with self._lock:
+            self._remember(key, row[0], row[1])
+            self.counters["disk_hits"] += 1
+        return row[0]
+
+    def put(self, key, model, answer):
+        now = time.time()
+        with self._lock:
+            self._remember(key, answer, now)
+        if self.path is None:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, answer, len(answer.encode("utf-8")), now, now),
+                )
+                self._evict(conn, now)
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM answers WHERE created < ?", (now - self.ttl,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM answers").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Remove os menos acessados até voltar ao limite de tamanho
+        for key, size in conn.execute("SELECT key, size FROM answers ORDER BY accessed").fetchall():
+            conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stream(self, question, model, produce):
+        key = answer_key(question, model)
+        cached = self.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.counters["misses"] += 1
+            else:
+                self.counters["coalesced"] += 1
+        if not leader:
+            yield from flight.follow()
+            return
+
+        try:
+            for chunk in produce():
+                with flight.cond:
+                    flight.chunks.append(chunk)
+                    flight.cond.notify_all()
+                yield chunk
+            self.put(key, model, "".join(flight.chunks))
+        except BaseException as e:
+            flight.error = e if isinstance(e, Exception) else RuntimeError("pedido interrompido")
+            raise
+        finally:
+            # Libera quem está esperando mesmo se a sessão líder for interrompida no meio do stream
+            with flight.cond:
+                flight.done = True
+                flight.cond.notify_all()
+            with self._lock:
+                self._flights.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        lookups = sum(counters.values())
+        counters["hit_rate"] = (lookups - counters["misses"]) / lookups if lookups else 0.0
+        return counters
+
+
+@st.cache_resource(show_spinner=False)
+def load_answer_cache():
+    return AnswerCache(
+        ttl=setting("LLM_CACHE_TTL", 7 * 24 * 3600, float),
+        max_bytes=setting("LLM_CACHE_MAX_BYTES", 50 * 1024 * 1024, int),
+        memory_entries=setting("LLM_CACHE_MEMORY_ENTRIES", 256, int),
+    )
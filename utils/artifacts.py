@@ -0,0 +1,173 @@
+"""Artefatos pré-calculados no deploy (scripts/warm_cache.py) e lidos pelas páginas na partida.
+
+O aquecimento executa as páginas com os valores padrão dos widgets (e todos os anos do mapa e da
+regressão) e grava em <ARTIFACT_DIR>/<versão dos dados>-<revisão do código>/ os resultados das
+funções marcadas com @persisted e as figuras já serializadas. Cada valor fica serializado à parte:
+na partida o arquivo da versão atual é lido uma vez e só os valores consultados são desserializados.
+
+O arquivo é lido com pickle, que executa código ao desserializar: ARTIFACT_DIR deve ser gravável
+apenas pelo deploy, nunca apontar para um diretório compartilhado ou vindo de fora.
+"""
+import functools
+import hashlib
+import os
+import pickle
+import re
+import shutil
+import threading
+from pathlib import Path
+
+import streamlit as st
+
+from utils.config import flag, setting
+from utils.data import CACHE_DIR, ROOT_DIR
+
+STORE_FILE = "artifacts.pkl"
+# Gravado por save(): só diretórios com este arquivo e nome <versão>-<revisão> são removidos por _prune
+MARKER_FILE = ".artifact-store"
+STORE_NAME = re.compile(r"^[\w.]+-[0-9a-f]{12}$")
+# Versões mantidas no disco: a atual e a anterior (processos antigos ainda podem estar lendo)
+KEEP_VERSIONS = 2
+
+MISSING = object()
+_recording = None
+_recording_lock = threading.Lock()
+_revision = None
+_enabled = None
+
+
+def artifact_root():
+    return Path(setting("ARTIFACT_DIR", str(CACHE_DIR / "artifacts")))
+
+
+def artifacts_enabled():
+    # ARTIFACT_STORE=0 ignora os artefatos gravados (tudo é calculado na hora)
+    global _enabled
+    if _enabled is None:
+        _enabled = setting("ARTIFACT_STORE", True, flag)
+    return _enabled
+
+
+def source_revision(paths):
+    # Hash do nome e do conteúdo dos arquivos-fonte
+    digest = hashlib.sha256()
+    for path in sorted(Path(p) for p in paths):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def code_revision():
+    # Código novo invalida os artefatos mesmo com os mesmos dados
+    global _revision
+    if _revision is None:
+        _revision = source_revision([ROOT_DIR / "1_Home.py", *ROOT_DIR.glob("utils/*.py"),
+                                     *ROOT_DIR.glob("pages/*.py")])
+    return _revision
+
+
+def store_dir(version, root=None):
+    return Path(root or artifact_root()) / f"{version}-{code_revision()}"
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _load_store(path, stamp):
+    # stamp (mtime) na chave: um aquecimento feito com o app no ar é visto na próxima consulta
+    if stamp is None:
+        return {}
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return {}
+
+
+def _store(version):
+    path = store_dir(version) / STORE_FILE
+    try:
+        stamp = os.stat(path).st_mtime_ns
+    except OSError:
+        stamp = None
+    return _load_store(str(path), stamp)
+
+
+def lookup(version, key):
+    if not artifacts_enabled():
+        return MISSING
+    raw = _store(version).get(key)
+    if raw is None:
+        return MISSING
+    try:
+        return pickle.loads(raw)
+    except (EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        # Classe renomeada ou removida: recalcula
+        return MISSING
+
+
+def record(version, key, value):
+    if _recording is None:
+        return
+    with _recording_lock:
+        _recording.setdefault(version, {})[key] = value
+
+
+def persisted(func):
+    # Vai abaixo do @st.cache_resource: só é chamada em uma falta do cache do processo
+    name = f"{func.__module__}.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(version, *args):
+        key = (name,) + args
+        value = lookup(version, key)
+        if value is MISSING:
+            value = func(version, *args)
+        record(version, key, value)
+        return value
+    return wrapper
+
+
+def start_recording():
+    # Usado pelo aquecimento: a partir daqui todo valor calculado ou lido é guardado para save()
+    global _recording
+    _recording = {}
+
+
+def save(root=None):
+    # Junta o que foi registrado ao que já existe no disco e grava de uma vez (arquivo temporário + os.replace)
+    root = Path(root or artifact_root())
+    summary = {}
+    with _recording_lock:
+        recorded = dict(_recording or {})
+    for version, values in recorded.items():
+        directory = store_dir(version, root)
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / MARKER_FILE).touch()
+        path = directory / STORE_FILE
+        stored = {}
+        if path.exists():
+            stored = _load_store(str(path), os.stat(path).st_mtime_ns)
+        stored = dict(stored)
+        skipped = 0
+        for key, value in values.items():
+            try:
+                stored[key] = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                skipped += 1
+        tmp = directory / f".{STORE_FILE}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(stored, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        summary[directory.name] = {"entries": len(stored), "bytes": path.stat().st_size, "skipped": skipped}
+        _prune(root, directory.name)
+    return summary
+
+
+def _is_store(path):
+    return path.is_dir() and STORE_NAME.match(path.name) is not None and (path / MARKER_FILE).is_file()
+
+
+def _prune(root, current):
+    # ARTIFACT_DIR pode conter outras coisas: só são removidos diretórios gravados por save()
+    versions = sorted((p for p in root.iterdir() if _is_store(p)), key=lambda p: p.stat().st_mtime, reverse=True)
+    for stale in [p for p in versions if p.name != current][KEEP_VERSIONS - 1:]:
+        shutil.rmtree(stale, ignore_errors=True)
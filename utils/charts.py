@@ -0,0 +1,192 @@
+"""Construtores de figuras Plotly reaproveitados pelas páginas."""
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from utils.lazy import lazy_import
+from utils.lod import point_threshold, scatter_summary
+from utils.metrics import timed
+
+px = lazy_import("plotly.express")
+
+
+@timed("figure")
+def country_change_figure(stats_df):
+    # Um único trace: cada país é um segmento (início, fim) separado por None
+    n = len(stats_df)
+    x = np.empty(n * 3, dtype=object)
+    y = np.empty(n * 3, dtype=object)
+    x[0::3] = x[1::3] = stats_df['Country'].to_numpy()
+    y[0::3] = stats_df['Start Life'].to_numpy()
+    y[1::3] = stats_df['End Life'].to_numpy()
+    x[2::3] = y[2::3] = None
+    colors = np.where(stats_df['Delta'].to_numpy() >= 0, 'green', 'red')
+
+    fig = go.Figure(go.Scatter(
+        x=x,
+        y=y,
+        mode='lines+markers',
+        marker=dict(size=10, color=np.repeat(colors, 3)),
+        line=dict(color='lightgray'),
+        customdata=np.repeat(stats_df['Delta'].to_numpy(), 3),
+        hovertemplate='%{x}: %{y:.1f} anos (Δ %{customdata:+.1f})<extra></extra>',
+        showlegend=False,
+    ))
+
+    fig.update_layout(
+        title="Mudança na Expectativa de Vida e Intervalo de Confiança (por País)",
+        xaxis_title="Países",
+        yaxis_title="Expectativa de Vida (anos)",
+        template="plotly_white"
+    )
+    return fig
+
+
+@timed("figure")
+def choropleth_figure(payload, metric, title, color_scale="Viridis", color_range=None):
+    # Só códigos ISO-3 e o vetor de cores vão para o navegador (sem resolução de nomes no cliente)
+    fig = go.Figure(go.Choropleth(
+        locations=payload["locations"],
+        z=payload["z"],
+        text=payload["text"],
+        colorscale=color_scale,
+        zmin=color_range[0] if color_range else None,
+        zmax=color_range[1] if color_range else None,
+        colorbar=dict(title=metric),
+        hovertemplate="<b>%{text}</b><br>" + metric + ": %{z}<extra></extra>",
+    ))
+    # uirevision mantém zoom/posição do mapa entre reruns do slider
+    fig.update_layout(title=title, uirevision="choropleth", geo=dict(showframe=False))
+    return fig
+
+
+@timed("figure")
+def scatter_lod_figure(summary, x_label, y_label, title, trendline=True):
+    # "points": todos os pontos via WebGL; "density": grade de contagens calculada no servidor
+    if summary["mode"] == "points":
+        fig = go.Figure(go.Scattergl(
+            x=summary["x"], y=summary["y"], mode="markers", showlegend=False,
+            hovertemplate=f"{x_label}: %{{x}}<br>{y_label}: %{{y}}<extra></extra>",
+        ))
+    else:
+        fig = go.Figure(go.Heatmap(
+            x=summary["x"], y=summary["y"], z=summary["counts"], colorscale="Blues",
+            colorbar=dict(title="Pontos"), hoverongaps=False,
+            hovertemplate=f"{x_label}: %{{x:.3g}}<br>{y_label}: %{{y:.3g}}<br>Pontos: %{{z}}<extra></extra>",
+        ))
+    if trendline and summary["fit"] is not None:
+        intercept, slope = summary["fit"]
+        x_line = np.array(summary["x_range"], dtype="float64")
+        fig.add_trace(go.Scatter(x=x_line, y=intercept + slope * x_line, mode="lines",
+                                 name="MQO", showlegend=False))
+    fig.update_layout(title=title, xaxis_title=x_label, yaxis_title=y_label)
+    return fig
+
+
+@timed("figure")
+def histogram_box_figure(summary, label, title):
+    # Barras com as contagens por faixa e box plot montado a partir dos quartis pré-calculados
+    edges = summary["edges"]
+    box = summary["box"]
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.03)
+    fig.add_trace(go.Box(
+        q1=[box["q1"]], median=[box["median"]], q3=[box["q3"]], mean=[box["mean"]],
+        lowerfence=[box["lowerfence"]], upperfence=[box["upperfence"]],
+        y=[label], orientation="h", showlegend=False, hoverinfo="x",
+    ), row=1, col=1)
+    fig.add_trace(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2, y=summary["counts"], width=np.diff(edges),
+        opacity=0.7, showlegend=False,
+        hovertemplate=f"{label}: %{{x:.1f}}<br>Contagem: %{{y}}<extra></extra>",
+    ), row=2, col=1)
+    fig.update_yaxes(showticklabels=False, row=1, col=1)
+    fig.update_layout(title=title, xaxis2_title=label, yaxis2_title="Contagem", bargap=0)
+    return fig
+
+
+@timed("figure")
+def status_box_figure(df):
+    data = df[df["Status"].notna() & df["Life expectancy"].notna()]
+    return px.box(data, x="Status", y="Life expectancy",
+                  title="Distribuição da Expectativa de Vida por Nível de Desenvolvimento",
+                  labels={"Life expectancy": "Expectativa de Vida", "Status": "Status do País"})
+
+
+@timed("figure")
+def vaccination_box_figure(df, vaccine, threshold, vaccine_label):
+    data = df.loc[df[vaccine].notna() & df["Life expectancy"].notna(), [vaccine, "Life expectancy"]]
+    data["Vacinação"] = np.where(data[vaccine] >= threshold, f"Alta (≥ {threshold}%)", f"Baixa (< {threshold}%)")
+    return px.box(data, x="Vacinação", y="Life expectancy",
+                  title=f"Expectativa de Vida por Nível de Vacinação contra {vaccine_label}",
+                  labels={"Life expectancy": "Expectativa de Vida"})
+
+
+@timed("figure")
+def regression_figure(df_year, features, result, year):
+    # Dispersão da primeira variável; a reta de MQO só faz sentido na regressão simples
+    main = features[0]
+    main_label = "PIB" if main == "GDP" else main
+    fig = scatter_lod_figure(scatter_summary(df_year[main], df_year["Life expectancy"], point_threshold()),
+                             main_label, "Expectativa de Vida", trendline=False,
+                             title=f"Relação entre {main_label} e Expectativa de Vida em {year}")
+    if len(features) == 1:
+        x_line = np.array([df_year[main].min(), df_year[main].max()], dtype="float64")
+        fig.add_trace(go.Scatter(x=x_line, y=result["coef const"] + result[f"coef {main}"] * x_line,
+                                 mode="lines", name="MQO", showlegend=False))
+    return fig
+
+
+@timed("figure")
+def correlation_heatmap_figure(matrix, labels, counts, title):
+    # Escala fixa em [-1, 1]; o número de pares completos de cada célula aparece no hover
+    fig = go.Figure(go.Heatmap(
+        z=matrix, x=labels, y=labels, customdata=counts, zmin=-1, zmax=1, colorscale="RdBu",
+        texttemplate="%{z:.2f}", textfont=dict(size=9), colorbar=dict(title="r"), hoverongaps=False,
+        hovertemplate="%{y} × %{x}<br>r = %{z:.3f}<br>Pares completos: %{customdata}<extra></extra>",
+    ))
+    fig.update_layout(title=title, height=700, yaxis=dict(autorange="reversed"))
+    return fig
+
+
+@timed("figure")
+def forecast_figure(years, values, future_years, mean, lower, upper, label, title):
+    # Série observada, projeção tracejada e faixa do intervalo de predição (um polígono fechado)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=np.concatenate((future_years, future_years[::-1])),
+                             y=np.concatenate((upper, lower[::-1])), fill="toself",
+                             fillcolor="rgba(31, 119, 180, 0.2)", line=dict(width=0), hoverinfo="skip",
+                             name="Intervalo de predição"))
+    fig.add_trace(go.Scatter(x=years, y=values, mode="lines+markers", name="Observado",
+                             line=dict(color="#1f77b4")))
+    # A projeção parte do último valor observado para a linha não ficar solta
+    observed = ~np.isnan(values)
+    start_x = years[observed][-1:] if observed.any() else years[:0]
+    start_y = values[observed][-1:] if observed.any() else values[:0]
+    fig.add_trace(go.Scatter(x=np.concatenate((start_x, future_years)), y=np.concatenate((start_y, mean)),
+                             mode="lines+markers", name="Projeção", line=dict(color="#1f77b4", dash="dash")))
+    fig.update_layout(title=title, xaxis_title="Anos", yaxis_title=label, template="plotly_white")
+    return fig
+
+
+@timed("figure")
+def small_multiples_figure(years, block, countries, metrics, y_ranges, title):
+    # Uma figura WebGL: linha = país, coluna = indicador; block[indicador, país, ano] já vem fatiado do cubo.
+    # y_ranges fixa a escala de cada indicador em todas as páginas da seleção.
+    rows, cols = len(countries), len(metrics)
+    fig = make_subplots(rows=rows, cols=cols, shared_xaxes=True, column_titles=list(metrics),
+                        row_titles=list(countries), vertical_spacing=0.3 / max(rows, 1),
+                        horizontal_spacing=0.2 / max(cols, 1))
+    colors = px.colors.qualitative.Plotly
+    for m, metric in enumerate(metrics):
+        for c, country in enumerate(countries):
+            fig.add_trace(go.Scattergl(
+                x=years, y=block[m, c], mode="lines+markers", marker=dict(size=4),
+                line=dict(color=colors[m % len(colors)]), showlegend=False,
+                hovertemplate=f"{country}<br>%{{x}}: %{{y:.2f}}<extra>{metric}</extra>",
+            ), row=c + 1, col=m + 1)
+        if y_ranges[m] is not None:
+            fig.update_yaxes(range=y_ranges[m], row=None, col=m + 1)
+    fig.update_annotations(font_size=11)
+    fig.update_layout(title=title, height=140 * rows + 120, template="plotly_white",
+                      margin=dict(l=40, r=140, t=90, b=40))
+    return fig
@@ -0,0 +1,241 @@
+"""Roteador de intenções do chat bot, montado uma vez por processo."""
+import re
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.cube import _aggregate_cube
+from utils.data import ROOT_DIR, data_version
+from utils.geo import normalize_name
+from utils.metrics import timed
+
+ALIASES_PATH = ROOT_DIR / "country_aliases.csv"
+
+# Como cada indicador costuma ser citado nas perguntas (comparação sem acentos)
+METRIC_SYNONYMS = {
+    "Life expectancy": ["expectativa de vida", "longevidade", "life expectancy"],
+    "Adult Mortality": ["mortalidade adulta", "mortalidade de adultos", "adult mortality"],
+    "infant deaths": ["mortalidade infantil", "mortes infantis", "obitos infantis", "infant deaths"],
+    "Alcohol": ["alcool", "consumo de alcool", "alcohol"],
+    "percentage expenditure": ["gasto percentual", "gasto percentual com saude", "percentage expenditure"],
+    "Hepatitis B": ["hepatite b", "hepatitis b"],
+    "Measles": ["sarampo", "measles"],
+    "BMI": ["imc", "indice de massa corporal", "bmi"],
+    "under-five deaths": ["mortalidade de menores de 5 anos", "mortalidade de menores de cinco anos",
+                          "mortes de menores de 5 anos", "under five deaths"],
+    "Polio": ["polio", "poliomielite"],
+    "Total expenditure": ["gasto total com saude", "gastos com saude", "gasto com saude", "total expenditure"],
+    "Diphtheria": ["difteria", "diphtheria"],
+    "HIV/AIDS": ["hiv", "aids", "hiv aids"],
+    "GDP": ["pib", "produto interno bruto", "gdp"],
+    "Population": ["populacao", "population"],
+    "thinness 1-19 years": ["magreza", "magreza de 10 a 19 anos", "thinness"],
+    "thinness 5-9 years": ["magreza infantil", "magreza de 5 a 9 anos"],
+    "Income composition of resources": ["composicao de renda", "renda", "income composition"],
+    "Schooling": ["escolaridade", "anos de estudo", "educacao", "schooling"],
+}
+METRIC_LABELS = {metric: names[0] for metric, names in METRIC_SYNONYMS.items()}
+METRIC_LABELS.update({"Alcohol": "consumo de álcool", "Measles": "sarampo", "Population": "população",
+                      "Hepatitis B": "vacinação contra hepatite B", "Polio": "vacinação contra pólio",
+                      "Diphtheria": "vacinação contra difteria", "GDP": "PIB", "BMI": "IMC",
+                      "percentage expenditure": "gasto percentual com saúde",
+                      "Total expenditure": "gasto total com saúde", "HIV/AIDS": "HIV/AIDS",
+                      "thinness 1-19 years": "magreza (10 a 19 anos)",
+                      "thinness 5-9 years": "magreza (5 a 9 anos)",
+                      "under-five deaths": "mortalidade de menores de 5 anos",
+                      "Income composition of resources": "composição de renda"})
+
+METRIC_UNITS = {"Life expectancy": " anos", "Schooling": " anos", "Hepatitis B": "%", "Polio": "%",
+                "Diphtheria": "%", "Total expenditure": "%"}
+
+# Padrões pré-compilados, aplicados sobre o texto normalizado (sem acentos)
+YEAR_PATTERN = re.compile(r"\b(1[89]\d{2}|20\d{2})\b")
+TOP_PATTERN = re.compile(r"\btop\s*(\d{1,3})\b|\b(\d{1,3}) (?:paises|maiores|menores)\b")
+STAT_PATTERNS = {
+    "max": re.compile(r"\b(?:maior|maiores|maximo|maxima|mais alt[oa]s?)\b"),
+    "min": re.compile(r"\b(?:menor|menores|minimo|minima|mais baix[oa]s?)\b"),
+    "mean": re.compile(r"\b(?:media|medio)\b"),
+}
+RANK_PATTERN = re.compile(r"\b(?:ranking|posicao|colocacao)\b")
+CORRELATION_PATTERN = re.compile(r"\b(?:correlacao|relacao|correlacionad[oa]s?)\b")
+LIST_PATTERN = re.compile(r"\b(?:paises|maiores|menores|ranking)\b")
+
+
+class PhraseMatcher:
+    # Trie sobre os tokens das frases normalizadas (sem acentos), ex.: nomes de países e apelidos.
+    # A busca percorre a pergunta uma vez, com custo proporcional ao seu tamanho.
+    _END = object()
+
+    def __init__(self, phrases):
+        self._root = {}
+        for phrase, value in phrases.items():
+            node = self._root
+            for token in normalize_name(phrase).split():
+                node = node.setdefault(token, {})
+            node[self._END] = value
+
+    def find_all(self, text):
+        # Correspondências mais longas, sem sobreposição, na ordem em que aparecem
+        tokens = normalize_name(text).split()
+        found = []
+        start = 0
+        while start < len(tokens):
+            node = self._root
+            match, length = None, 0
+            for offset, token in enumerate(tokens[start:], 1):
+                node = node.get(token)
+                if node is None:
+                    break
+                if self._END in node:
+                    match, length = node[self._END], offset
+            if match is None:
+                start += 1
+            else:
+                found.append(match)
+                start += length
+        return found
+
+    def find(self, text):
+        found = self.find_all(text)
+        return found[0] if found else None
+
+
+def load_aliases(countries, path=ALIASES_PATH):
+    names = {country: country for country in countries}
+    if path.exists():
+        aliases = pd.read_csv(path, dtype=str)
+        for country, alias in zip(aliases["Country"], aliases["Alias"]):
+            if country in names:
+                names[alias] = country
+    return names
+
+
+class IntentRouter:
+    # Planejador de consultas: transforma a pergunta em uma busca no cubo de agregados
+    def __init__(self, cube):
+        self.cube = cube
+        self.countries = PhraseMatcher(load_aliases(cube.countries))
+        self.metrics = PhraseMatcher({name: metric for metric, names in METRIC_SYNONYMS.items() for name in names})
+
+    def plan(self, question):
+        text = normalize_name(question)
+        metrics = list(dict.fromkeys(self.metrics.find_all(text)))
+        if not metrics:
+            return None
+        countries = self.countries.find_all(text)
+        years = [int(y) for y in YEAR_PATTERN.findall(text)]
+        if any(not self.cube.has_year(y) for y in years):
+            return None
+        year = years[0] if years else None
+        country = countries[0] if countries else None
+        stat = next((name for name, pattern in STAT_PATTERNS.items() if pattern.search(text)), None)
+        metric = metrics[0]
+
+        if CORRELATION_PATTERN.search(text) and len(metrics) >= 2:
+            return ("correlation", metrics[0], metrics[1])
+
+        top = TOP_PATTERN.search(text)
+        if top or (country is None and LIST_PATTERN.search(text) and stat in ("max", "min")):
+            n = int(top.group(1) or top.group(2)) if top else 10
+            return ("top", metric, year, max(n, 1), stat != "min")
+
+        if country is not None:
+            if year is not None:
+                if RANK_PATTERN.search(text):
+                    return ("rank", metric, country, year)
+                return ("value", metric, country, year)
+            return ("country_stat", metric, country, stat or "mean")
+
+        if stat in ("max", "min"):
+            return ("extreme", metric, year, stat == "max")
+        if year is not None:
+            return ("year_stat", metric, year, "mean")
+        if stat == "mean":
+            return ("overall_stat", metric, "mean")
+        return None
+
+    @timed("query")
+    def route(self, question):
+        query = self.plan(question)
+        if query is None:
+            return None
+        return getattr(self, f"_answer_{query[0]}")(*query[1:])
+
+    @staticmethod
+    def _fmt(metric, value):
+        if metric == "Population":
+            return f"{value:,.0f}".replace(",", ".")
+        return f"{value:.2f}{METRIC_UNITS.get(metric, '')}"
+
+    def _answer_correlation(self, first, second):
+        correlation = self.cube.correlation(first, second)
+        return (f"A correlação entre **{METRIC_LABELS[first]}** e **{METRIC_LABELS[second]}** no dataset é "
+                f"**{correlation:.2f}**, indicando uma relação {'positiva' if correlation > 0 else 'negativa'}.")
+
+    def _answer_top(self, metric, year, n, largest):
+        rows = self.cube.top(metric, year, n, largest)
+        if not rows:
+            return None
+        period = f"em **{year}**" if year is not None else "(média de todos os anos)"
+        lines = "\n".join(f"{i}. {country}: {self._fmt(metric, value)}" for i, (country, value) in enumerate(rows, 1))
+        return (f"Os {len(rows)} países com {'maior' if largest else 'menor'} {METRIC_LABELS[metric]} "
+                f"{period} são:\n\n{lines}")
+
+    def _answer_rank(self, metric, country, year):
+        rank = self.cube.rank(metric, country, year)
+        if np.isnan(rank):
+            return None
+        return (f"Em **{year}**, **{country}** ocupa a **{int(rank)}ª posição** em {METRIC_LABELS[metric]} "
+                f"({self._fmt(metric, self.cube.value(metric, country, year))}).")
+
+    def _answer_value(self, metric, country, year):
+        value = self.cube.value(metric, country, year)
+        if np.isnan(value):
+            return None
+        return f"O valor de **{METRIC_LABELS[metric]}** em **{country}** em **{year}** é **{self._fmt(metric, value)}**."
+
+    def _answer_country_stat(self, metric, country, stat):
+        value = self.cube.country_stat(metric, country, stat)
+        if np.isnan(value):
+            return None
+        if stat == "mean":
+            return f"A média de **{METRIC_LABELS[metric]}** em **{country}** é **{self._fmt(metric, value)}**."
+        series = self.cube.series(metric, country)
+        year = self.cube.years[int(np.nanargmax(series) if stat == "max" else np.nanargmin(series))]
+        return (f"O {'maior' if stat == 'max' else 'menor'} valor de **{METRIC_LABELS[metric]}** em **{country}** "
+                f"foi **{self._fmt(metric, value)}**, em **{year}**.")
+
+    def _answer_extreme(self, metric, year, largest):
+        if year is not None:
+            rows = self.cube.top(metric, year, 1, largest)
+            if not rows:
+                return None
+            country, value = rows[0]
+            when = f" em **{year}**"
+        else:
+            plane = self.cube.values[self.cube.metric_index(metric)]
+            if np.isnan(plane).all():
+                return None
+            c, y = np.unravel_index(np.nanargmax(plane) if largest else np.nanargmin(plane), plane.shape)
+            country, value, when = self.cube.countries[c], plane[c, y], f" (em {self.cube.years[y]})"
+        return (f"O país com **{'maior' if largest else 'menor'} {METRIC_LABELS[metric]}** é **{country}**, "
+                f"com **{self._fmt(metric, value)}**{when}.")
+
+    def _answer_year_stat(self, metric, year, stat):
+        value = self.cube.year_stat(metric, year, stat)
+        return f"A média de **{METRIC_LABELS[metric]}** entre os países em **{year}** é **{self._fmt(metric, value)}**."
+
+    def _answer_overall_stat(self, metric, stat):
+        value = self.cube.overall_stat(metric, stat)
+        return f"A média global de **{METRIC_LABELS[metric]}** no dataset é **{self._fmt(metric, value)}**."
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _intent_router(version):
+    return IntentRouter(_aggregate_cube(version))
+
+
+@timed("load")
+def load_router():
+    return _intent_router(data_version())
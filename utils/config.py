@@ -0,0 +1,21 @@
+"""Leitura de configurações: Streamlit Secrets, depois variáveis de ambiente, depois o padrão."""
+import os
+
+import streamlit as st
+
+
+def setting(name, default=None, cast=str):
+    try:
+        value = st.secrets.get(name)
+    except FileNotFoundError:
+        # Sem secrets.toml (ex.: scripts fora do Streamlit)
+        value = None
+    if value is None:
+        value = os.environ.get(name)
+    if value is None:
+        return default
+    return cast(value)
+
+
+def flag(value):
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
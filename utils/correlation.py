@@ -0,0 +1,181 @@
+"""Matrizes de correlação (Pearson e Spearman) com pares completos, por recorte, e bootstrap por par."""
+import numpy as np
+import streamlit as st
+
+from utils.artifacts import persisted
+from utils.data import METRIC_COLUMNS, _shared_frame, data_version
+from utils.lazy import lazy_import
+from utils.metrics import timed
+from utils.partitions import _partition_index
+from utils.stats import _chunks
+
+scipy_stats = lazy_import("scipy.stats")
+
+METHODS = ("pearson", "spearman")
+STATUSES = ("Developed", "Developing")
+# Células (linhas do conjunto x pares de colunas) por ladrilho no cálculo dos postos da Spearman
+RANK_BLOCK_CELLS = 4_000_000
+
+
+def _from_sums(n, sx, sy, sxx, syy, sxy):
+    # Correlação de cada par a partir das somas sobre as linhas em que os dois valores existem;
+    # pares com menos de 3 linhas ficam NaN
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx ** 2 / n
+        var_y = syy - sy ** 2 / n
+        r = cov / np.sqrt(var_x * var_y)
+    return np.clip(np.where(n >= 3, r, np.nan), -1.0, 1.0)
+
+
+def pearson_matrix(X):
+    # Pares completos em uma passada: com M = máscara de presença e Z = X com zeros no lugar de NaN,
+    # M'M conta as linhas de cada par, Z'M soma x_i onde x_j existe e Z'Z soma os produtos.
+    X = np.asarray(X, dtype="float64")
+    M = ~np.isnan(X)
+    Mf = M.astype("float64")
+    # Centrar antes reduz o cancelamento numérico nas somas de quadrados
+    means = np.where(M, X, 0.0).sum(axis=0) / np.maximum(Mf.sum(axis=0), 1)
+    Z = np.where(M, X - means, 0.0)
+    n = Mf.T @ Mf
+    sx = Z.T @ Mf
+    sxx = (Z ** 2).T @ Mf
+    return _from_sums(n, sx, sx.T, sxx, sxx.T, Z.T @ Z), n.astype("int32")
+
+
+def _pair_ranks(X, M, order, ranked, against):
+    # ranks[a, linha, b] = posto médio de x_ranked[a] entre as linhas em que ele e x_against[b] existem
+    # (0 fora delas), via somas acumuladas da máscara de x_against[b] na ordem de x_ranked[a];
+    # empates recebem a média dos postos.
+    ranks = np.zeros((len(ranked), X.shape[0], len(against)))
+    Mc = M[:, against].astype("float64")
+    for a, i in enumerate(ranked):
+        idx = order[i][:M[:, i].sum()]
+        values = X[idx, i]
+        present = Mc[idx]
+        counts = np.cumsum(present, axis=0)
+        before = counts - present
+        # Início e fim de cada grupo de empates na ordem de x_i
+        new_group = np.concatenate(([True], values[1:] != values[:-1]))
+        group = np.cumsum(new_group) - 1
+        starts = np.flatnonzero(new_group)
+        ends = np.concatenate((starts[1:], [len(values)])) - 1
+        low = before[starts][group]
+        high = counts[ends][group]
+        ranks[a, idx] = np.where(present > 0, (low + high + 1) / 2, 0.0)
+    return ranks
+
+
+def spearman_matrix(X):
+    # Postos refeitos para cada par (como no pandas), sem laço sobre os pares: ladrilhos de pares (i, j)
+    X = np.asarray(X, dtype="float64")
+    M = ~np.isnan(X)
+    n_rows, k = X.shape
+    # NaN vai para o fim da ordenação; só as primeiras M[:, i].sum() posições são usadas
+    order = np.argsort(X, axis=0, kind="stable").T
+    Mf = M.astype("float64")
+    n = Mf.T @ Mf
+    r = np.full((k, k), np.nan)
+    # Pares por ladrilho: todas as linhas i e um bloco de colunas j enquanto couber; com muitas linhas
+    # o ladrilho encolhe até um único par (duas colunas de postos, do tamanho de uma coluna de X)
+    pairs = max(1, RANK_BLOCK_CELLS // max(n_rows, 1))
+    tile_rows = max(1, min(k, pairs))
+    tile_cols = max(1, pairs // tile_rows)
+    for row_start in range(0, k, tile_rows):
+        rows = np.arange(row_start, min(row_start + tile_rows, k))
+        for col_start in range(0, k, tile_cols):
+            columns = np.arange(col_start, min(col_start + tile_cols, k))
+            # A[a, :, b] = posto de x_rows[a] no par (a, j_b); B[b, :, a] = posto de x_j_b no par (j_b, a)
+            A = _pair_ranks(X, M, order, rows, columns)
+            B = _pair_ranks(X, M, order, columns, rows)
+            nb = n[np.ix_(rows, columns)]
+            # A soma dos postos médios de n valores é n(n+1)/2
+            s = nb * (nb + 1) / 2
+            r[np.ix_(rows, columns)] = _from_sums(nb, s, s, (A ** 2).sum(axis=1), (B ** 2).sum(axis=1).T,
+                                                  np.einsum("inb,bni->ib", A, B))
+    return r, n.astype("int32")
+
+
+def slice_labels(years):
+    return ["all"] + [f"year:{y}" for y in years] + [f"status:{s}" for s in STATUSES]
+
+
+def slice_frame(df, partitions, label):
+    if label == "all":
+        return df
+    kind, value = label.split(":", 1)
+    if kind == "year":
+        return partitions.year(int(value))
+    return df.loc[df["Status"] == value]
+
+
+class CorrelationTable:
+    # values[recorte, método, i, j] em float32 e counts[recorte, i, j]: poucos KB para todos os recortes
+    def __init__(self, df, partitions, columns=METRIC_COLUMNS):
+        self.columns = list(columns)
+        self.slices = slice_labels(partitions.years)
+        self._slice_pos = {label: i for i, label in enumerate(self.slices)}
+        k = len(self.columns)
+        self.values = np.full((len(self.slices), len(METHODS), k, k), np.nan, dtype="float32")
+        self.counts = np.zeros((len(self.slices), k, k), dtype="int32")
+        for s, label in enumerate(self.slices):
+            X = slice_frame(df, partitions, label)[self.columns].to_numpy(dtype="float64")
+            self.values[s, 0], self.counts[s] = pearson_matrix(X)
+            self.values[s, 1], _ = spearman_matrix(X)
+
+    def matrix(self, label, method):
+        return self.values[self._slice_pos[label], METHODS.index(method)]
+
+    def pair_counts(self, label):
+        return self.counts[self._slice_pos[label]]
+
+    def count(self, label, first, second):
+        return int(self.counts[self._slice_pos[label], self.columns.index(first), self.columns.index(second)])
+
+
+def bootstrap_pair(x, y, method="pearson", iterations=2000, confidence=0.95, seed=42):
+    # Intervalo percentil da correlação de um par, com as reamostragens processadas em blocos (B, n)
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    keep = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[keep], y[keep]
+    if len(x) < 3:
+        return np.nan, np.nan
+    rng = np.random.default_rng(seed)
+    estimates = []
+    for size in _chunks(iterations, len(x)):
+        idx = rng.integers(0, len(x), (size, len(x)))
+        xs, ys = x[idx], y[idx]
+        if method == "spearman":
+            xs, ys = scipy_stats.rankdata(xs, axis=1), scipy_stats.rankdata(ys, axis=1)
+        xs = xs - xs.mean(axis=1, keepdims=True)
+        ys = ys - ys.mean(axis=1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            estimates.append((xs * ys).sum(axis=1) / np.sqrt((xs ** 2).sum(axis=1) * (ys ** 2).sum(axis=1)))
+    estimates = np.concatenate(estimates)
+    alpha = (1 - confidence) / 2
+    lower, upper = np.nanquantile(estimates, [alpha, 1 - alpha])
+    return float(lower), float(upper)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+@persisted
+def _correlation_table(version):
+    return CorrelationTable(_shared_frame(version), _partition_index(version))
+
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+def _bootstrap(version, label, first, second, method, iterations):
+    frame = slice_frame(_shared_frame(version), _partition_index(version), label)
+    return bootstrap_pair(frame[first].to_numpy(dtype="float64"), frame[second].to_numpy(dtype="float64"),
+                          method, iterations)
+
+
+@timed("stats")
+def load_correlation_table():
+    return _correlation_table(data_version())
+
+
+@timed("stats")
+def load_bootstrap_pair(label, first, second, method, iterations=2000):
+    return _bootstrap(data_version(), label, first, second, method, int(iterations))
@@ -0,0 +1,136 @@
+"""Cubo de agregados (indicador x país x ano) pré-calculado no carregamento."""
+import warnings
+
+import numpy as np
+import streamlit as st
+
+from utils.data import METRIC_COLUMNS, _shared_frame, data_version
+from utils.metrics import timed
+
+_STATS = {"mean": np.nanmean, "min": np.nanmin, "max": np.nanmax}
+
+
+class AggregateCube:
+    def __init__(self, df, metrics=METRIC_COLUMNS):
+        self.metrics = list(metrics)
+        self.countries = [str(c) for c in df["Country"].cat.categories]
+        self.years = sorted(int(y) for y in df["Year"].unique())
+        self._metric_pos = {m: i for i, m in enumerate(self.metrics)}
+        self._country_pos = {c: i for i, c in enumerate(self.countries)}
+        self._year_pos = {y: i for i, y in enumerate(self.years)}
+
+        # values[indicador, país, ano]; combinações ausentes ficam NaN
+        self.values = np.full((len(self.metrics), len(self.countries), len(self.years)), np.nan)
+        country_idx = df["Country"].cat.codes.to_numpy()
+        year_idx = np.searchsorted(self.years, df["Year"].to_numpy())
+        for i, metric in enumerate(self.metrics):
+            self.values[i, country_idx, year_idx] = df[metric].to_numpy(dtype="float64")
+
+        # Estatísticas por país (sobre os anos) e por ano (sobre os países);
+        # fatias só com NaN geram aviso e resultado NaN
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            self.by_country = {stat: fn(self.values, axis=2) for stat, fn in _STATS.items()}
+            self.by_year = {stat: fn(self.values, axis=1) for stat, fn in _STATS.items()}
+            self.overall = {stat: fn(self.values.reshape(len(self.metrics), -1), axis=1)
+                            for stat, fn in _STATS.items()}
+
+        # Posição no ranking de cada país por ano (1 = maior valor)
+        order = np.argsort(-self.values, axis=1, kind="stable")
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(1, len(self.countries) + 1)[None, :, None], axis=1)
+        self.ranks = np.where(np.isnan(self.values), np.nan, ranks)
+
+        # Correlação de Pearson entre indicadores (pares completos)
+        self.correlations = df[self.metrics].astype("float64").corr().to_numpy()
+
+    def arrays(self):
+        # Todos os arrays do cubo por nome, para publicação em utils/shared.py
+        arrays = {"values": self.values, "ranks": self.ranks, "correlations": self.correlations}
+        for group in ("by_country", "by_year", "overall"):
+            arrays.update({f"{group}.{stat}": array for stat, array in getattr(self, group).items()})
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, metrics, countries, years, arrays):
+        # Reconstrói o cubo a partir de arrays já calculados (sem cópia se forem mapeados em memória)
+        cube = cls.__new__(cls)
+        cube.metrics, cube.countries, cube.years = list(metrics), list(countries), list(years)
+        cube._metric_pos = {m: i for i, m in enumerate(cube.metrics)}
+        cube._country_pos = {c: i for i, c in enumerate(cube.countries)}
+        cube._year_pos = {y: i for i, y in enumerate(cube.years)}
+        cube.values, cube.ranks, cube.correlations = arrays["values"], arrays["ranks"], arrays["correlations"]
+        for group in ("by_country", "by_year", "overall"):
+            setattr(cube, group, {stat: arrays[f"{group}.{stat}"] for stat in _STATS})
+        return cube
+
+    def metric_index(self, metric):
+        return self._metric_pos[metric]
+
+    def value(self, metric, country, year):
+        return self.values[self._metric_pos[metric], self._country_pos[country], self._year_pos[year]]
+
+    def series(self, metric, country):
+        return self.values[self._metric_pos[metric], self._country_pos[country]]
+
+    def block(self, metrics, countries):
+        # values[indicadores, países, anos] para uma seleção: só indexação, sem agrupar o frame
+        return self.values[np.ix_([self._metric_pos[m] for m in metrics],
+                                  [self._country_pos[c] for c in countries])]
+
+    def rank(self, metric, country, year):
+        return self.ranks[self._metric_pos[metric], self._country_pos[country], self._year_pos[year]]
+
+    def country_stat(self, metric, country, stat="mean"):
+        return self.by_country[stat][self._metric_pos[metric], self._country_pos[country]]
+
+    def year_stat(self, metric, year, stat="mean"):
+        return self.by_year[stat][self._metric_pos[metric], self._year_pos[year]]
+
+    def overall_stat(self, metric, stat="mean"):
+        return self.overall[stat][self._metric_pos[metric]]
+
+    def top(self, metric, year=None, n=10, largest=True):
+        # Maiores/menores valores em um ano (ou na média de todos os anos)
+        m = self._metric_pos[metric]
+        if year is None:
+            column = self.by_country["mean"][m]
+        else:
+            column = self.values[m, :, self._year_pos[year]]
+        valid = np.flatnonzero(~np.isnan(column))
+        ordered = valid[np.argsort(-column[valid] if largest else column[valid], kind="stable")][:n]
+        return [(self.countries[i], float(column[i])) for i in ordered]
+
+    def correlation(self, first, second):
+        return float(self.correlations[self._metric_pos[first], self._metric_pos[second]])
+
+    def has_year(self, year):
+        return year in self._year_pos
+
+    def has_country(self, country):
+        return country in self._country_pos
+
+
+def block_ranges(block, pad=0.05):
+    # (mín, máx) de cada indicador de um bloco do cubo, com folga; None se o indicador não tem dados
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        low = np.nanmin(block, axis=(1, 2))
+        high = np.nanmax(block, axis=(1, 2))
+    margin = (high - low) * pad
+    return [None if np.isnan(lo) else (float(lo - d), float(hi + d)) for lo, hi, d in zip(low, high, margin)]
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _aggregate_cube(version):
+    from utils.shared import shared_for
+
+    shared = shared_for(version)
+    if shared is not None:
+        return shared.cube
+    return AggregateCube(_shared_frame(version))
+
+
+@timed("load")
+def load_cube():
+    return _aggregate_cube(data_version())
@@ -0,0 +1,158 @@
+"""Camada de dados compartilhada por todas as páginas do dashboard."""
+import hashlib
+import os
+import re
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from utils.config import flag, setting
+from utils.metrics import timed
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+# LIFE_EXPECTANCY_CSV permite apontar o dashboard para outro arquivo (ex.: dados sintéticos dos benchmarks)
+CSV_PATH = Path(os.environ.get("LIFE_EXPECTANCY_CSV", ROOT_DIR / "LifeExpectancy.csv"))
+CODES_PATH = ROOT_DIR / "country_codes.csv"
+CACHE_DIR = ROOT_DIR / ".cache"
+
+# Esquema explícito (nomes já normalizados)
+CATEGORICAL_COLUMNS = ["Country", "Status", "ISO3"]
+YEAR_COLUMN = "Year"
+# Population passa de 2**24 e perderia precisão em float32
+FLOAT64_COLUMNS = ["Population"]
+METRIC_COLUMNS = [
+    "Life expectancy", "Adult Mortality", "infant deaths", "Alcohol",
+    "percentage expenditure", "Hepatitis B", "Measles", "BMI", "under-five deaths",
+    "Polio", "Total expenditure", "Diphtheria", "HIV/AIDS", "GDP", "Population",
+    "thinness 1-19 years", "thinness 5-9 years", "Income composition of resources",
+    "Schooling",
+]
+
+_version_memo = {}
+_refresh = None
+_shared = None
+
+
+def normalize_column(name):
+    # "Measles " -> "Measles", "thinness  1-19 years" -> "thinness 1-19 years"
+    return re.sub(r"\s+", " ", name).strip()
+
+
+def refresh_enabled():
+    # DATA_REFRESH: recarga incremental do CSV em uso (utils/refresh.py)
+    global _refresh
+    if _refresh is None:
+        _refresh = setting("DATA_REFRESH", False, flag)
+    return _refresh
+
+
+def shared_enabled():
+    # SHARED_DATASET: dados publicados uma vez e mapeados em memória por todos os processos (utils/shared.py)
+    global _shared
+    if _shared is None:
+        _shared = setting("SHARED_DATASET", False, flag)
+    return _shared
+
+
+def data_version(path=CSV_PATH):
+    if path == CSV_PATH and shared_enabled():
+        from utils.shared import current_version
+
+        return current_version()
+    if path == CSV_PATH and refresh_enabled():
+        from utils.refresh import load_live_dataset
+
+        return load_live_dataset().current().version
+    return file_version(path)
+
+
+def file_version(path=CSV_PATH):
+    # Hash do CSV e da tabela de códigos ISO, recalculado apenas quando mtime/tamanho mudam
+    files = (path, CODES_PATH)
+    key = tuple((str(f), os.stat(f).st_mtime_ns, os.stat(f).st_size) for f in files)
+    version = _version_memo.get(key)
+    if version is None:
+        digest = hashlib.sha256()
+        for f in files:
+            with open(f, "rb") as fh:
+                for chunk in iter(lambda: fh.read(1 << 20), b""):
+                    digest.update(chunk)
+        version = digest.hexdigest()[:16]
+        _version_memo.clear()
+        _version_memo[key] = version
+    return version
+
+
+def apply_schema(df):
+    df = df.rename(columns=normalize_column)
+    for column in df.columns:
+        if column in CATEGORICAL_COLUMNS:
+            df[column] = df[column].astype("category")
+        elif column == YEAR_COLUMN:
+            df[column] = df[column].astype("int16")
+        elif column in FLOAT64_COLUMNS:
+            df[column] = df[column].astype("float64")
+        else:
+            df[column] = df[column].astype("float32")
+    return df
+
+
+def parse_csv(path=CSV_PATH):
+    from utils.geo import resolve_iso3
+
+    df = apply_schema(pd.read_csv(path))
+    # Resolução única nome -> ISO-3, persistida junto com os dados no sidecar
+    mapping, _ = resolve_iso3(df["Country"].cat.categories)
+    df["ISO3"] = df["Country"].map(mapping).astype("category")
+    return df
+
+
+def sidecar_path(version, path=CSV_PATH):
+    return CACHE_DIR / f"{Path(path).stem}.{version}.parquet"
+
+
+def _write_sidecar(df, target):
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        for stale in target.parent.glob(f"{target.name.split('.')[0]}.*.parquet"):
+            stale.unlink(missing_ok=True)
+        tmp = target.with_suffix(f".{os.getpid()}.tmp")
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, target)
+    except (OSError, ImportError):
+        # Sem permissão de escrita ou sem pyarrow: segue só com o CSV
+        pass
+
+
+def read_table(version, path=CSV_PATH):
+    sidecar = sidecar_path(version, path)
+    if sidecar.exists():
+        try:
+            return apply_schema(pd.read_parquet(sidecar))
+        except (OSError, ImportError, ValueError):
+            pass
+    df = parse_csv(path)
+    _write_sidecar(df, sidecar)
+    return df
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _shared_frame(version):
+    # Um único DataFrame por processo, compartilhado entre sessões (somente leitura)
+    from utils.refresh import snapshot_for
+    from utils.shared import shared_for
+
+    shared = shared_for(version)
+    if shared is not None:
+        return shared.frame
+    snapshot = snapshot_for(version)
+    if snapshot is not None:
+        return snapshot.frame
+    return read_table(version)
+
+
+@timed("load")
+def load_data():
+    return _shared_frame(data_version())
+
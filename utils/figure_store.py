@@ -0,0 +1,143 @@
+"""Cache de figuras compartilhado entre páginas e sessões, guardadas como o JSON enviado ao navegador.
+
+A chave é (construtor, parâmetros, versão dos dados). Em um acerto, a figura não é montada nem
+serializada de novo: o JSON guardado vai direto para o elemento plotly_chart. Se as partes internas
+do Streamlit usadas para isso mudarem, a figura é remontada do JSON e passa pelo st.plotly_chart
+público (mais lento, mesmo resultado). A memória é limitada por FIGURE_CACHE_MAX_BYTES, com descarte LRU.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from utils.artifacts import MISSING, lookup, record
+from utils.config import setting
+from utils.data import data_version
+from utils.lazy import lazy_import
+from utils.metrics import stage
+
+pio = lazy_import("plotly.io")
+
+
+class FigureSpec:
+    # JSON pronto para o frontend e as dimensões do layout (usadas para width/height="content")
+    __slots__ = ("json", "width", "height", "size")
+
+    def __init__(self, spec, width=None, height=None):
+        self.json = spec
+        self.width = width
+        self.height = height
+        self.size = len(spec.encode("utf-8"))
+
+
+def serialize(fig):
+    # orjson quando disponível (engine "auto" do plotly), sem revalidar a figura
+    spec = pio.to_json(fig, validate=False)
+    return FigureSpec(spec, fig.layout.width, fig.layout.height)
+
+
+class FigureStore:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        with self._lock:
+            spec = self._entries.get(key)
+            if spec is None:
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return spec
+
+    def put(self, key, spec):
+        if spec.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous.size
+            self._entries[key] = spec
+            self.bytes += spec.size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.size
+                self.counters["evictions"] += 1
+
+    def get_or_build(self, key, build):
+        spec = self.get(key)
+        if spec is None:
+            # Figura gravada pelo aquecimento do deploy (utils/artifacts.py) antes de montar de novo
+            builder, params, version = key
+            spec = lookup(version, ("figure", builder, params))
+            if spec is MISSING:
+                with stage("figure"):
+                    fig = build()
+                with stage("serialize"):
+                    spec = serialize(fig)
+            self.put(key, spec)
+        record(key[2], ("figure",) + key[:2], spec)
+        return spec
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            counters.update(entries=len(self._entries), bytes=self.bytes, max_bytes=self.max_bytes)
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = counters["hits"] / lookups if lookups else 0.0
+        return counters
+
+
+@st.cache_resource(show_spinner=False)
+def load_figure_store():
+    return FigureStore(setting("FIGURE_CACHE_MAX_BYTES", 64 * 1024 * 1024, int))
+
+
+def figure_key(builder, params):
+    return builder, json.dumps(params, sort_keys=True, default=str), data_version()
+
+
+def _public_emit(spec, **kwargs):
+    # Caminho público: remonta a figura a partir do JSON e o st.plotly_chart serializa de novo
+    return st.plotly_chart(pio.from_json(spec.json, skip_invalid=True), **kwargs)
+
+
+def _emit(spec, width="stretch", height="content", theme="streamlit", config=None, key=None):
+    # Mesmo elemento do st.plotly_chart (sem seleção), mas com o JSON guardado: sem montar nem serializar.
+    # Usa partes internas do Streamlit; em outra versão (importação ou assinatura diferente) volta ao público.
+    try:
+        from streamlit.elements.lib.form_utils import current_form_id
+        from streamlit.elements.lib.layout_utils import LayoutConfig
+        from streamlit.elements.lib.utils import compute_and_register_element_id
+        from streamlit.elements.plotly_chart import _resolve_content_height, _resolve_content_width
+        from streamlit.proto.PlotlyChart_pb2 import PlotlyChart as PlotlyChartProto
+
+        dg = st._main._active_dg
+        proto = PlotlyChartProto()
+        proto.theme = theme or ""
+        proto.form_id = current_form_id(dg)
+        proto.spec = spec.json
+        proto.config = json.dumps(config or {})
+        layout = {"layout": {"width": spec.width, "height": spec.height}}
+        layout_config = LayoutConfig(width=_resolve_content_width(width, layout),
+                                     height=_resolve_content_height(height, layout))
+        element_id = compute_and_register_element_id(
+            "plotly_chart", user_key=key, key_as_main_identity=False, dg=dg,
+            plotly_spec=proto.spec, plotly_config=proto.config, selection_mode=("points", "box", "lasso"),
+            is_selection_activated=False, theme=theme, width=width, height=height, alt=None,
+        )
+    except (ImportError, AttributeError, TypeError, ValueError):
+        return _public_emit(spec, width=width, height=height, theme=theme, config=config, key=key)
+    proto.id = element_id
+    return dg._enqueue("plotly_chart", proto, layout_config=layout_config)
+
+
+def cached_chart(builder, params, build, **kwargs):
+    # build() só é chamado em uma falta; params precisa identificar tudo o que muda a figura
+    spec = load_figure_store().get_or_build(figure_key(builder, params), build)
+    return _emit(spec, **kwargs)
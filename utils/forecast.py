@@ -0,0 +1,222 @@
+"""Projeção por país com intervalos de predição: tendências em lote (NumPy) e modelos pesados opcionais.
+
+As tendências (linear ou quadrática no ano) de todos os países saem de uma única resolução das
+equações normais empilhadas sobre a matriz país x ano do cubo de agregados, com a máscara dos anos
+observados de cada país. O modelo de Holt amortecido (statsmodels) é ajustado país a país em um
+pool de processos e o resultado fica em disco, endereçado por dados e parâmetros.
+"""
+import hashlib
+import multiprocessing
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import streamlit as st
+
+from utils.artifacts import persisted
+from utils.cube import _aggregate_cube
+from utils.data import CACHE_DIR, _shared_frame, data_version
+from utils.lazy import lazy_import
+from utils.metrics import timed
+
+scipy_stats = lazy_import("scipy.stats")
+
+FORECAST_DIR = CACHE_DIR / "forecast"
+# Modelo -> grau do polinômio no ano (None = ajustado país a país)
+MODELS = {"linear": 1, "quadratic": 2, "holt": None}
+HORIZON = 5
+CONFIDENCE = 0.95
+# Observações mínimas por país para o modelo de Holt
+HOLT_MIN_OBS = 6
+# Um subdiretório por versão dos dados; ficam a atual e a anterior (outros processos podem estar lendo)
+KEEP_VERSIONS = 2
+VERSION_NAME = re.compile(r"^[0-9a-f]{16}$")
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+class Forecast:
+    # mean/lower/upper[país, ano projetado]; países sem observações suficientes ficam NaN
+    def __init__(self, countries, years, mean, lower, upper, n):
+        self.countries = list(countries)
+        self.years = [int(y) for y in years]
+        self.mean, self.lower, self.upper, self.n = mean, lower, upper, n
+        self._country_pos = {c: i for i, c in enumerate(self.countries)}
+        self._year_pos = {y: i for i, y in enumerate(self.years)}
+
+    def country(self, country):
+        i = self._country_pos[country]
+        return self.mean[i], self.lower[i], self.upper[i]
+
+    def year(self, year):
+        j = self._year_pos[int(year)]
+        return self.mean[:, j], self.lower[:, j], self.upper[:, j]
+
+
+def trend_forecast(Y, years, horizon=HORIZON, degree=1, confidence=CONFIDENCE):
+    # Y[país, ano] com NaN nos anos sem dado. Com M = máscara e X = [1, t, t², ...] (t centrado),
+    # X'X de cada país é einsum(M, X, X): todas as regressões resolvidas de uma vez.
+    Y = np.asarray(Y, dtype="float64")
+    years = np.asarray(years, dtype="float64")
+    M = ~np.isnan(Y)
+    center = years.mean()
+    powers = np.arange(degree + 1)
+    X = (years - center)[:, None] ** powers
+    future = years[-1] + np.arange(1, horizon + 1)
+    X0 = (future - center)[:, None] ** powers
+    p = degree + 1
+
+    Mf = M.astype("float64")
+    Z = np.where(M, Y, 0.0)
+    n = Mf.sum(axis=1)
+    XtX = np.einsum("ct,ti,tj->cij", Mf, X, X)
+    Xty = Z @ X
+
+    # Países com poucas observações (ou anos colineares) ficam NaN
+    valid = n > p
+    rank = np.linalg.matrix_rank(XtX[valid]) if valid.any() else np.array([], dtype=int)
+    solvable = np.flatnonzero(valid)[rank == p]
+    XtX_inv = np.full_like(XtX, np.nan)
+    XtX_inv[solvable] = np.linalg.inv(XtX[solvable])
+    beta = np.einsum("cij,cj->ci", XtX_inv, Xty)
+
+    # Resíduos calculados diretamente (mais estável que y'y - b'X'y para séries quase retas)
+    rss = (np.where(M, Y - beta @ X.T, 0.0) ** 2).sum(axis=1)
+    dof = n - p
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma2 = rss / dof
+    # Variância da predição: σ² (1 + x0' (X'X)⁻¹ x0) para cada país e ano projetado
+    leverage = np.einsum("hi,cij,hj->ch", X0, XtX_inv, X0)
+    mean = beta @ X0.T
+    se = np.sqrt(sigma2[:, None] * (1 + leverage))
+    q = scipy_stats.t.ppf((1 + confidence) / 2, np.where(dof > 0, dof, np.nan))[:, None]
+    return future.astype(int), mean, mean - q * se, mean + q * se, n.astype("int32")
+
+
+def _holt_batch(series, steps, confidence):
+    # Executado em um processo separado: um lote de países, statsmodels importado uma vez por processo
+    import warnings
+
+    import pandas as pd
+    from statsmodels.tsa.exponential_smoothing.ets import ETSModel
+
+    out = np.full((len(series), 3, steps), np.nan)
+    for i, (values, offset) in enumerate(series):
+        if len(values) < HOLT_MIN_OBS:
+            continue
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                # Series (não ndarray): a predição do ETS usa o índice para rotular as linhas
+                fit = ETSModel(pd.Series(values), error="add", trend="add", damped_trend=True).fit(disp=False)
+                frame = fit.get_prediction(start=len(values), end=len(values) + offset + steps - 1) \
+                    .summary_frame(alpha=1 - confidence)
+        except (ValueError, np.linalg.LinAlgError):
+            continue
+        # offset: anos entre a última observação do país e o último ano do conjunto
+        out[i] = frame[["mean", "pi_lower", "pi_upper"]].to_numpy()[offset:].T
+    return out
+
+
+def holt_forecast(Y, years, horizon=HORIZON, confidence=CONFIDENCE, max_workers=None):
+    # Holt com tendência amortecida sobre os anos observados de cada país (lacunas internas ignoradas)
+    Y = np.asarray(Y, dtype="float64")
+    M = ~np.isnan(Y)
+    last = np.where(M.any(axis=1), Y.shape[1] - 1 - np.argmax(M[:, ::-1], axis=1), 0)
+    series = [(Y[c, M[c]], int(Y.shape[1] - 1 - last[c])) for c in range(len(Y))]
+    workers = max_workers or os.cpu_count() or 1
+    size = -(-len(series) // workers) or 1
+    # spawn: fork dentro do servidor do Streamlit (com várias threads) pode travar o processo filho
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(_holt_batch, series[start:start + size], horizon, confidence)
+                   for start in range(0, len(series), size)]
+        out = np.concatenate([future.result() for future in futures]) if futures else np.empty((0, 3, horizon))
+    future_years = int(years[-1]) + np.arange(1, horizon + 1)
+    return future_years, out[:, 0], out[:, 1], out[:, 2], M.sum(axis=1).astype("int32")
+
+
+def forecast_key(metric, model, horizon, confidence, version=None):
+    version = version or data_version()
+    raw = f"{metric}|{model}|{horizon}|{confidence}|{version}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def _disk_forecast(version, key, compute):
+    # Mesmo esquema dos timelapses: arquivo por conteúdo, uma única execução por chave e escrita atômica
+    path = FORECAST_DIR / version / f"{key}.npz"
+    if path.exists():
+        with np.load(path) as stored:
+            return tuple(stored[name] for name in ("years", "mean", "lower", "upper", "n"))
+    with _locks_guard:
+        lock = _locks.setdefault(key, threading.Lock())
+    with lock:
+        if path.exists():
+            return _disk_forecast(version, key, compute)
+        result = compute()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp.npz")
+            np.savez(tmp, **dict(zip(("years", "mean", "lower", "upper", "n"), result)))
+            os.replace(tmp, path)
+            _prune(version)
+        except OSError:
+            pass
+        return result
+
+
+def _prune(current):
+    # Só diretórios com nome de versão: o que mais estiver em FORECAST_DIR não é tocado
+    versions = sorted((p for p in FORECAST_DIR.iterdir() if p.is_dir() and VERSION_NAME.match(p.name)),
+                      key=lambda p: p.stat().st_mtime, reverse=True)
+    for stale in [p for p in versions if p.name != current][KEEP_VERSIONS - 1:]:
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def country_iso3(df):
+    # País -> ISO-3 (resolvido na carga dos dados); países sem código não aparecem no mapa
+    pairs = df[["Country", "ISO3"]].drop_duplicates("Country").dropna()
+    return dict(zip(pairs["Country"].astype(str), pairs["ISO3"].astype(str)))
+
+
+def forecast_payload(forecast, iso3, year):
+    # Mesmo formato de geo.choropleth_payload, com os valores projetados do ano
+    mean, _, _ = forecast.year(year)
+    countries = [c for c, value in zip(forecast.countries, mean) if c in iso3 and not np.isnan(value)]
+    pos = [forecast._country_pos[c] for c in countries]
+    return {
+        "locations": np.array([iso3[c] for c in countries]),
+        "z": mean[pos].astype("float32"),
+        "text": np.array(countries),
+    }
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+@persisted
+def _forecast(version, metric, model, horizon, confidence):
+    cube = _aggregate_cube(version)
+    Y = cube.values[cube.metric_index(metric)]
+    if MODELS[model] is None:
+        key = forecast_key(metric, model, horizon, confidence, version)
+        result = _disk_forecast(version, key, lambda: holt_forecast(Y, cube.years, horizon, confidence))
+    else:
+        result = trend_forecast(Y, cube.years, horizon, MODELS[model], confidence)
+    return Forecast(cube.countries, *result)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _country_iso3(version):
+    return country_iso3(_shared_frame(version))
+
+
+@timed("stats")
+def load_forecast(metric="Life expectancy", model="linear", horizon=HORIZON, confidence=CONFIDENCE):
+    return _forecast(data_version(), metric, model, int(horizon), float(confidence))
+
+
+@timed("filter")
+def load_forecast_payload(forecast, year):
+    return forecast_payload(forecast, _country_iso3(data_version()), year)
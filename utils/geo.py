@@ -0,0 +1,90 @@
+"""Resolução de nomes de países para ISO-3 e payloads mínimos dos mapas."""
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.artifacts import persisted
+from utils.data import CODES_PATH, _shared_frame, data_version
+from utils.metrics import timed
+from utils.query import _query_backend, backend_settings
+
+
+def normalize_name(name):
+    # "Côte d'Ivoire" -> "cote d ivoire"
+    ascii_name = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", " ", ascii_name.lower()).strip()
+
+
+def load_reference(path=CODES_PATH):
+    codes = pd.read_csv(path, dtype=str)
+    return {normalize_name(name): iso3 for name, iso3 in zip(codes["Name"], codes["ISO3"])}
+
+
+def resolve_iso3(countries, reference=None):
+    # Resolvido uma vez no carregamento; devolve o mapeamento e os nomes sem correspondência
+    reference = reference if reference is not None else load_reference()
+    mapping = {}
+    unmatched = []
+    for country in countries:
+        iso3 = reference.get(normalize_name(country))
+        if iso3 is None:
+            unmatched.append(country)
+        else:
+            mapping[country] = iso3
+    return mapping, unmatched
+
+
+def unmatched_countries(df):
+    return sorted(df.loc[df["ISO3"].isna(), "Country"].astype(str).unique())
+
+
+def choropleth_payload(frame, metric):
+    # Só o necessário para o mapa: códigos ISO-3, valores (float32) e nomes para o hover
+    return {
+        "locations": frame["ISO3"].astype(str).to_numpy(),
+        "z": frame[metric].to_numpy(dtype="float32"),
+        "text": frame["Country"].astype(str).to_numpy(),
+    }
+
+
+@st.cache_resource(show_spinner=False, max_entries=1024)
+@persisted
+def _choropleth_payload(version, backend, metric, year):
+    # O dropna vira filtro do backend: só as linhas desenhadas são materializadas
+    frame = _query_backend(version, *backend).select(
+        ["ISO3", "Country", metric], [("Year", "==", year), ("ISO3", "notnull"), (metric, "notnull")])
+    return choropleth_payload(frame, metric)
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+@persisted
+def _metric_range(version, backend, metric):
+    low, high = np.inf, -np.inf
+    for batch in _query_backend(version, *backend).scan([metric], [(metric, "notnull")]):
+        values = batch[metric].to_numpy()
+        low, high = min(low, values.min()), max(high, values.max())
+    return float(low), float(high)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+@persisted
+def _unmatched_countries(version):
+    return unmatched_countries(_shared_frame(version))
+
+
+@timed("filter")
+def load_unmatched_countries():
+    return _unmatched_countries(data_version())
+
+
+@timed("filter")
+def load_choropleth_payload(metric, year):
+    return _choropleth_payload(data_version(), backend_settings(), metric, int(year))
+
+
+@timed("stats")
+def load_metric_range(metric):
+    return _metric_range(data_version(), backend_settings(), metric)
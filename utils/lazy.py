@@ -0,0 +1,29 @@
+"""Importação sob demanda de dependências pesadas (scipy, statsmodels, openai, imageio...)."""
+import importlib
+import threading
+
+
+class LazyModule:
+    # Substituto do módulo: a importação real só acontece no primeiro acesso a um atributo
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "carregado" if self._module is not None else "não carregado"
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
@@ -0,0 +1,58 @@
+"""Cliente LLM compartilhado com respostas em streaming, timeout e retentativas."""
+import time
+
+import streamlit as st
+
+from utils.config import setting
+from utils.lazy import lazy_import
+
+openai = lazy_import("openai")
+
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+DEFAULT_MODEL = "deepseek/deepseek-chat-v3-0324:free"
+
+
+def llm_settings():
+    return {
+        "api_key": setting("OPENROUTER_API_KEY"),
+        "base_url": setting("OPENROUTER_BASE_URL", DEFAULT_BASE_URL),
+        "model": setting("LLM_MODEL", DEFAULT_MODEL),
+        "timeout": setting("LLM_TIMEOUT", 30.0, float),
+        "max_retries": setting("LLM_MAX_RETRIES", 2, int),
+        "backoff": setting("LLM_BACKOFF", 0.5, float),
+    }
+
+
+@st.cache_resource(show_spinner=False)
+def get_client(api_key, base_url, timeout):
+    # Um único cliente (e pool de conexões HTTP) por processo; as retentativas são feitas em stream_answer
+    return openai.OpenAI(base_url=base_url, api_key=api_key, timeout=timeout, max_retries=0)
+
+
+def _is_retryable(error):
+    return isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError))
+
+
+def stream_answer(question, settings=None):
+    # Gera os trechos da resposta à medida que chegam; só repete a chamada se nada foi entregue ainda
+    settings = settings or llm_settings()
+    client = get_client(settings["api_key"], settings["base_url"], settings["timeout"])
+    attempt = 0
+    while True:
+        delivered = False
+        try:
+            stream = client.chat.completions.create(
+                model=settings["model"],
+                messages=[{"role": "user", "content": question}],
+                stream=True,
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    delivered = True
+                    yield chunk.choices[0].delta.content
+            return
+        except Exception as e:
+            if delivered or attempt >= settings["max_retries"] or not _is_retryable(e):
+                raise
+            time.sleep(settings["backoff"] * 2 ** attempt)
+            attempt += 1
@@ -0,0 +1,88 @@
+"""Resumos com nível de detalhe para dispersões e histogramas grandes.
+
+Até LOD_POINT_THRESHOLD pontos a dispersão vai inteira para o navegador (desenhada com WebGL);
+acima disso vira uma grade 2-D de contagens. Histogramas vão como contagens por faixa e quartis do
+box plot, então o payload não cresce com o número de linhas.
+"""
+import numpy as np
+import streamlit as st
+
+from utils.artifacts import persisted
+from utils.config import setting
+from utils.data import _shared_frame, data_version
+from utils.metrics import timed
+from utils.partitions import _partition_index
+
+DENSITY_BINS = 50
+
+
+def point_threshold():
+    return setting("LOD_POINT_THRESHOLD", 5000, int)
+
+
+def _linear_fit(x, y):
+    # Reta de MQO em forma fechada (substitui o trendline="ols" refeito a cada renderização)
+    if len(x) < 2 or np.ptp(x) == 0:
+        return None
+    x_mean, y_mean = x.mean(), y.mean()
+    slope = np.dot(x - x_mean, y - y_mean) / np.dot(x - x_mean, x - x_mean)
+    return float(y_mean - slope * x_mean), float(slope)
+
+
+def scatter_summary(x, y, threshold=5000, bins=DENSITY_BINS):
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[valid], y[valid]
+    summary = {"n": len(x), "fit": _linear_fit(x, y),
+               "x_range": (float(x.min()), float(x.max())) if len(x) else (np.nan, np.nan)}
+    if len(x) <= threshold:
+        summary.update(mode="points", x=x.astype("float32"), y=y.astype("float32"))
+        return summary
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    counts = counts.T.astype("float32")
+    counts[counts == 0] = np.nan
+    summary.update(mode="density", x=(x_edges[:-1] + x_edges[1:]) / 2, y=(y_edges[:-1] + y_edges[1:]) / 2,
+                   counts=counts)
+    return summary
+
+
+def histogram_summary(values, nbins=30):
+    values = np.asarray(values, dtype="float64")
+    values = values[~np.isnan(values)]
+    counts, edges = np.histogram(values, bins=nbins)
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    # Bigodes no ponto mais extremo dentro de 1,5 IQR, como no box plot do plotly
+    lower = values[values >= q1 - 1.5 * iqr].min()
+    upper = values[values <= q3 + 1.5 * iqr].max()
+    return {
+        "n": len(values),
+        "counts": counts,
+        "edges": edges,
+        "box": {"q1": q1, "median": median, "q3": q3, "lowerfence": lower, "upperfence": upper,
+                "mean": values.mean()},
+    }
+
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+@persisted
+def _scatter_summary(version, x, y, year, threshold):
+    frame = _shared_frame(version) if year is None else _partition_index(version).year(year)
+    return scatter_summary(frame[x].to_numpy(), frame[y].to_numpy(), threshold)
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+@persisted
+def _histogram_summary(version, column, nbins):
+    return histogram_summary(_shared_frame(version)[column].to_numpy(), nbins)
+
+
+@timed("stats")
+def load_scatter_summary(x, y, year=None):
+    return _scatter_summary(data_version(), x, y, None if year is None else int(year), point_threshold())
+
+
+@timed("stats")
+def load_histogram_summary(column, nbins=30):
+    return _histogram_summary(data_version(), column, nbins)
@@ -0,0 +1,248 @@
+"""Instrumentação por rerun: tempos por etapa, histograma por processo, logs JSON e arquivo Prometheus.
+
+Desligada por padrão (PERF_METRICS). Desligada, `stage` devolve um contexto nulo compartilhado e
+`timed` chama a função diretamente, então o custo é uma checagem de booleano.
+"""
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+
+import streamlit as st
+
+from utils.config import flag, setting
+
+# Limites dos buckets do histograma (segundos), no estilo Prometheus
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROLLING_SAMPLES = 500
+DEFAULT_PROM_FILE = Path(__file__).resolve().parent.parent / ".cache" / "metrics.prom"
+EXPORT_INTERVAL = 1.0
+
+logger = logging.getLogger("lifeexpectancy.metrics")
+
+_NULL = contextlib.nullcontext()
+_enabled = None
+_local = threading.local()
+_lock = threading.Lock()
+_recent = defaultdict(lambda: deque(maxlen=ROLLING_SAMPLES))
+_histograms = {}
+_last_export = 0.0
+_export_lock = threading.Lock()
+
+
+def enabled():
+    global _enabled
+    if _enabled is None:
+        _enabled = setting("PERF_METRICS", False, flag)
+        if _enabled and not logger.handlers:
+            log_file = setting("PERF_LOG_FILE")
+            handler = logging.FileHandler(log_file, encoding="utf-8") if log_file else logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+    return _enabled
+
+
+def prometheus_path():
+    return setting("PERF_PROM_FILE", str(DEFAULT_PROM_FILE))
+
+
+class _Stage:
+    # Registra o tempo próprio da etapa (descontando etapas aninhadas), para que a soma feche com o total
+
+    __slots__ = ("name", "start", "children")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.children = 0.0
+        _stack().append(self)
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stack = _stack()
+        stack.pop()
+        if stack:
+            stack[-1].children += elapsed
+        _current().append((self.name, elapsed - self.children))
+        return False
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def _current():
+    if not hasattr(_local, "stages"):
+        _local.stages = []
+    return _local.stages
+
+
+def stage(name):
+    return _Stage(name) if enabled() else _NULL
+
+
+def timed(name):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled():
+                return func(*args, **kwargs)
+            with _Stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def plotly_chart(fig, **kwargs):
+    # st.plotly_chart serializa a figura para JSON; é essa a etapa medida
+    with stage("serialize"):
+        return st.plotly_chart(fig, **kwargs)
+
+
+def begin_rerun(page):
+    if not enabled():
+        return
+    _local.page = page
+    _local.started = time.perf_counter()
+    _local.stages = []
+    _local.stack = []
+
+
+def _observe(page, name, seconds):
+    key = (page, name)
+    histogram = _histograms.get(key)
+    if histogram is None:
+        histogram = _histograms[key] = {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+    for i, bound in enumerate(BUCKETS):
+        if seconds <= bound:
+            histogram["buckets"][i] += 1
+    histogram["sum"] += seconds
+    histogram["count"] += 1
+    _recent[name].append(seconds)
+
+
+def rerun_stages():
+    # Tempo próprio por etapa no rerun atual, agregando chamadas repetidas
+    totals = defaultdict(float)
+    for name, seconds in _current():
+        totals[name] += seconds
+    return dict(totals)
+
+
+def finish_rerun(debug_panel=True):
+    if not enabled() or not hasattr(_local, "started"):
+        return
+    page = _local.page
+    total = time.perf_counter() - _local.started
+    stages = rerun_stages()
+    stages["other"] = max(total - sum(stages.values()), 0.0)
+    with _lock:
+        for name, seconds in stages.items():
+            _observe(page, name, seconds)
+        _observe(page, "total", total)
+    logger.info(json.dumps({"event": "rerun", "ts": time.time(), "page": page, "total_s": round(total, 6),
+                            "stages": {name: round(seconds, 6) for name, seconds in stages.items()}}))
+    _export_prometheus()
+    del _local.started
+    if debug_panel and debug_enabled():
+        _render_panel(total, stages)
+
+
+def stop_rerun():
+    # Substitui st.stop() nas páginas: o rerun interrompido também é registrado
+    finish_rerun()
+    st.stop()
+
+
+def debug_enabled():
+    # Informações do operador (painel de desempenho, uso das sessões): PERF_DEBUG=1 ou ?debug=1
+    return setting("PERF_DEBUG", False, flag) or flag(st.query_params.get("debug", "0"))
+
+
+def rolling_summary():
+    with _lock:
+        samples = {name: sorted(values) for name, values in _recent.items()}
+    rows = []
+    for name, values in sorted(samples.items()):
+        rows.append({"etapa": name, "n": len(values),
+                     "p50 (ms)": values[len(values) // 2] * 1000,
+                     "p95 (ms)": values[min(int(len(values) * 0.95), len(values) - 1)] * 1000,
+                     "máx (ms)": values[-1] * 1000})
+    return rows
+
+
+def _render_panel(total, stages):
+    with st.sidebar.expander("⏱️ Desempenho do rerun", expanded=True):
+        st.caption(f"Total: {total * 1000:.1f} ms")
+        st.dataframe([{"etapa": name, "ms": seconds * 1000}
+                      for name, seconds in sorted(stages.items(), key=lambda item: -item[1])],
+                     hide_index=True)
+        st.caption(f"Últimos {ROLLING_SAMPLES} reruns (processo)")
+        st.dataframe(rolling_summary(), hide_index=True)
+        st.caption("Cache de figuras")
+        st.json(_figure_cache_stats(), expanded=False)
+
+
+def _figure_cache_stats():
+    # Importação local: utils.figure_store depende deste módulo
+    from utils.figure_store import load_figure_store
+
+    return load_figure_store().stats()
+
+
+def prometheus_text():
+    lines = ["# HELP dashboard_stage_seconds Tempo próprio de cada etapa por rerun.",
+             "# TYPE dashboard_stage_seconds histogram"]
+    with _lock:
+        items = sorted((key, dict(value, buckets=list(value["buckets"]))) for key, value in _histograms.items())
+    for (page, name), histogram in items:
+        labels = f'page="{page}",stage="{name}"'
+        for bound, count in zip(BUCKETS, histogram["buckets"]):
+            lines.append(f'dashboard_stage_seconds_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'dashboard_stage_seconds_bucket{{{labels},le="+Inf"}} {histogram["count"]}')
+        lines.append(f"dashboard_stage_seconds_sum{{{labels}}} {histogram['sum']:.6f}")
+        lines.append(f"dashboard_stage_seconds_count{{{labels}}} {histogram['count']}")
+    figures = _figure_cache_stats()
+    lines += ["# HELP dashboard_figure_cache_lookups_total Consultas ao cache de figuras por resultado.",
+              "# TYPE dashboard_figure_cache_lookups_total counter",
+              f'dashboard_figure_cache_lookups_total{{result="hit"}} {figures["hits"]}',
+              f'dashboard_figure_cache_lookups_total{{result="miss"}} {figures["misses"]}',
+              "# HELP dashboard_figure_cache_bytes Bytes de JSON guardados no cache de figuras.",
+              "# TYPE dashboard_figure_cache_bytes gauge",
+              f"dashboard_figure_cache_bytes {figures['bytes']}"]
+    return "\n".join(lines) + "\n"
+
+
+def _export_prometheus():
+    # Arquivo no formato texto do Prometheus (ex.: textfile collector do node_exporter), no máximo 1x/s
+    global _last_export
+    # Uma exportação por vez no processo; sessões que chegam durante uma exportação seguem sem esperar
+    if not _export_lock.acquire(blocking=False):
+        return
+    try:
+        now = time.monotonic()
+        if now - _last_export < EXPORT_INTERVAL:
+            return
+        _last_export = now
+        target = prometheus_path()
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(prometheus_text())
+        os.replace(tmp, target)
+    except OSError:
+        pass
+    finally:
+        _export_lock.release()
@@ -0,0 +1,110 @@
+"""Índice de partições por ano e por país sobre o DataFrame compartilhado."""
+import copy
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data import _shared_frame, data_version
+from utils.metrics import timed
+
+
+class _Slices(Mapping):
+    # valor -> (frame ordenado, início, fim); a fatia só é criada (e guardada) na primeira consulta
+    def __init__(self, bounds):
+        self._bounds = bounds
+        self._cache = {}
+
+    def __getitem__(self, key):
+        part = self._cache.get(key)
+        if part is None:
+            ordered, start, stop = self._bounds[key]
+            part = self._cache[key] = ordered.iloc[start:stop]
+        return part
+
+    def __iter__(self):
+        return iter(self._bounds)
+
+    def __len__(self):
+        return len(self._bounds)
+
+
+class PartitionIndex:
+    # Cada partição é uma fatia contígua (iloc) de uma cópia ordenada do frame,
+    # então a busca por ano/país vira uma consulta a dicionário em vez de uma máscara booleana.
+
+    def __init__(self, df):
+        self._empty = df.iloc[0:0]
+        self._by_year = self._split(df, "Year", "Country")
+        self._by_country = self._split(df, "Country", "Year")
+        self.years = sorted(self._by_year)
+        self.countries = sorted(self._by_country)
+
+    @classmethod
+    def from_sorted(cls, by_year, by_country):
+        # Frames já ordenados por (Year, Country) e (Country, Year): as partições são fatias, sem cópia
+        index = cls.__new__(cls)
+        index._empty = by_year.iloc[0:0]
+        index._by_year = cls._split(by_year, "Year", "Country", presorted=True)
+        index._by_country = cls._split(by_country, "Country", "Year", presorted=True)
+        index.years = sorted(index._by_year)
+        index.countries = sorted(index._by_country)
+        return index
+
+    @staticmethod
+    def _split(df, key, order, presorted=False):
+        ordered = df if presorted else df.sort_values([key, order], kind="stable").reset_index(drop=True)
+        column = ordered[key]
+        # Categorias: fronteiras pelos códigos inteiros, sem converter a coluna em objetos str
+        categorical = isinstance(column.dtype, pd.CategoricalDtype)
+        values = column.cat.codes.to_numpy() if categorical else column.to_numpy()
+        bounds = np.concatenate(([0], np.flatnonzero(values[1:] != values[:-1]) + 1, [len(values)]))
+        labels = column.cat.categories if categorical else None
+        return _Slices({
+            labels[values[start]] if categorical else values[start].item(): (ordered, start, stop)
+            for start, stop in zip(bounds[:-1], bounds[1:])
+            if stop > start
+        })
+
+    def replace(self, df, years, countries):
+        # Nova versão do índice sobre df: só as partições dos anos/países tocados são refeitas,
+        # as demais fatias são reaproveitadas
+        index = copy.copy(self)
+        index._by_year = self._replace(self._by_year, df, "Year", "Country", {int(y) for y in years})
+        index._by_country = self._replace(self._by_country, df, "Country", "Year", set(countries))
+        index.years = sorted(index._by_year)
+        index.countries = sorted(index._by_country)
+        return index
+
+    @classmethod
+    def _replace(cls, partitions, df, key, order, touched):
+        bounds = {value: bound for value, bound in partitions._bounds.items() if value not in touched}
+        if touched:
+            bounds.update(cls._split(df[df[key].isin(touched)], key, order)._bounds)
+        return _Slices(bounds)
+
+    def year(self, year):
+        return self._by_year.get(int(year), self._empty)
+
+    def country(self, country):
+        return self._by_country.get(country, self._empty)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _partition_index(version):
+    from utils.refresh import snapshot_for
+    from utils.shared import shared_for
+
+    shared = shared_for(version)
+    if shared is not None:
+        return shared.partitions
+    snapshot = snapshot_for(version)
+    if snapshot is not None:
+        return snapshot.partitions
+    return PartitionIndex(_shared_frame(version))
+
+
+@timed("load")
+def load_partitions():
+    return _partition_index(data_version())
@@ -0,0 +1,194 @@
+"""Backends de consulta: as mesmas consultas sobre o DataFrame em memória ou sobre Parquet particionado.
+
+Os filtros seguem a convenção de `pandas.read_parquet(filters=...)`: tuplas (coluna, operador, valor)
+combinadas com E. Com o backend "arrow" filtros, projeções e agregações são empurrados para o
+pyarrow.dataset, e só as linhas pedidas chegam ao pandas.
+"""
+import operator
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import streamlit as st
+
+from utils.config import setting
+from utils.data import CACHE_DIR, _shared_frame, data_version
+from utils.lazy import lazy_import
+from utils.metrics import timed
+from utils.partitions import _partition_index
+
+pa = lazy_import("pyarrow")
+pc = lazy_import("pyarrow.compute")
+ds = lazy_import("pyarrow.dataset")
+
+DATASET_DIR = CACHE_DIR / "dataset"
+# Versões do dataset mantidas no disco: a atual e a anterior
+KEEP_VERSIONS = 2
+BATCH_SIZE = 65_536
+BACKENDS = ("pandas", "arrow")
+
+_COMPARISONS = {
+    "==": operator.eq, "!=": operator.ne, "<": operator.lt,
+    "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+}
+
+
+def _normalize_filters(filters):
+    # ("coluna", "notnull") dispensa o valor; os demais operadores exigem (coluna, operador, valor)
+    normalized = []
+    for item in filters:
+        column, op, value = item if len(item) == 3 else (*item, None)
+        if op not in _COMPARISONS and op not in ("in", "notnull"):
+            raise ValueError(f"Operador de filtro não suportado: {op!r} (coluna {column!r})")
+        normalized.append((column, op, value))
+    return normalized
+
+
+class PandasBackend:
+    # Filtros por ano usam as partições já ordenadas; os demais viram máscaras booleanas
+
+    name = "pandas"
+
+    def __init__(self, df, partitions=None):
+        self._df = df
+        self._partitions = partitions
+
+    def _filtered(self, columns, filters):
+        filters = _normalize_filters(filters)
+        frame = self._df
+        if self._partitions is not None:
+            year = next((value for column, op, value in filters if column == "Year" and op == "=="), None)
+            if year is not None:
+                frame = self._partitions.year(year)
+        mask = np.ones(len(frame), dtype=bool)
+        for column, op, value in filters:
+            values = frame[column]
+            if op == "notnull":
+                mask &= values.notna().to_numpy()
+            elif op == "in":
+                mask &= values.isin(value).to_numpy()
+            else:
+                mask &= _COMPARISONS[op](values, value).fillna(False).to_numpy(dtype=bool)
+        return frame.loc[mask, list(columns)] if not mask.all() else frame[list(columns)]
+
+    def scan(self, columns, filters=(), batch_size=BATCH_SIZE):
+        result = self._filtered(columns, filters)
+        for start in range(0, len(result), batch_size):
+            yield result.iloc[start:start + batch_size]
+
+    @timed("filter")
+    def select(self, columns, filters=()):
+        return self._filtered(columns, filters).reset_index(drop=True)
+
+    @timed("filter")
+    def aggregate(self, by, metrics, func="mean", filters=()):
+        data = self._filtered([by] + list(metrics), filters)
+        return data.groupby(by, as_index=False, observed=True).agg(func)
+
+
+class ArrowBackend:
+    # Parquet particionado por ano (hive: Year=2015/...); só as partições e colunas pedidas são lidas
+
+    name = "arrow"
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self._dataset = ds.dataset(self.root, format="parquet", partitioning=_year_partitioning())
+
+    @staticmethod
+    def _expression(filters):
+        expression = None
+        for column, op, value in _normalize_filters(filters):
+            field = pc.field(column)
+            if op == "notnull":
+                # Table.from_pandas grava NaN como nulo, então basta checar a validade
+                term = field.is_valid()
+            elif op == "in":
+                term = field.isin(list(value))
+            else:
+                term = _COMPARISONS[op](field, value)
+            expression = term if expression is None else expression & term
+        return expression
+
+    def _scanner(self, columns, filters, batch_size=BATCH_SIZE):
+        return self._dataset.scanner(columns=list(columns), filter=self._expression(filters),
+                                     batch_size=batch_size)
+
+    def scan(self, columns, filters=(), batch_size=BATCH_SIZE):
+        for batch in self._scanner(columns, filters, batch_size).to_batches():
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+    @timed("filter")
+    def select(self, columns, filters=()):
+        return self._scanner(columns, filters).to_table().to_pandas()
+
+    @timed("filter")
+    def aggregate(self, by, metrics, func="mean", filters=()):
+        table = self._scanner([by] + list(metrics), filters).to_table()
+        grouped = table.group_by(by).aggregate([(metric, func) for metric in metrics])
+        grouped = grouped.rename_columns([name if name == by else name.removesuffix(f"_{func}")
+                                          for name in grouped.column_names])
+        return grouped.select([by] + list(metrics)).to_pandas().sort_values(by, ignore_index=True)
+
+
+def _year_partitioning():
+    return ds.partitioning(pa.schema([("Year", pa.int16())]), flavor="hive")
+
+
+def write_dataset(df, target):
+    # Gravação atômica: escreve em um diretório temporário e renomeia
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    ds.write_dataset(table, tmp, format="parquet", partitioning=_year_partitioning(),
+                     existing_data_behavior="overwrite_or_ignore")
+    try:
+        os.replace(tmp, target)
+    except OSError:
+        # Outro processo publicou a mesma versão primeiro
+        shutil.rmtree(tmp, ignore_errors=True)
+    return target
+
+
+def dataset_path(version):
+    return DATASET_DIR / version
+
+
+def _materialize_dataset(version):
+    target = dataset_path(version)
+    if not target.exists():
+        DATASET_DIR.mkdir(parents=True, exist_ok=True)
+        write_dataset(_shared_frame(version), target)
+        _prune_datasets(version)
+    return target
+
+
+def _prune_datasets(current):
+    # Mantém a versão atual e a anterior, como em utils/shared.py: outros processos podem ainda estar
+    # lendo a anterior; diretórios temporários de gravações em andamento não são tocados
+    versions = sorted((p for p in DATASET_DIR.iterdir() if p.is_dir() and not p.name.endswith(".tmp")),
+                      key=lambda p: p.stat().st_mtime, reverse=True)
+    for stale in [p for p in versions if p.name != current][KEEP_VERSIONS - 1:]:
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _query_backend(version, kind, root=None):
+    if kind == "arrow":
+        return ArrowBackend(root or _materialize_dataset(version))
+    if kind != "pandas":
+        raise ValueError(f"QUERY_BACKEND desconhecido: {kind!r} (use {', '.join(BACKENDS)})")
+    return PandasBackend(_shared_frame(version), _partition_index(version))
+
+
+def backend_settings():
+    # QUERY_DATASET aponta para um dataset particionado externo (ex.: painel maior que o CSV)
+    return setting("QUERY_BACKEND", "pandas"), setting("QUERY_DATASET")
+
+
+@timed("load")
+def load_query_backend():
+    kind, root = backend_settings()
+    return _query_backend(data_version(), kind, root)
@@ -0,0 +1,41 @@
+"""Tabelas de maiores e menores expectativas de vida exibidas na página de análise."""
+import pandas as pd
+import streamlit as st
+
+from utils.artifacts import persisted
+from utils.data import data_version
+from utils.metrics import timed
+from utils.query import _query_backend, backend_settings
+
+
+@timed("filter")
+def process_data(backend, year=2015):
+    # Filtro por ano e médias por país são executados pelo backend de consulta
+    grouped_df = backend.aggregate('Country', ['Life expectancy', 'Adult Mortality', 'infant deaths', 'Population'],
+                                   filters=[('Year', '==', year)])
+    top_long_life = grouped_df.nlargest(10, 'Life expectancy')
+    bottom_long_life = grouped_df.nsmallest(10, 'Life expectancy')
+    final_df = pd.concat([top_long_life, bottom_long_life]).reset_index(drop=True)
+    return final_df
+
+
+@timed("filter")
+def get_top_bottom_life_expectancy(backend, year=2015):
+    grouped = backend.aggregate('Country', ['Life expectancy', 'Hepatitis B', 'Polio', 'Diphtheria'],
+                                filters=[('Year', '==', year)])
+    top5 = grouped.nlargest(5, 'Life expectancy').reset_index(drop=True)
+    bottom5 = grouped.nsmallest(5, 'Life expectancy').reset_index(drop=True)
+    return top5, bottom5
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+@persisted
+def _rankings(version, backend, year):
+    query = _query_backend(version, *backend)
+    return process_data(query, year), get_top_bottom_life_expectancy(query, year)
+
+
+@timed("filter")
+def load_rankings(year=2015):
+    # (tabela top/bottom 10, (top 5, bottom 5) com vacinação) do ano, em cache por versão dos dados
+    return _rankings(data_version(), backend_settings(), int(year))
@@ -0,0 +1,249 @@
+"""Recarga incremental do CSV em uso (DATA_REFRESH=1).
+
+Um observador consulta mtime/tamanho do arquivo a cada REFRESH_INTERVAL segundos. Se o arquivo só
+cresceu (o conteúdo anterior continua idêntico), apenas as linhas novas são lidas; senão o CSV é
+relido e comparado linha a linha por hash. Em ambos os casos só o delta (linhas novas, alteradas ou
+removidas, por país e ano) atualiza partições, primeiro/último ano por país, momentos por grupo e as
+estatísticas suficientes das regressões, e a nova versão substitui a anterior de uma vez.
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+from utils.config import setting
+from utils.data import (CATEGORICAL_COLUMNS, CODES_PATH, CSV_PATH, parse_csv, read_table,
+                        refresh_enabled)
+from utils.partitions import PartitionIndex
+from utils.regression import SufficientStats
+from utils.stats import country_bounds, group_moments
+
+KEY_COLUMNS = ["Country", "Year"]
+GROUP_KEYS = ["Status"]
+MOMENT_COLUMNS = ["Life expectancy"]
+
+logger = logging.getLogger("lifeexpectancy.refresh")
+
+
+def row_keys(df):
+    return pd.MultiIndex.from_arrays([df["Country"].astype(str), df["Year"].astype("int64")], names=KEY_COLUMNS)
+
+
+def row_hashes(df):
+    # Hash de cada linha pelos valores do CSV (ISO3 é derivado do nome do país), indexado por país/ano
+    columns = [c for c in df.columns if c != "ISO3"]
+    hashes = pd.Series(pd.util.hash_pandas_object(df[columns], index=False).to_numpy(), index=row_keys(df))
+    # Chave repetida no arquivo: vale a última ocorrência
+    return hashes[~hashes.index.duplicated(keep="last")]
+
+
+def _unify_categories(frame, rows):
+    # Mesmo dtype categórico nos dois lados para o concat não cair para object
+    changed = False
+    for column in CATEGORICAL_COLUMNS:
+        if column not in frame:
+            continue
+        categories = frame[column].cat.categories.union(rows[column].cat.categories)
+        if len(categories) != len(frame[column].cat.categories):
+            frame[column] = frame[column].cat.set_categories(categories)
+            changed = True
+        rows[column] = rows[column].astype(frame[column].dtype)
+    return changed
+
+
+class Snapshot:
+    # Uma versão imutável dos dados e das estruturas derivadas; sessões em andamento seguem com a sua
+    def __init__(self, version, frame, hashes, partitions, bounds, moments, regressions=None):
+        self.version = version
+        self.frame = frame
+        self.hashes = hashes
+        self.partitions = partitions
+        self.bounds = bounds
+        self.moments = moments
+        self._regressions = regressions or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, version, frame):
+        return cls(version, frame, row_hashes(frame), PartitionIndex(frame), country_bounds(frame),
+                   {key: group_moments(frame, key, MOMENT_COLUMNS) for key in GROUP_KEYS})
+
+    def regression_stats(self, features):
+        # Registradas na primeira consulta; a partir daí acompanham cada delta
+        features = tuple(features)
+        with self._lock:
+            stats = self._regressions.get(features)
+            if stats is None:
+                stats = self._regressions[features] = SufficientStats.from_frame(self.frame, features)
+            return stats
+
+    def apply(self, version, incoming, removed=None):
+        # incoming: linhas lidas (todas ou só as anexadas); removed: chaves que saíram do arquivo
+        hashes = row_hashes(incoming)
+        known = self.hashes.reindex(hashes.index, fill_value=0)
+        delta_keys = hashes.index[known.to_numpy() != hashes.to_numpy()]
+        drop_keys = delta_keys.intersection(self.hashes.index)
+        if removed is not None:
+            drop_keys = drop_keys.union(removed)
+        if not len(delta_keys) and not len(drop_keys):
+            return self._relabel(version), {"added": 0, "changed": 0, "removed": 0}
+
+        current = row_keys(self.frame)
+        dropped = current.isin(drop_keys)
+        incoming_keys = row_keys(incoming)
+        fresh = incoming.loc[incoming_keys.isin(delta_keys) & ~incoming_keys.duplicated(keep="last"),
+                             list(self.frame.columns)]
+        old_rows = self.frame.loc[dropped]
+        kept = self.frame.loc[~dropped]
+        new_categories = _unify_categories(kept, fresh)
+        frame = pd.concat([kept, fresh], ignore_index=True)
+
+        # Anos e países afetados pelo delta (nos dois sentidos: linhas que saem e que entram)
+        touched = pd.concat([old_rows[KEY_COLUMNS], fresh[KEY_COLUMNS]])
+        years = set(touched["Year"].astype(int))
+        countries = set(touched["Country"].astype(str))
+
+        if new_categories:
+            # País novo muda o dicionário das categorias: as fatias antigas não combinam mais
+            partitions = PartitionIndex(frame)
+        else:
+            partitions = self.partitions.replace(frame, years, countries)
+        touched_rows = frame.loc[frame["Country"].isin(countries)]
+        bounds = pd.concat([self.bounds.drop(list(countries), errors="ignore"), country_bounds(touched_rows)])
+        moments = {key: self._update_moments(self.moments[key], old_rows, fresh, key) for key in GROUP_KEYS}
+        with self._lock:
+            regressions = {features: stats.merge(SufficientStats.from_frame(old_rows, features), -1)
+                           .merge(SufficientStats.from_frame(fresh, features))
+                           for features, stats in self._regressions.items()}
+
+        hashes = pd.concat([self.hashes.drop(drop_keys), hashes.loc[delta_keys]])
+        snapshot = Snapshot(version, frame, hashes, partitions, bounds.sort_index(), moments, regressions)
+        return snapshot, {"added": len(delta_keys.difference(self.hashes.index)),
+                          "changed": len(delta_keys.intersection(self.hashes.index)),
+                          "removed": len(drop_keys.difference(delta_keys))}
+
+    @staticmethod
+    def _update_moments(moments, old_rows, fresh, key):
+        removed = group_moments(old_rows, key, MOMENT_COLUMNS)
+        added = group_moments(fresh, key, MOMENT_COLUMNS)
+        return {stat: moments[stat].sub(removed[stat], fill_value=0).add(added[stat], fill_value=0)
+                for stat in moments}
+
+    def _relabel(self, version):
+        # Arquivo mudou sem mudar nenhuma linha (ex.: espaços): mesmas estruturas, nova versão
+        with self._lock:
+            regressions = dict(self._regressions)
+        return Snapshot(version, self.frame, self.hashes, self.partitions, self.bounds, self.moments, regressions)
+
+
+class LiveDataset:
+    def __init__(self, path=CSV_PATH, interval=1.0):
+        self.path = path
+        self.interval = interval
+        self.snapshot = None
+        self.previous = None
+        self.counters = {"refreshes": 0, "appends": 0, "full": 0, "added": 0, "changed": 0, "removed": 0,
+                         "last_ms": 0.0}
+        self._seen = None
+        # stat de um arquivo com a última linha incompleta, ainda não marcado como visto
+        self._pending = None
+        self._size = 0
+        self._prefix = None
+        self._header = b""
+        self._lock = threading.Lock()
+        self.current()
+
+    def _stat(self):
+        return tuple((os.stat(f).st_mtime_ns, os.stat(f).st_size) for f in (self.path, CODES_PATH))
+
+    def current(self):
+        # Checagem barata (stat) a cada chamada; a leitura só acontece quando o arquivo mudou
+        if self._stat() != self._seen:
+            self.refresh()
+        return self.snapshot
+
+    def get(self, version):
+        for snapshot in (self.snapshot, self.previous):
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+        return None
+
+    def refresh(self):
+        with self._lock:
+            stat = self._stat()
+            if stat == self._seen:
+                return
+            start = time.perf_counter()
+            raw = self.path.read_bytes()
+            codes = CODES_PATH.read_bytes()
+            # Mesmo hash de data.file_version
+            version = hashlib.sha256(raw + codes).hexdigest()[:16]
+            codes_changed = self._seen is not None and stat[1] != self._seen[1]
+
+            appended = (self.snapshot is not None and not codes_changed and len(raw) > self._size
+                        and raw[self._size - 1:self._size] == b"\n"
+                        and hashlib.sha256(raw[:self._size]).digest() == self._prefix)
+            if appended and not raw.endswith(b"\n") and stat != self._pending:
+                # Escrita em andamento (última linha incompleta): sem marcar como visto, a próxima consulta
+                # relê o arquivo; se ele não mudou até lá, a última linha é lida como está
+                self._pending = stat
+                return
+            self._seen, self._pending = stat, None
+            try:
+                if self.snapshot is None:
+                    # Primeira carga pelo sidecar parquet, quando existir (mesma versão)
+                    snapshot, delta = Snapshot.build(version, read_table(version, self.path)), None
+                elif codes_changed:
+                    snapshot, delta = Snapshot.build(version, parse_csv(io.BytesIO(raw))), None
+                elif appended:
+                    tail = parse_csv(io.BytesIO(self._header + raw[self._size:]))
+                    snapshot, delta = self.snapshot.apply(version, tail)
+                    self.counters["appends"] += 1
+                else:
+                    incoming = parse_csv(io.BytesIO(raw))
+                    removed = self.snapshot.hashes.index.difference(row_keys(incoming))
+                    snapshot, delta = self.snapshot.apply(version, incoming, removed)
+                    self.counters["full"] += 1
+            except (ValueError, KeyError, pd.errors.ParserError) as e:
+                # Arquivo inválido no meio de uma edição: mantém a versão atual
+                logger.warning("recarga ignorada: %s", e)
+                return
+
+            self._size = len(raw)
+            self._prefix = hashlib.sha256(raw).digest()
+            self._header = raw[:raw.find(b"\n") + 1]
+            self.previous, self.snapshot = self.snapshot, snapshot
+            self.counters["refreshes"] += 1
+            for name, count in (delta or {}).items():
+                self.counters[name] += count
+            self.counters["last_ms"] = (time.perf_counter() - start) * 1000
+
+    def watch(self):
+        # Observador em segundo plano: a ingestão acontece antes de alguma sessão pedir os dados
+        def loop():
+            while True:
+                time.sleep(self.interval)
+                try:
+                    self.current()
+                except OSError as e:
+                    logger.warning("observador: %s", e)
+
+        threading.Thread(target=loop, name="data-refresh", daemon=True).start()
+        return self
+
+
+@st.cache_resource(show_spinner=False)
+def load_live_dataset():
+    return LiveDataset(CSV_PATH, setting("REFRESH_INTERVAL", 1.0, float)).watch()
+
+
+def snapshot_for(version):
+    # None fora do modo de recarga (ou para versões que já saíram da memória)
+    if not refresh_enabled():
+        return None
+    return load_live_dataset().get(version)
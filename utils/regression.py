@@ -0,0 +1,119 @@
+"""Regressão linear (MQO) de todos os anos em uma única passada vetorizada."""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.artifacts import persisted
+from utils.data import _shared_frame, data_version
+from utils.lazy import lazy_import
+from utils.metrics import timed
+
+scipy_stats = lazy_import("scipy.stats")
+sm = lazy_import("statsmodels.api")
+
+TARGET = "Life expectancy"
+REGRESSION_FEATURES = ["GDP", "Schooling", "HIV/AIDS", "Adult Mortality", "Income composition of resources",
+                       "BMI", "Alcohol", "Total expenditure", "Polio", "Diphtheria", "Hepatitis B"]
+
+
+class SufficientStats:
+    # X'X, X'y, y'y e n por ano: bastam para o MQO e podem ser somados/subtraídos por linha,
+    # então linhas novas ou alteradas atualizam a regressão sem revisitar o restante dos dados.
+    __slots__ = ("years", "n", "xtx", "xty", "yty")
+
+    def __init__(self, years, n, xtx, xty, yty):
+        self.years, self.n, self.xtx, self.xty, self.yty = years, n, xtx, xty, yty
+
+    @classmethod
+    def from_frame(cls, df, features, target=TARGET):
+        features = list(features)
+        data = df[["Year", target] + features].dropna().sort_values("Year", kind="stable")
+        years, starts, counts = np.unique(data["Year"].to_numpy(), return_index=True, return_counts=True)
+        if not len(data):
+            p = len(features) + 1
+            return cls(years.astype(int), counts, np.zeros((0, p, p)), np.zeros((0, p)), np.zeros(0))
+        X = np.column_stack([np.ones(len(data)), data[features].to_numpy(dtype="float64")])
+        y = data[target].to_numpy(dtype="float64")
+        # Somas por ano sobre as linhas já ordenadas (reduceat nos inícios de cada ano)
+        xtx = np.add.reduceat(X[:, :, None] * X[:, None, :], starts)
+        xty = np.add.reduceat(X * y[:, None], starts)
+        yty = np.add.reduceat(y ** 2, starts)
+        return cls(years.astype(int), counts, xtx, xty, yty)
+
+    def merge(self, other, sign=1):
+        # sign=-1 retira as contribuições de linhas removidas; anos que ficam vazios saem
+        years = np.union1d(self.years, other.years)
+        n = np.zeros(len(years), dtype="int64")
+        xtx = np.zeros((len(years),) + self.xtx.shape[1:])
+        xty = np.zeros((len(years),) + self.xty.shape[1:])
+        yty = np.zeros(len(years))
+        for stats, factor in ((self, 1), (other, sign)):
+            pos = np.searchsorted(years, stats.years)
+            n[pos] += factor * stats.n
+            xtx[pos] += factor * stats.xtx
+            xty[pos] += factor * stats.xty
+            yty[pos] += factor * stats.yty
+        keep = n > 0
+        return SufficientStats(years[keep], n[keep], xtx[keep], xty[keep], yty[keep])
+
+
+def fit_from_stats(stats, features):
+    # Resolve as equações normais X'X b = X'y de todos os anos de uma vez
+    features = list(features)
+    years, counts, XtX, Xty = stats.years, stats.n, stats.xtx, stats.xty
+    p = len(features) + 1
+
+    # Anos com poucas observações ou colinearidade ficam NaN
+    valid = counts > p
+    XtX_inv = np.full_like(XtX, np.nan)
+    rank = np.linalg.matrix_rank(XtX[valid]) if valid.any() else np.array([], dtype=int)
+    solvable = np.flatnonzero(valid)[rank == p]
+    XtX_inv[solvable] = np.linalg.inv(XtX[solvable])
+    beta = np.einsum("gij,gj->gi", XtX_inv, Xty)
+
+    # RSS = y'y - b'X'y e TSS = y'y - n * média²; a coluna 0 de X'y é a soma de y
+    rss = stats.yty - np.einsum("gi,gi->g", beta, Xty)
+    y_mean = np.divide(Xty[:, 0], counts, out=np.full(len(years), np.nan), where=counts > 0)
+    tss = stats.yty - counts * y_mean ** 2
+    dof = counts - p
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma2 = rss / dof
+        se = np.sqrt(sigma2[:, None] * np.diagonal(XtX_inv, axis1=1, axis2=2))
+        t_stat = beta / se
+        r2 = 1 - rss / tss
+    p_values = 2 * scipy_stats.t.sf(np.abs(t_stat), dof[:, None])
+
+    terms = ["const"] + features
+    table = {"Year": years.astype(int), "n": counts, "R2": r2}
+    for i, term in enumerate(terms):
+        table[f"coef {term}"] = beta[:, i]
+        table[f"se {term}"] = se[:, i]
+        table[f"p {term}"] = p_values[:, i]
+    return pd.DataFrame(table).set_index("Year")
+
+
+def fit_by_year(df, features, target=TARGET):
+    return fit_from_stats(SufficientStats.from_frame(df, features, target), features)
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+@persisted
+def _regression_table(version, features):
+    from utils.refresh import snapshot_for
+
+    snapshot = snapshot_for(version)
+    if snapshot is not None:
+        return fit_from_stats(snapshot.regression_stats(features), features)
+    return fit_by_year(_shared_frame(version), features)
+
+
+@timed("stats")
+def load_regression_table(features):
+    return _regression_table(data_version(), tuple(features))
+
+
+def statsmodels_summary(df_year, features, target=TARGET):
+    # Resumo completo só quando pedido: statsmodels é pesado para importar
+    data = df_year[[target] + list(features)].dropna().astype("float64")
+    model = sm.OLS(data[target], sm.add_constant(data[list(features)])).fit()
+    return model.summary()
@@ -0,0 +1,261 @@
+"""Relatório estático do dashboard: figuras e tabelas das páginas renderizadas sem navegador.
+
+Cada item é identificado por um hash do construtor, dos parâmetros e da versão dos dados; itens
+já exportados com o mesmo hash são reaproveitados de .cache/report/ em vez de renderizados de novo.
+"""
+import hashlib
+import html
+import importlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.artifacts import source_revision
+from utils.charts import (choropleth_figure, country_change_figure, histogram_box_figure, regression_figure,
+                          status_box_figure, vaccination_box_figure)
+from utils.data import CACHE_DIR, data_version, read_table
+from utils.geo import choropleth_payload
+from utils.lod import histogram_summary
+from utils.partitions import PartitionIndex
+from utils.query import PandasBackend
+from utils.rankings import get_top_bottom_life_expectancy, process_data
+from utils.regression import fit_by_year
+from utils.stats import country_confidence_intervals
+
+REPORT_CACHE_DIR = CACHE_DIR / "report"
+# Módulos que montam os itens do relatório: mudar o código de qualquer um invalida o cache de exportação
+BUILDER_MODULES = ("utils.report", "utils.charts", "utils.geo", "utils.lod", "utils.rankings", "utils.regression",
+                   "utils.stats")
+VACCINES = {"Hepatitis B": "Hepatite B", "Polio": "Poliomielite", "Diphtheria": "Difteria"}
+MAP_METRIC = "Life expectancy"
+
+# Estado de cada processo do pool: os dados são carregados uma vez por worker
+_context = {}
+
+
+def _init_worker(version):
+    df = read_table(version)
+    partitions = PartitionIndex(df)
+    _context.update(df=df, partitions=partitions, backend=PandasBackend(df, partitions), regressions={})
+
+
+def _top_bottom_table(ctx, year):
+    return process_data(ctx["backend"], year)
+
+
+def _vaccination_table(ctx, year):
+    top5, bottom5 = get_top_bottom_life_expectancy(ctx["backend"], year)
+    return pd.concat([top5.assign(Grupo="Top 5"), bottom5.assign(Grupo="Bottom 5")], ignore_index=True)
+
+
+def _confidence_intervals(ctx):
+    return country_change_figure(country_confidence_intervals(ctx["df"]))
+
+
+def _histogram(ctx):
+    return histogram_box_figure(histogram_summary(ctx["df"][MAP_METRIC].to_numpy()), "Expectativa de Vida",
+                                title="Histograma da Expectativa de Vida")
+
+
+def _choropleth(ctx, metric, year, color_range):
+    frame = ctx["partitions"].year(year)[["ISO3", "Country", metric]].dropna()
+    return choropleth_figure(choropleth_payload(frame, metric), metric, title=f"{metric} em {year}",
+                             color_range=color_range)
+
+
+def _status_box(ctx):
+    return status_box_figure(ctx["df"])
+
+
+def _vaccination_box(ctx, vaccine, threshold):
+    return vaccination_box_figure(ctx["df"], vaccine, threshold, VACCINES[vaccine])
+
+
+def _regression(ctx, features, year):
+    key = tuple(features)
+    if key not in ctx["regressions"]:
+        ctx["regressions"][key] = fit_by_year(ctx["df"], list(features))
+    table = ctx["regressions"][key]
+    df_year = ctx["partitions"].year(year).dropna(subset=list(features) + ["Life expectancy"])
+    return regression_figure(df_year, list(features), table.loc[year], year)
+
+
+BUILDERS = {
+    "top_bottom_table": _top_bottom_table,
+    "vaccination_table": _vaccination_table,
+    "confidence_intervals": _confidence_intervals,
+    "histogram": _histogram,
+    "choropleth": _choropleth,
+    "status_box": _status_box,
+    "vaccination_box": _vaccination_box,
+    "regression": _regression,
+}
+
+
+def report_items(df, years=None):
+    # Ordem das seções no relatório; cada item: seção, título, construtor e parâmetros (JSON)
+    partitions_years = sorted(int(y) for y in df["Year"].unique())
+    years = [y for y in partitions_years if years is None or y in years]
+    values = df[MAP_METRIC].to_numpy()
+    color_range = [float(np.nanmin(values)), float(np.nanmax(values))]
+    regression_table = fit_by_year(df, ["GDP"])
+    fitted = set(regression_table.index[regression_table["R2"].notna()])
+
+    items = [
+        ("Análise de Dados", "Top 10 maiores e menores expectativas de vida (2015)", "top_bottom_table", {"year": 2015}),
+        ("Análise de Dados", "Vacinação nos 5 maiores e menores (2015)", "vaccination_table", {"year": 2015}),
+        ("Análise de Dados", "Mudança na expectativa de vida por país", "confidence_intervals", {}),
+        ("Análise Exploratória", "Distribuição da expectativa de vida", "histogram", {}),
+    ]
+    items += [("Mapa", f"Expectativa de vida em {y}", "choropleth",
+               {"metric": MAP_METRIC, "year": y, "color_range": color_range}) for y in years]
+    items.append(("Testes de Hipótese", "Desenvolvidos vs. em desenvolvimento", "status_box", {}))
+    items += [("Testes de Hipótese", f"Cobertura de {label} (limiar 90%)", "vaccination_box",
+               {"vaccine": vaccine, "threshold": 90}) for vaccine, label in VACCINES.items()]
+    items += [("Regressão Linear", f"PIB vs. expectativa de vida em {y}", "regression",
+               {"features": ["GDP"], "year": y}) for y in years if y in fitted]
+    return [{"section": section, "title": title, "builder": builder, "params": params}
+            for section, title, builder, params in items]
+
+
+def builder_revision():
+    return source_revision(importlib.import_module(name).__file__ for name in BUILDER_MODULES)
+
+
+def content_hash(item, version, revision=None):
+    raw = json.dumps([item["builder"], item["params"], version, revision or builder_revision()], sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def render_item(item, png=False):
+    # Executado nos workers: devolve o fragmento HTML e, se pedido, o PNG (kaleido)
+    result = BUILDERS[item["builder"]](_context, **item["params"])
+    if isinstance(result, pd.DataFrame):
+        return {"html": result.to_html(index=False, float_format="{:.2f}".format, border=0), "png": None,
+                "png_error": None}
+    fragment = result.to_html(full_html=False, include_plotlyjs=False)
+    image, error = None, None
+    if png:
+        try:
+            image = result.to_image(format="png", width=1000, height=600)
+        except Exception as e:
+            # kaleido ausente ou sem navegador para renderizar: segue só com o HTML
+            error = " ".join(str(e).split())[:200]
+    return {"html": fragment, "png": image, "png_error": error}
+
+
+def _cached(digest, png):
+    # Com --png, o item só é reaproveitado se já tiver o PNG ou o registro de que não há PNG
+    # (tabela, ou falha do kaleido gravada em .nopng): nesses casos o item não é renderizado de novo
+    fragment = REPORT_CACHE_DIR / f"{digest}.html"
+    if not fragment.exists():
+        return None
+    result = {"html": fragment.read_text(encoding="utf-8"), "png": None, "png_error": None}
+    if png:
+        image = REPORT_CACHE_DIR / f"{digest}.png"
+        missing = REPORT_CACHE_DIR / f"{digest}.nopng"
+        if image.exists():
+            result["png"] = image.read_bytes()
+        elif missing.exists():
+            result["png_error"] = missing.read_text(encoding="utf-8") or None
+        else:
+            return None
+    return result
+
+
+def _store(digest, rendered, png):
+    REPORT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    files = [(".html", rendered["html"].encode("utf-8")), (".png", rendered["png"])]
+    if png and rendered["png"] is None:
+        files.append((".nopng", (rendered["png_error"] or "").encode("utf-8")))
+    for suffix, content in files:
+        if content is None:
+            continue
+        target = REPORT_CACHE_DIR / f"{digest}{suffix}"
+        tmp = target.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, target)
+
+
+def _plotly_js():
+    from plotly.offline import get_plotlyjs
+
+    return get_plotlyjs()
+
+
+def _slug(item):
+    values = [str(value) for key, value in sorted(item["params"].items()) if key != "color_range"]
+    return "_".join([item["builder"]] + values).replace(" ", "-").replace("/", "-")
+
+
+def assemble(entries, version):
+    # Um único HTML autocontido: plotly.js embutido uma vez e os fragmentos de cada figura
+    parts = [
+        "<!DOCTYPE html><html lang='pt-br'><head><meta charset='utf-8'>",
+        "<title>Relatório - Expectativa de Vida</title>",
+        "<style>body{font-family:sans-serif;max-width:1100px;margin:auto}table{border-collapse:collapse}"
+        "td,th{padding:4px 8px;border-bottom:1px solid #ddd;text-align:right}</style>",
+        f"<script type='text/javascript'>{_plotly_js()}</script></head><body>",
+        "<h1>🌍 Expectativa de Vida - Relatório</h1>",
+        f"<p>Versão dos dados: <code>{version}</code></p>",
+    ]
+    section = None
+    for item, result in entries:
+        if item["section"] != section:
+            section = item["section"]
+            parts.append(f"<h2>{html.escape(section)}</h2>")
+        parts.append(f"<h3>{html.escape(item['title'])}</h3>")
+        parts.append(result["html"])
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def export_report(out_dir, png=False, years=None, max_workers=None, force=False):
+    start = time.perf_counter()
+    out_dir = Path(out_dir)
+    version = data_version()
+    df = read_table(version)
+    items = report_items(df, years)
+    revision = builder_revision()
+    digests = [content_hash(item, version, revision) for item in items]
+
+    rendered = {}
+    pending = []
+    for item, digest in zip(items, digests):
+        cached = None if force else _cached(digest, png)
+        if cached is None:
+            pending.append((item, digest))
+        else:
+            rendered[digest] = cached
+
+    # Falhas do PNG gravadas em exportações anteriores também aparecem no resumo
+    png_errors = {result["png_error"] for result in rendered.values() if result["png_error"]}
+    if pending:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(version,)) as pool:
+            futures = [(digest, pool.submit(render_item, item, png)) for item, digest in pending]
+            for digest, future in futures:
+                result = future.result()
+                if result["png_error"]:
+                    png_errors.add(result["png_error"])
+                _store(digest, result, png)
+                rendered[digest] = result
+
+    entries = [(item, rendered[digest]) for item, digest in zip(items, digests)]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "report.html").write_text(assemble(entries, version), encoding="utf-8")
+    if png:
+        png_dir = out_dir / "png"
+        png_dir.mkdir(exist_ok=True)
+        for item, result in entries:
+            if result["png"]:
+                (png_dir / f"{_slug(item)}.png").write_bytes(result["png"])
+
+    return {"items": len(items), "rendered": len(pending), "reused": len(items) - len(pending),
+            "seconds": time.perf_counter() - start, "png_errors": sorted(png_errors),
+            "report": str(out_dir / "report.html")}
@@ -0,0 +1,222 @@
+"""Histórico do chat por sessão com orçamento de memória, compactação e spill em disco.
+
+Mensagens antigas acima do orçamento (CHAT_SESSION_BUDGET) viram um resumo curto em memória e o
+texto completo vai para um SQLite; se ainda assim o orçamento estourar, saem da memória. O histórico
+é exibido em páginas, e só a página visível é lida do disco.
+"""
+import os
+import sqlite3
+import threading
+import uuid
+import weakref
+
+import streamlit as st
+
+from utils.config import setting
+from utils.data import CACHE_DIR
+
+SPILL_DIR = CACHE_DIR / "chat_spill"
+AVATARS = {"user": "👤", "assistant": "🤖"}
+SUMMARY_CHARS = 160
+KEEP_RECENT = 4
+# Custo aproximado de um dict de mensagem além do texto
+MESSAGE_OVERHEAD = 200
+
+_registry = weakref.WeakValueDictionary()
+
+
+def message_size(content):
+    return len(content.encode("utf-8")) + MESSAGE_OVERHEAD
+
+
+def summarize(content):
+    first_line = content.strip().split("\n", 1)[0]
+    if len(first_line) > SUMMARY_CHARS:
+        first_line = first_line[:SUMMARY_CHARS].rstrip()
+    return f"{first_line} … ({len(content)} caracteres)"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _remove_stale_spills(directory):
+    # Sessões só vivem dentro do processo: arquivos de processos encerrados podem ser apagados
+    for path in directory.glob("*.sqlite*"):
+        pid = path.name.split(".")[0]
+        if pid.isdigit() and (int(pid) == os.getpid() or not _pid_alive(int(pid))):
+            path.unlink(missing_ok=True)
+
+
+class SpillStore:
+    # Um arquivo por processo: o histórico pertence às sessões deste worker
+    def __init__(self, directory=SPILL_DIR):
+        self.path = directory / f"{os.getpid()}.sqlite"
+        self._lock = threading.Lock()
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            _remove_stale_spills(directory)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS messages (session TEXT, seq INTEGER, role TEXT, "
+                    "content TEXT, PRIMARY KEY (session, seq))"
+                )
+        except (OSError, sqlite3.Error):
+            # Sem disco disponível: mensagens compactadas ficam só com o resumo
+            self.path = None
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def put(self, session, seq, role, content):
+        if self.path is None:
+            return False
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?)", (session, seq, role, content))
+            return True
+        except sqlite3.Error:
+            return False
+
+    def get_many(self, session, seqs):
+        if self.path is None or not seqs:
+            return {}
+        placeholders = ",".join("?" * len(seqs))
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    f"SELECT seq, role, content FROM messages WHERE session = ? AND seq IN ({placeholders})",
+                    (session, *seqs),
+                ).fetchall()
+        except sqlite3.Error:
+            return {}
+        return {seq: (role, content) for seq, role, content in rows}
+
+    def drop_session(self, session):
+        if self.path is None:
+            return
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute("DELETE FROM messages WHERE session = ?", (session,))
+        except sqlite3.Error:
+            pass
+
+
+class ChatHistory:
+    # Em memória: seq -> role, content, size, compacted. Mensagens descartadas ficam só no disco
+
+    def __init__(self, session_id, budget, store):
+        self.session_id = session_id
+        self.budget = budget
+        self.store = store
+        self._messages = {}
+        self._next_seq = 0
+        self.bytes = 0
+        self.compacted = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        _registry[session_id] = self
+        weakref.finalize(self, store.drop_session, session_id)
+
+    def __len__(self):
+        return self._next_seq
+
+    def append(self, role, content):
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            size = message_size(content)
+            self._messages[seq] = {"role": role, "content": content, "size": size, "compacted": False}
+            self.bytes += size
+            self._enforce_budget()
+
+    def _enforce_budget(self):
+        protected = self._next_seq - KEEP_RECENT
+        # 1) compacta as mensagens mais antigas (texto completo vai para o disco)
+        for seq in sorted(self._messages):
+            if self.bytes <= self.budget or seq >= protected:
+                break
+            message = self._messages[seq]
+            if message["compacted"]:
+                continue
+            summary = summarize(message["content"])
+            if len(summary) >= len(message["content"]):
+                continue
+            self.store.put(self.session_id, seq, message["role"], message["content"])
+            new_size = message_size(summary)
+            self.bytes += new_size - message["size"]
+            message.update(content=summary, size=new_size, compacted=True)
+            self.compacted += 1
+        # 2) ainda acima do orçamento: tira da memória (o texto continua no disco, se houver)
+        for seq in sorted(self._messages):
+            if self.bytes <= self.budget or seq >= protected:
+                break
+            message = self._messages.pop(seq)
+            if not message["compacted"]:
+                self.store.put(self.session_id, seq, message["role"], message["content"])
+            self.bytes -= message["size"]
+            self.evicted += 1
+
+    def page_count(self, page_size):
+        return max(1, -(-self._next_seq // page_size))
+
+    def page(self, index, page_size):
+        # Página 0 = mensagens mais recentes; devolvida em ordem cronológica
+        stop = self._next_seq - index * page_size
+        start = max(stop - page_size, 0)
+        with self._lock:
+            entries = {seq: dict(self._messages[seq]) for seq in range(start, stop) if seq in self._messages}
+        missing = [seq for seq in range(start, stop) if seq not in entries or entries[seq]["compacted"]]
+        spilled = self.store.get_many(self.session_id, missing)
+        page = []
+        for seq in range(start, stop):
+            if seq in spilled:
+                role, content = spilled[seq]
+            elif seq in entries:
+                role, content = entries[seq]["role"], entries[seq]["content"]
+            else:
+                # Sem disco: perguntas e respostas se alternam
+                role, content = ("user" if seq % 2 == 0 else "assistant"), "_(mensagem descartada)_"
+            page.append({"seq": seq, "role": role, "avatar": AVATARS.get(role), "content": content})
+        return page
+
+    def usage(self):
+        return {"sessão": self.session_id[:8], "mensagens": self._next_seq, "em memória": len(self._messages),
+                "compactadas": self.compacted, "descartadas": self.evicted,
+                "bytes": self.bytes, "orçamento": self.budget}
+
+
+def session_usage():
+    # Uso de memória de todas as sessões vivas do processo, das mais pesadas para as mais leves
+    return sorted((history.usage() for history in list(_registry.values())), key=lambda row: -row["bytes"])
+
+
+@st.cache_resource(show_spinner=False)
+def load_spill_store():
+    return SpillStore()
+
+
+def _session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else uuid.uuid4().hex
+
+
+def load_history(key="chat_history"):
+    history = st.session_state.get(key)
+    if history is None:
+        history = ChatHistory(_session_id(), setting("CHAT_SESSION_BUDGET", 64 * 1024, int), load_spill_store())
+        st.session_state[key] = history
+    return history
+
+
+def page_size():
+    return setting("CHAT_PAGE_SIZE", 20, int)
@@ -0,0 +1,161 @@
+"""Tabela e agregados publicados uma vez em arquivos Arrow IPC e mapeados em memória (SHARED_DATASET=1).
+
+Um processo publica cada versão em <SHARED_DATASET_DIR>/<versão>/ e troca o ponteiro CURRENT de uma vez
+(os.replace). Os demais processos só mapeiam os arquivos: as colunas numéricas viram arrays do pandas
+apontando para o mapeamento (somente leitura, páginas compartilhadas pelo sistema operacional), as
+partições são fatias desses frames e o cubo de agregados não é recalculado.
+"""
+import json
+import os
+import re
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.config import setting
+from utils.cube import AggregateCube
+from utils.data import CACHE_DIR, file_version, read_table, shared_enabled
+from utils.lazy import lazy_import
+from utils.partitions import PartitionIndex
+
+pa = lazy_import("pyarrow")
+ipc = lazy_import("pyarrow.ipc")
+
+POINTER = "CURRENT"
+MANIFEST = "manifest.json"
+# Nome dos diretórios de versão (hash de utils.data.file_version): só eles são removidos por _prune
+VERSION_NAME = re.compile(r"^[0-9a-f]{16}$")
+# Versões mantidas no disco: a atual e a anterior (processos ainda podem estar lendo)
+KEEP_VERSIONS = 2
+
+_pointer_memo = {}
+
+
+def shared_root():
+    return Path(setting("SHARED_DATASET_DIR", str(CACHE_DIR / "shared")))
+
+
+def to_arrow(df):
+    # NaN continua NaN (sem bitmap de nulos), o que permite a conversão sem cópia de volta ao pandas
+    columns = {}
+    for name in df.columns:
+        series = df[name]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            columns[name] = pa.DictionaryArray.from_arrays(
+                pa.array(codes, mask=codes < 0), pa.array(series.cat.categories.astype(str).to_numpy()))
+        else:
+            columns[name] = pa.array(series.to_numpy())
+    return pa.table(columns)
+
+
+def _write_ipc(table, path):
+    with ipc.new_file(str(path), table.schema) as writer:
+        writer.write_table(table)
+
+
+def _read_ipc(path):
+    return ipc.open_file(pa.memory_map(str(path))).read_all()
+
+
+def publish(df, version, root=None):
+    # Grava a versão em um diretório temporário, renomeia e só então aponta CURRENT para ela
+    root = Path(root or shared_root())
+    target = root / version
+    if not (target / MANIFEST).exists():
+        root.mkdir(parents=True, exist_ok=True)
+        tmp = root / f".{version}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        by_year = df.sort_values(["Year", "Country"], kind="stable").reset_index(drop=True)
+        by_country = df.sort_values(["Country", "Year"], kind="stable").reset_index(drop=True)
+        _write_ipc(to_arrow(by_year), tmp / "by_year.arrow")
+        _write_ipc(to_arrow(by_country), tmp / "by_country.arrow")
+
+        # Arrays do cubo concatenados em uma única coluna float64; o manifesto guarda posição e forma
+        cube = AggregateCube(df)
+        arrays = cube.arrays()
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            layout[name] = [offset, list(array.shape)]
+            offset += array.size
+        flat = np.concatenate([np.asarray(array, dtype="float64").ravel() for array in arrays.values()])
+        _write_ipc(pa.table({"data": flat}), tmp / "cube.arrow")
+        (tmp / MANIFEST).write_text(json.dumps({
+            "version": version, "rows": len(df), "metrics": cube.metrics, "countries": cube.countries,
+            "years": cube.years, "cube": layout,
+        }), encoding="utf-8")
+        try:
+            os.replace(tmp, target)
+        except OSError:
+            # Outro processo publicou a mesma versão primeiro
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    pointer = root / f".{POINTER}.{os.getpid()}.tmp"
+    pointer.write_text(version, encoding="utf-8")
+    os.replace(pointer, root / POINTER)
+    _prune(root, version)
+    return target
+
+
+def _is_version(path):
+    return path.is_dir() and VERSION_NAME.match(path.name) is not None and (path / MANIFEST).is_file()
+
+
+def _prune(root, current):
+    # SHARED_DATASET_DIR pode ser um diretório comum (/dev/shm): só são removidas versões publicadas aqui
+    versions = sorted((p for p in root.iterdir() if _is_version(p)), key=lambda p: p.stat().st_mtime, reverse=True)
+    # Mapeamentos já abertos continuam válidos mesmo após a remoção dos arquivos
+    for stale in [p for p in versions if p.name != current][KEEP_VERSIONS - 1:]:
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def current_version(root=None):
+    # Versão publicada em CURRENT, relida só quando o ponteiro muda; sem publicação, este processo publica
+    root = Path(root or shared_root())
+    pointer = root / POINTER
+    if not pointer.exists():
+        version = file_version()
+        publish(read_table(version), version, root)
+    stat = os.stat(pointer)
+    key = (str(pointer), stat.st_ino, stat.st_mtime_ns)
+    version = _pointer_memo.get(key)
+    if version is None:
+        version = pointer.read_text(encoding="utf-8").strip()
+        _pointer_memo.clear()
+        _pointer_memo[key] = version
+    return version
+
+
+class SharedDataset:
+    def __init__(self, directory):
+        manifest = json.loads((directory / MANIFEST).read_text(encoding="utf-8"))
+        self.version = manifest["version"]
+        # split_blocks evita consolidar as colunas em um bloco novo (o que copiaria os dados)
+        by_year = _read_ipc(directory / "by_year.arrow").to_pandas(split_blocks=True)
+        self.frame = _read_ipc(directory / "by_country.arrow").to_pandas(split_blocks=True)
+        self.partitions = PartitionIndex.from_sorted(by_year, self.frame)
+
+        flat = _read_ipc(directory / "cube.arrow").column("data").chunk(0).to_numpy(zero_copy_only=True)
+        arrays = {name: flat[offset:offset + int(np.prod(shape))].reshape(shape)
+                  for name, (offset, shape) in manifest["cube"].items()}
+        self.cube = AggregateCube.from_arrays(manifest["metrics"], manifest["countries"], manifest["years"],
+                                              arrays)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _load_shared(version, root):
+    directory = Path(root) / version
+    if not (directory / MANIFEST).exists():
+        return None
+    return SharedDataset(directory)
+
+
+def shared_for(version):
+    # None fora do modo compartilhado (ou se a versão já foi removida do disco)
+    if not shared_enabled():
+        return None
+    return _load_shared(version, str(shared_root()))
@@ -0,0 +1,253 @@
+"""Cálculos estatísticos vetorizados usados pelas páginas."""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.artifacts import persisted
+from utils.data import _shared_frame, data_version
+from utils.lazy import lazy_import
+from utils.metrics import timed
+
+scipy_stats = lazy_import("scipy.stats")
+
+
+def country_bounds(df, column="Life expectancy"):
+    # Primeiro e último ano de cada país em uma única passada (sem loop por país)
+    df = df[["Country", "Year", column]].dropna(subset=["Year"])
+    grouped = df.groupby("Country", observed=True)["Year"]
+    sizes = grouped.size()
+    valid = sizes[sizes >= 2].index
+    first = df.loc[grouped.idxmin().loc[valid]].set_index("Country")
+    last = df.loc[grouped.idxmax().loc[valid]].set_index("Country")
+    return pd.DataFrame({
+        "Start Year": first["Year"].to_numpy(dtype="int64"),
+        "End Year": last["Year"].to_numpy(dtype="int64"),
+        "Start Life": first[column].to_numpy(dtype="float64"),
+        "End Life": last[column].to_numpy(dtype="float64"),
+    }, index=pd.Index(first.index.astype(str), name="Country"))
+
+
+def intervals_from_bounds(bounds, confidence=0.95):
+    start = bounds["Start Life"].to_numpy()
+    end = bounds["End Life"].to_numpy()
+    n = 2
+    mean = (start + end) / n
+    std = np.sqrt(((start - mean) ** 2 + (end - mean) ** 2) / (n - 1))
+    # Sem variação entre os dois anos o intervalo é indefinido e o país é descartado
+    sem = np.where(std > 0, std / np.sqrt(n), np.nan)
+    lower, upper = scipy_stats.t.interval(confidence, df=n - 1, loc=mean, scale=sem)
+
+    stats_df = pd.DataFrame({
+        "Country": bounds.index.to_numpy(),
+        "Start Year": bounds["Start Year"].to_numpy(),
+        "End Year": bounds["End Year"].to_numpy(),
+        "Start Life": start,
+        "End Life": end,
+        "Mean": mean,
+        "CI Lower": lower,
+        "CI Upper": upper,
+    }).dropna()
+
+    # Ordena pelos países com maior diferença entre começo e fim
+    stats_df["Delta"] = stats_df["End Life"] - stats_df["Start Life"]
+    return stats_df.sort_values(by="Delta", ascending=False).reset_index(drop=True)
+
+
+def country_confidence_intervals(df, column="Life expectancy", confidence=0.95):
+    return intervals_from_bounds(country_bounds(df, column), confidence)
+
+
+def group_moments(df, key, columns):
+    # Contagem, soma e soma dos quadrados por grupo: médias e variâncias sem guardar as linhas
+    values = df[list(columns)].astype("float64")
+    groups = df[key]
+    return {
+        "n": values.notna().groupby(groups, observed=True).sum(),
+        "sum": values.groupby(groups, observed=True).sum(),
+        "sumsq": (values ** 2).groupby(groups, observed=True).sum(),
+    }
+
+
+def welch_from_moments(moments, column, first, second):
+    # Teste t de Welch bilateral entre dois grupos a partir dos momentos
+    n1, n2 = (moments["n"].at[group, column] for group in (first, second))
+    s1, s2 = (moments["sum"].at[group, column] for group in (first, second))
+    q1, q2 = (moments["sumsq"].at[group, column] for group in (first, second))
+    mean1, mean2 = s1 / n1, s2 / n2
+    a = (q1 - n1 * mean1 ** 2) / (n1 - 1) / n1
+    b = (q2 - n2 * mean2 ** 2) / (n2 - 1) / n2
+    t_stat = (mean1 - mean2) / np.sqrt(a + b)
+    dof = (a + b) ** 2 / (a ** 2 / (n1 - 1) + b ** 2 / (n2 - 1))
+    return float(t_stat), float(2 * scipy_stats.t.sf(abs(t_stat), dof))
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+@persisted
+def _country_confidence_intervals(version):
+    from utils.refresh import snapshot_for
+
+    snapshot = snapshot_for(version)
+    if snapshot is not None:
+        return intervals_from_bounds(snapshot.bounds)
+    return country_confidence_intervals(_shared_frame(version))
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+@persisted
+def _status_test(version, column="Life expectancy"):
+    from utils.refresh import snapshot_for
+
+    snapshot = snapshot_for(version)
+    if snapshot is not None:
+        moments = snapshot.moments["Status"]
+    else:
+        moments = group_moments(_shared_frame(version), "Status", [column])
+    return welch_from_moments(moments, column, "Developed", "Developing")
+
+
+@timed("stats")
+def load_country_confidence_intervals():
+    return _country_confidence_intervals(data_version())
+
+
+@timed("stats")
+def load_status_test():
+    return _status_test(data_version())
+
+
+def welch_sweep(coverage, life, thresholds=range(0, 100)):
+    # Teste t de Welch (H1: grupo >= limiar tem média maior) para todos os limiares de uma vez,
+    # usando somas acumuladas de contagens, somas e quadrados sobre os valores ordenados.
+    order = np.argsort(coverage, kind="stable")
+    x = np.asarray(coverage, dtype="float64")[order]
+    y = np.asarray(life, dtype="float64")[order]
+    csum = np.concatenate(([0.0], np.cumsum(y)))
+    csq = np.concatenate(([0.0], np.cumsum(y ** 2)))
+    cuts = np.asarray(list(thresholds), dtype="float64")
+
+    n_low = np.searchsorted(x, cuts, side="left")
+    n_high = len(x) - n_low
+    sum_low, sq_low = csum[n_low], csq[n_low]
+    sum_high, sq_high = csum[-1] - sum_low, csq[-1] - sq_low
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_low = sum_low / n_low
+        mean_high = sum_high / n_high
+        var_low = (sq_low - n_low * mean_low ** 2) / (n_low - 1)
+        var_high = (sq_high - n_high * mean_high ** 2) / (n_high - 1)
+        a, b = var_high / n_high, var_low / n_low
+        t_stat = (mean_high - mean_low) / np.sqrt(a + b)
+        dof = (a + b) ** 2 / (a ** 2 / (n_high - 1) + b ** 2 / (n_low - 1))
+    p_value = scipy_stats.t.sf(t_stat, dof)
+
+    return pd.DataFrame({
+        "threshold": cuts.astype(int), "n_high": n_high, "n_low": n_low,
+        "mean_high": mean_high, "mean_low": mean_low,
+        "t": t_stat, "df": dof, "p_value": p_value,
+    }).set_index("threshold")
+
+
+# Linhas mínimas em cada grupo para os testes de reamostragem
+MIN_GROUP_SIZE = 2
+
+
+def _chunks(iterations, n, max_cells=2_000_000):
+    # Divide as reamostragens em blocos para limitar a memória a ~max_cells valores por vez
+    size = max(1, min(iterations, max_cells // max(n, 1)))
+    for start in range(0, iterations, size):
+        yield min(size, iterations - start)
+
+
+def permutation_test(high, low, iterations=10_000, seed=42):
+    # H1: média(high) > média(low); estatística = diferença de médias
+    high = np.asarray(high, dtype="float64")
+    low = np.asarray(low, dtype="float64")
+    if min(len(high), len(low)) < MIN_GROUP_SIZE:
+        # Grupo vazio ou com um único país: não há teste a fazer
+        return np.nan, np.nan, np.empty(0)
+    pooled = np.concatenate((high, low))
+    total, n_high = pooled.sum(), len(high)
+    observed = high.mean() - low.mean()
+    rng = np.random.default_rng(seed)
+
+    # Cada permutação só precisa da soma de um subconjunto aleatório do tamanho do menor grupo:
+    # chaves aleatórias + argpartition sorteiam o subconjunto sem embaralhar a linha inteira.
+    n_low = len(pooled) - n_high
+    k = min(n_high, n_low)
+    diffs = []
+    for size in _chunks(iterations, len(pooled)):
+        keys = rng.random((size, len(pooled)), dtype=np.float32)
+        subset = pooled[np.argpartition(keys, k - 1, axis=1)[:, :k]].sum(axis=1)
+        sum_high = subset if k == n_high else total - subset
+        diffs.append(sum_high / n_high - (total - sum_high) / n_low)
+    diffs = np.concatenate(diffs)
+    p_value = (np.count_nonzero(diffs >= observed) + 1) / (iterations + 1)
+    return observed, p_value, diffs
+
+
+def bootstrap_ci(high, low, iterations=10_000, confidence=0.95, seed=42):
+    # Intervalo percentil da diferença de médias, reamostrando cada grupo com reposição
+    high = np.asarray(high, dtype="float64")
+    low = np.asarray(low, dtype="float64")
+    if min(len(high), len(low)) < MIN_GROUP_SIZE:
+        return np.nan, np.nan, np.empty(0)
+    rng = np.random.default_rng(seed)
+
+    diffs = []
+    for size in _chunks(iterations, len(high) + len(low)):
+        mean_high = high[rng.integers(0, len(high), (size, len(high)))].mean(axis=1)
+        mean_low = low[rng.integers(0, len(low), (size, len(low)))].mean(axis=1)
+        diffs.append(mean_high - mean_low)
+    diffs = np.concatenate(diffs)
+    alpha = (1 - confidence) / 2
+    lower, upper = np.quantile(diffs, [alpha, 1 - alpha])
+    return lower, upper, diffs
+
+
+def _coverage_groups(version, column, threshold):
+    df = _shared_frame(version)
+    data = df.loc[df[column].notna() & df["Life expectancy"].notna(), [column, "Life expectancy"]]
+    high = data.loc[data[column] >= threshold, "Life expectancy"].to_numpy()
+    low = data.loc[data[column] < threshold, "Life expectancy"].to_numpy()
+    return high, low
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+@persisted
+def _welch_sweep(version, column):
+    df = _shared_frame(version)
+    data = df.loc[df[column].notna() & df["Life expectancy"].notna(), [column, "Life expectancy"]]
+    return welch_sweep(data[column].to_numpy(), data["Life expectancy"].to_numpy())
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _resampling_tests(version, column, threshold, iterations, seed=42):
+    high, low = _coverage_groups(version, column, threshold)
+    observed, p_value, _ = permutation_test(high, low, iterations, seed)
+    lower, upper, _ = bootstrap_ci(high, low, iterations, seed=seed)
+    return {"diff": observed, "p_value": p_value, "ci_lower": lower, "ci_upper": upper,
+            "n_high": len(high), "n_low": len(low)}
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+@persisted
+def _coverage_range(version, column):
+    # Menor e maior cobertura entre as linhas usadas nos testes (com expectativa de vida)
+    df = _shared_frame(version)
+    values = df.loc[df["Life expectancy"].notna(), column].dropna().to_numpy()
+    return float(values.min()), float(values.max())
+
+
+@timed("stats")
+def load_welch_sweep(column):
+    return _welch_sweep(data_version(), column)
+
+
+@timed("stats")
+def load_coverage_range(column):
+    return _coverage_range(data_version(), column)
+
+
+@timed("stats")
+def load_resampling_tests(column, threshold, iterations):
+    return _resampling_tests(data_version(), column, int(threshold), int(iterations))
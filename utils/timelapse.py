@@ -0,0 +1,118 @@
+"""Geração de timelapse do mapa em paralelo, em memória e com cache em disco."""
+import hashlib
+import importlib.util
+import io
+import multiprocessing
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.data import CACHE_DIR, data_version
+from utils.lazy import lazy_import
+from utils.metrics import timed
+
+px = lazy_import("plotly.express")
+iio = lazy_import("imageio.v3")
+
+TIMELAPSE_DIR = CACHE_DIR / "timelapse"
+FRAME_WIDTH = 1000
+FRAME_HEIGHT = 600
+FRAME_DURATION_MS = 1000
+FORMATS = ("gif", "mp4")
+# Um subdiretório por versão dos dados; ficam a atual e a anterior (outros processos podem estar lendo)
+KEEP_VERSIONS = 2
+VERSION_NAME = re.compile(r"^[0-9a-f]{16}$")
+
+# Um lock por faixa de chaves: renderizações iguais esperam uma pela outra sem um dicionário que só cresce
+_locks = [threading.Lock() for _ in range(64)]
+
+
+def available_formats():
+    # MP4 depende do plugin imageio-ffmpeg (opcional); sem ele só o GIF é oferecido
+    return tuple(fmt for fmt in FORMATS if fmt != "mp4" or importlib.util.find_spec("imageio_ffmpeg"))
+
+
+def timelapse_key(metric, color_scale, years, fmt, version=None):
+    # Endereçamento por conteúdo: mesmos parâmetros + mesmos dados = mesmo arquivo
+    version = version or data_version()
+    raw = f"{metric}|{color_scale}|{min(years)}-{max(years)}|{fmt}|{version}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def render_frame(year, frame_df, metric, color_scale, color_range):
+    # Executado em um processo separado; devolve o PNG em bytes (sem arquivos temporários)
+    fig = px.choropleth(frame_df, locations="ISO3",
+                        color=metric,
+                        hover_name="Country",
+                        color_continuous_scale=color_scale,
+                        range_color=color_range,
+                        title=f"{metric} no Ano {year}")
+    return fig.to_image(format="png", width=FRAME_WIDTH, height=FRAME_HEIGHT)
+
+
+def encode_frames(frames, fmt):
+    images = [iio.imread(frame) for frame in frames]
+    buffer = io.BytesIO()
+    try:
+        if fmt == "gif":
+            iio.imwrite(buffer, images, extension=".gif", duration=FRAME_DURATION_MS, loop=0)
+        else:
+            # MP4 depende do plugin imageio-ffmpeg
+            iio.imwrite(buffer, images, extension=".mp4", fps=1000 / FRAME_DURATION_MS)
+    except Exception as e:
+        # Plugin ausente ou codificador com erro: a página mostra a mensagem em vez de quebrar
+        raise RuntimeError(f"não foi possível gerar o {fmt.upper()}: {e}") from e
+    return buffer.getvalue()
+
+
+def build_timelapse(partitions, metric, color_scale, years, fmt="gif", max_workers=None):
+    frames_data = {y: partitions.year(y)[["ISO3", "Country", metric]].dropna() for y in years}
+    values = [frame[metric] for frame in frames_data.values() if len(frame)]
+    if not values:
+        raise ValueError(f"sem valores de {metric} nos anos escolhidos")
+    # Escala de cor fixa entre os quadros para que as cores sejam comparáveis
+    color_range = (float(min(v.min() for v in values)), float(max(v.max() for v in values)))
+
+    # spawn: fork dentro do servidor do Streamlit (com várias threads) pode travar o processo filho
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(render_frame, y, frames_data[y], metric, color_scale, color_range)
+                   for y in years]
+        frames = [future.result() for future in futures]
+    return encode_frames(frames, fmt)
+
+
+@timed("figure")
+def load_timelapse(partitions, metric, color_scale, years, fmt="gif"):
+    if not years:
+        raise ValueError("nenhum ano no intervalo escolhido")
+    version = data_version()
+    key = timelapse_key(metric, color_scale, years, fmt, version)
+    path = TIMELAPSE_DIR / version / f"{key}.{fmt}"
+    if path.exists():
+        return path.read_bytes()
+
+    # Sessões do mesmo processo que pedem o mesmo timelapse esperam uma única renderização
+    with _locks[int(key[:8], 16) % len(_locks)]:
+        if path.exists():
+            return path.read_bytes()
+        content = build_timelapse(partitions, metric, color_scale, years, fmt)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Escrita atômica: outros processos nunca leem um arquivo pela metade
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(content)
+            os.replace(tmp, path)
+            _prune(version)
+        except OSError:
+            pass
+        return content
+
+
+def _prune(current):
+    # Só diretórios com nome de versão: o que mais estiver em TIMELAPSE_DIR não é tocado
+    versions = sorted((p for p in TIMELAPSE_DIR.iterdir() if p.is_dir() and VERSION_NAME.match(p.name)),
+                      key=lambda p: p.stat().st_mtime, reverse=True)
+    for stale in [p for p in versions if p.name != current][KEEP_VERSIONS - 1:]:
+        shutil.rmtree(stale, ignore_errors=True)